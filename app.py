@@ -4,18 +4,41 @@ Autor: JOSE CAMARENA MEZA
 """
 
 import streamlit as st
+import logging
+from contextlib import contextmanager
 import pandas as pd
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')
 
 # Importar módulos propios
-from src.config import APP_CONFIG, FILE_CONFIG, CUSTOM_CSS
+from src.config import (
+    APP_CONFIG, FILE_CONFIG, ANALYSIS_CONFIG, VISUALIZATION_CONFIG, EXPORT_CONFIG, STORE_CONFIG, INSTRUMENTATION_CONFIG,
+    CUSTOM_CSS
+)
+from src.cache import cached_result, column_fingerprint, content_fingerprint, derive_fingerprint, fingerprint_bytes
+from src.store import load_result, result_key, save_result
+from src.instrumentation import enable, get_records, is_enabled, prometheus_text, reset_records, serve_metrics, stage
+from src.profiling import available_profilers, profile_block
+from src.pipeline import build_report_bundle, compute_univariate_results
+from src.incremental import (
+    dataset_state,
+    update_dataset_state,
+    is_exact,
+    data_from_state,
+    correlation_from_state
+)
 from src.utils import (
     determine_variable_type, 
     handle_missing_values,
     load_csv_file,
-    load_excel_file,
+    load_csv_columns,
+    read_csv_header,
+    read_csv_rows,
+    sniff_csv_options,
+    load_multiple_files,
+    files_fingerprint,
+    combine_datasets,
     validate_dataframe,
     get_numeric_columns,
     get_categorical_columns,
@@ -23,24 +46,17 @@ from src.utils import (
     detect_and_convert_dates
 )
 from src.analysis import (
-    calculate_frequency_table,
-    calculate_all_measures_grouped,
-    calculate_quartiles,
     calculate_correlation_matrix,
     detect_outliers_iqr,
     detect_outliers_zscore,
     test_normality,
-    calculate_statistics_summary
+    test_normality_batch,
+    build_sample_view,
+    extend_bin_edges,
+    validate_bin_edges
 )
 from src.visualization import (
     apply_theme,
-    generate_histogram,
-    generate_interactive_histogram,
-    generate_pie_chart,
-    generate_bar_chart,
-    generate_horizontal_bar_chart,
-    generate_boxplot,
-    generate_violinplot,
     generate_correlation_heatmap,
     generate_interactive_correlation_heatmap,
     generate_scatter_plot,
@@ -53,10 +69,28 @@ from src.export import (
     export_to_excel,
     export_to_pdf,
     generate_html_report,
-    generate_r_code
+    generate_html_bundle,
+    generate_r_code,
+    generate_r_bundle
 )
 
 
+class InterfaceErrorHandler(logging.Handler):
+    """Muestra con st.error los errores registrados por los módulos de src."""
+    
+    def emit(self, record):
+        st.error(self.format(record))
+
+
+def install_error_handler():
+    """Conecta el logger de src con la interfaz (una sola vez aunque la página se vuelva a ejecutar)."""
+    logger = logging.getLogger('src')
+    if not any(handler.get_name() == 'interfaz' for handler in logger.handlers):
+        handler = InterfaceErrorHandler(level=logging.ERROR)
+        handler.set_name('interfaz')
+        logger.addHandler(handler)
+
+
 def main():
     """Función principal de la aplicación."""
     
@@ -74,15 +108,26 @@ def main():
     # Título principal
     st.markdown('<p class="title">📊 Análisis Estadístico Descriptivo v2.0</p>', unsafe_allow_html=True)
     
+    # Errores de los módulos de análisis (registrados con logging) mostrados en la interfaz
+    install_error_handler()
+    
+    # Registros de tiempos de esta interacción
+    reset_records()
+    if INSTRUMENTATION_CONFIG['metrics_port']:
+        serve_metrics(INSTRUMENTATION_CONFIG['metrics_port'])
+    
     # Configuración de la barra lateral
     render_sidebar()
     
     # Contenido principal
-    if st.session_state.get('uploaded_file') is not None:
+    if st.session_state.get('uploaded_files'):
         render_main_content()
     else:
         render_welcome_screen()
     
+    if is_enabled():
+        render_timing_breakdown()
+    
     # Footer
     st.markdown("""
         <div class="footer">
@@ -98,37 +143,69 @@ def render_sidebar():
         st.image("https://cdn.pixabay.com/photo/2018/09/18/11/19/business-3685935_960_720.png", width=100)
         st.markdown("### 📁 Carga de Datos")
         
-        # Subir archivo
-        uploaded_file = st.file_uploader(
-            "Subir archivo", 
+        # Subir archivos
+        uploaded_files = st.file_uploader(
+            "Subir archivos", 
             type=FILE_CONFIG['allowed_extensions'],
-            help="Soporta CSV, XLSX y TXT"
+            accept_multiple_files=True,
+            help="Soporta CSV, XLSX y TXT. Puede subir varios archivos; se leen todas las hojas de cada libro Excel."
         )
-        st.session_state['uploaded_file'] = uploaded_file
+        st.session_state['uploaded_files'] = uploaded_files
         
-        if uploaded_file:
+        for uploaded_file in uploaded_files or []:
             st.success(f"✓ Archivo: {uploaded_file.name}")
         
         # Configuración de importación
         st.markdown("### ⚙️ Opciones de Importación")
         with st.expander("Configuración de archivo", expanded=False):
+            auto_detect = st.checkbox(
+                "🔎 Detectar formato automáticamente",
+                value=True,
+                key="auto_detect",
+                help="Detecta separador, decimal, codificación y encabezado inspeccionando solo el inicio del archivo"
+            )
             separator = st.selectbox(
                 "Separador", 
                 FILE_CONFIG['separators'], 
                 index=0,
-                key="separator"
+                key="separator",
+                disabled=auto_detect
             )
             decimal = st.selectbox(
                 "Separador decimal", 
                 FILE_CONFIG['decimals'], 
                 index=0,
-                key="decimal"
+                key="decimal",
+                disabled=auto_detect
             )
             encoding = st.selectbox(
                 "Codificación", 
                 FILE_CONFIG['encodings'], 
                 index=0,
-                key="encoding"
+                key="encoding",
+                disabled=auto_detect
+            )
+            st.selectbox(
+                "Motor de lectura CSV",
+                list(FILE_CONFIG['csv_engines']),
+                index=0,
+                key="csv_engine",
+                help="Arrow lee el archivo con varios hilos; si las opciones no son compatibles se usa el motor de Pandas"
+            )
+            st.radio(
+                "Modo de carga",
+                FILE_CONFIG['load_modes'],
+                index=0,
+                key="load_mode",
+                help="En archivos CSV con muchas columnas, lee solo las columnas elegidas con tipos compactos; "
+                     "las demás se cargan al seleccionarlas"
+            )
+            st.checkbox(
+                "♻️ Análisis incremental",
+                value=False,
+                key="incremental",
+                help="Para archivos CSV que crecen añadiendo filas: guarda un resumen combinable de cada columna "
+                     "y, al volver a subir el archivo ampliado, solo procesa las filas nuevas"
             )
         
         # Tema de visualización
@@ -141,6 +218,27 @@ def render_sidebar():
         )
         apply_theme(theme)
         
+        # Instrumentación
+        st.markdown("### ⏱️ Rendimiento")
+        measure = st.checkbox(
+            "Medir tiempos por etapa",
+            value=INSTRUMENTATION_CONFIG['enabled'],
+            key="instrumentation",
+            help="Registra tiempo, CPU, filas y memoria de cada etapa (carga, detección, tablas, gráficos, "
+                 f"exportación) y los muestra al final de la página; también se escriben en {INSTRUMENTATION_CONFIG['log_path']}"
+        )
+        # Solo en el hilo de esta interacción: no cambia la medición de las demás sesiones
+        enable(measure, log_path=INSTRUMENTATION_CONFIG['log_path'] if measure else None, thread=True)
+        profile_runs = st.checkbox(
+            "🔬 Perfilar las ejecuciones",
+            value=False,
+            key="profile_runs",
+            help="Perfila el análisis completo, la correlación, los outliers y las pruebas de normalidad; "
+                 "el perfil (pstats y gráfico de llama HTML) se descarga junto a los resultados"
+        )
+        if profile_runs and len(available_profilers()) > 1:
+            st.selectbox("Perfilador", available_profilers(), key="profiler")
+        
         # Información adicional
         st.markdown("---")
         st.markdown("""
@@ -155,6 +253,80 @@ def render_sidebar():
         """, unsafe_allow_html=True)
 
 
+def render_timing_breakdown():
+    """Muestra el desglose de tiempos por etapa de la interacción actual."""
+    
+    records = get_records()
+    with st.expander("⏱️ Tiempos por etapa", expanded=False):
+        if not records:
+            st.info("ℹ️ En esta interacción no se ejecutó ninguna etapa instrumentada (los resultados pueden venir de la caché)")
+            return
+        
+        timings = pd.DataFrame(records)
+        # Sangría de las etapas anidadas dentro de la etapa que las llamó
+        timings['Etapa'] = ['\u2003' * level + ('└ ' if level else '') + name
+                            for level, name in zip(timings['Nivel'], timings['Etapa'])]
+        total = timings.loc[timings['Nivel'] == 0, 'Tiempo (s)'].sum()
+        st.caption(f"Total: {total:.3f} s en {len(timings)} etapas")
+        st.dataframe(
+            timings.drop(columns='Nivel').style.format(
+                {'Tiempo (s)': '{:.4f}', 'CPU (s)': '{:.4f}', 'Memoria (MB)': '{:+.1f}', 'Filas': '{:,.0f}'}, na_rep='—'
+            ),
+            use_container_width=True,
+            hide_index=True
+        )
+        st.download_button(
+            label="📥 Métricas acumuladas (Prometheus)",
+            data=prometheus_text(),
+            file_name="metricas.prom",
+            mime="text/plain",
+            key="download_metrics"
+        )
+
+
+@contextmanager
+def profiled(name):
+    """Perfila el bloque si el modo de perfilado está activo y guarda el perfil en la sesión."""
+    
+    if not st.session_state.get('profile_runs'):
+        yield
+        return
+    
+    with profile_block(name, st.session_state.get('profiler', 'cProfile')) as capture:
+        yield
+    st.session_state.setdefault('profiles', {})[name] = capture
+
+
+def render_profile_downloads(name):
+    """Muestra el último perfil guardado de una sección con sus descargas."""
+    
+    capture = st.session_state.get('profiles', {}).get(name)
+    if not st.session_state.get('profile_runs') or capture is None:
+        return
+    
+    with st.expander(f"🔬 Perfil de la última ejecución ({capture['duracion']:.2f} s, {capture['perfilador']})"):
+        st.code(capture['texto'], language=None)
+        col1, col2 = st.columns(2)
+        with col1:
+            if capture['pstats'] is not None:
+                st.download_button(
+                    label="📥 Perfil (pstats)",
+                    data=capture['pstats'],
+                    file_name=f"perfil_{name}.prof",
+                    mime="application/octet-stream",
+                    key=f"download_profile_{name}",
+                    help="Se abre con pstats, snakeviz o gprof2dot"
+                )
+        with col2:
+            st.download_button(
+                label="📥 Gráfico de llama (HTML)",
+                data=capture['html'],
+                file_name=f"perfil_{name}.html",
+                mime="text/html",
+                key=f"download_flame_{name}"
+            )
+
+
 def render_welcome_screen():
     """Renderiza la pantalla de bienvenida."""
     
@@ -200,8 +372,8 @@ def render_welcome_screen():
             st.markdown("""
             **Paso 1: Cargar tus datos**
             1. Usa el selector de archivos en la barra lateral
-            2. Soporta CSV, XLSX y TXT (hasta 200 MB)
-            3. Configura el separador y formato decimal si es necesario
+            2. Soporta CSV, XLSX y TXT (hasta 200 MB), varios archivos y todas las hojas de un libro
+            3. El separador, el formato decimal y la codificación se detectan automáticamente (puedes fijarlos a mano)
             4. La aplicación validará y mostrará una vista previa
             """)
         
@@ -240,72 +412,294 @@ def render_main_content():
     
     try:
         # Cargar datos
-        uploaded_file = st.session_state['uploaded_file']
-        
-        if uploaded_file.name.endswith('.csv') or uploaded_file.name.endswith('.txt'):
-            df = load_csv_file(
-                uploaded_file, 
-                st.session_state.get('separator', ','),
-                st.session_state.get('decimal', '.'),
-                st.session_state.get('encoding', 'utf-8')
+        uploaded_files = st.session_state['uploaded_files']
+        separator = st.session_state.get('separator', ',')
+        decimal = st.session_state.get('decimal', '.')
+        encoding = st.session_state.get('encoding', 'utf-8')
+        
+        auto_detect = st.session_state.get('auto_detect', True)
+        engine = FILE_CONFIG['csv_engines'][st.session_state.get('csv_engine', 'Pandas (C)')]
+        incremental_state = None
+        
+        uploaded_file = uploaded_files[0]
+        if len(uploaded_files) == 1 and (uploaded_file.name.endswith('.csv') or uploaded_file.name.endswith('.txt')):
+            file_fingerprint = get_file_fingerprint(uploaded_file)
+            header = True
+            if auto_detect:
+                options = sniff_csv_options(uploaded_file)
+                separator, decimal = options['separator'], options['decimal']
+                encoding, header = options['encoding'], options['header']
+                st.caption(
+                    f"🔎 Formato detectado: separador {separator!r}, decimal {decimal!r}, "
+                    f"codificación {encoding}, encabezado: {'sí' if header else 'no'}"
+                )
+            load_mode = st.session_state.get('load_mode', FILE_CONFIG['load_modes'][0])
+            rows_key = f"load_all_rows_{file_fingerprint}"
+            if load_mode == FILE_CONFIG['load_modes'][1]:
+                df = load_projected_columns(uploaded_file, separator, decimal, encoding, header, engine, file_fingerprint)
+            elif st.session_state.get('incremental'):
+                # Con el resumen guardado (o ampliado con las filas nuevas) no se lee el archivo completo
+                incremental_state = get_incremental_state(uploaded_file, separator, decimal, encoding, header, engine)
+                if incremental_state is None:
+                    df = load_csv_file(uploaded_file, separator, decimal, encoding, header, engine, file_fingerprint)
+                    incremental_state = build_incremental_state(uploaded_file, df, separator, decimal, encoding, header)
+                    st.session_state[rows_key] = True
+                elif st.checkbox(
+                    "📄 Cargar todas las filas",
+                    key=rows_key,
+                    help="Los resúmenes, tablas, gráficos y correlaciones salen del resumen incremental. "
+                         "Las vistas por fila (imputación, outliers, normalidad, dispersión e informe de "
+                         "varias columnas) necesitan leer el archivo completo."
+                ):
+                    df = load_csv_file(uploaded_file, separator, decimal, encoding, header, engine, file_fingerprint)
+                else:
+                    df = None
+            else:
+                df = load_csv_file(uploaded_file, separator, decimal, encoding, header, engine, file_fingerprint)
+            dataset_fingerprint = derive_fingerprint(
+                file_fingerprint, 'csv', separator, decimal, encoding, header, engine, load_mode
             )
         else:
-            df = load_excel_file(uploaded_file)
-        
-        # Validar DataFrame
-        is_valid, message = validate_dataframe(df)
-        if not is_valid:
-            st.error(f"❌ Error: {message}")
-            return
+            fingerprint = derive_fingerprint(
+                files_fingerprint([(f.name, get_file_fingerprint(f)) for f in uploaded_files]),
+                None if auto_detect else separator, decimal, encoding, engine
+            )
+            with st.spinner('⏳ Leyendo archivos y hojas en paralelo...'):
+                datasets = load_multiple_files(
+                    [(f.name, f) for f in uploaded_files],
+                    None if auto_detect else separator, decimal, encoding, engine=engine, fingerprint=fingerprint
+                )
+            df, dataset_fingerprint = select_dataset(datasets, fingerprint)
         
-        # Vista previa de datos
-        st.markdown('<p class="subtitle">📋 Vista Previa de Datos</p>', unsafe_allow_html=True)
-        with st.container():
-            st.markdown('<div class="card">', unsafe_allow_html=True)
-            st.dataframe(df.head(10), use_container_width=True)
-            
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("📊 Filas", f"{df.shape[0]:,}")
-            with col2:
-                st.metric("📈 Columnas", df.shape[1])
-            with col3:
-                st.metric("❌ Valores Nulos", f"{df.isna().sum().sum():,}")
-            with col4:
-                st.metric("💾 Tamaño", f"{df.memory_usage(deep=True).sum() / 1024:.1f} KB")
+        if df is None:
+            render_summary_preview(incremental_state, uploaded_file)
+        else:
+            # Validar DataFrame
+            is_valid, message = validate_dataframe(df)
+            if not is_valid:
+                st.error(f"❌ Error: {message}")
+                return
             
-            st.markdown('</div>', unsafe_allow_html=True)
+            # Vista previa de datos
+            st.markdown('<p class="subtitle">📋 Vista Previa de Datos</p>', unsafe_allow_html=True)
+            with st.container():
+                st.markdown('<div class="card">', unsafe_allow_html=True)
+                st.dataframe(df.head(FILE_CONFIG['preview_rows']), use_container_width=True)
+                
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("📊 Filas", f"{df.shape[0]:,}")
+                with col2:
+                    st.metric("📈 Columnas", df.shape[1])
+                with col3:
+                    st.metric("❌ Valores Nulos", f"{df.isna().sum().sum():,}")
+                with col4:
+                    st.metric("💾 Tamaño", f"{df.memory_usage(deep=True).sum() / 1024:.1f} KB")
+                
+                st.markdown('</div>', unsafe_allow_html=True)
         
         # Tabs principales para diferentes tipos de análisis
-        tab1, tab2, tab3, tab4 = st.tabs([
+        tab1, tab2, tab3, tab4, tab5 = st.tabs([
             "📊 Análisis Univariado",
             "🔗 Análisis de Correlación",
             "🎯 Detección de Outliers",
-            "📐 Pruebas de Normalidad"
+            "📐 Pruebas de Normalidad",
+            "📦 Informe de Varias Columnas"
         ])
         
         with tab1:
-            render_univariate_analysis(df)
+            render_univariate_analysis(df, dataset_fingerprint, incremental_state)
         
         with tab2:
-            render_correlation_analysis(df)
+            render_correlation_analysis(df, incremental_state, dataset_fingerprint)
         
         with tab3:
-            render_outlier_detection(df)
+            if df is None:
+                render_rows_required()
+            else:
+                render_outlier_detection(df)
         
         with tab4:
-            render_normality_tests(df)
+            if df is None:
+                render_rows_required()
+            else:
+                render_normality_tests(df, dataset_fingerprint)
+        
+        with tab5:
+            if df is None:
+                render_rows_required()
+            else:
+                render_report_bundle(df, dataset_fingerprint)
         
     except Exception as e:
         st.error(f"❌ Error al procesar el archivo: {str(e)}")
         st.exception(e)
 
 
-def render_univariate_analysis(df):
-    """Renderiza el análisis univariado."""
+def get_file_fingerprint(uploaded_file):
+    """Obtiene la huella de un archivo subido, calculada una sola vez por archivo."""
+    
+    fingerprints = st.session_state.setdefault('file_fingerprints', {})
+    if uploaded_file.file_id not in fingerprints:
+        fingerprints[uploaded_file.file_id] = fingerprint_bytes(uploaded_file.getvalue())
+    return fingerprints[uploaded_file.file_id]
+
+
+def incremental_lineage(uploaded_file, separator, decimal, encoding, header):
+    """Clave del resumen incremental: las versiones sucesivas de un archivo comparten nombre y opciones de lectura."""
+    return derive_fingerprint('incremental', uploaded_file.name, separator, decimal, encoding, header)
+
+
+def get_incremental_state(uploaded_file, separator, decimal, encoding, header, engine):
+    """
+    Obtiene el resumen combinable del archivo sin leerlo completo: el guardado,
+    o el guardado ampliado leyendo solo las filas añadidas al final.
+    
+    Devuelve None si no hay resumen guardado o el archivo no es una ampliación
+    del ya analizado (hay que leerlo entero con `build_incremental_state`).
+    """
+    file_fingerprint = get_file_fingerprint(uploaded_file)
+    states = st.session_state.setdefault('incremental_states', {})
+    if file_fingerprint in states:
+        return states[file_fingerprint]
+    
+    lineage = incremental_lineage(uploaded_file, separator, decimal, encoding, header)
+    stored = load_result(lineage)
+    if stored is None or not stored.get('prefix'):
+        return None
+    
+    if stored['prefix']['fingerprint'] == file_fingerprint:
+        state = stored
+    elif encoding.lower().startswith('utf-16'):
+        return None
+    else:
+        text_columns = [col for col, column in stored['columns'].items() if not column['numeric']]
+        state, new_rows = update_dataset_state(
+            stored, uploaded_file.getvalue(),
+            lambda tail: read_csv_rows(tail, list(stored['columns']), separator, decimal, encoding, engine, text_columns)
+        )
+        if state is None:
+            return None
+        st.caption(f"♻️ {new_rows:,} filas nuevas: los resúmenes se actualizaron procesando solo esas filas")
+        save_result(lineage, state)
+    
+    states[file_fingerprint] = state
+    return state
+
+
+def build_incremental_state(uploaded_file, df, separator, decimal, encoding, header):
+    """Calcula y guarda el resumen combinable de todo el archivo ya leído."""
+    
+    with st.spinner('⏳ Preparando el resumen incremental del archivo...'):
+        state = dataset_state(df, uploaded_file.getvalue())
+    save_result(incremental_lineage(uploaded_file, separator, decimal, encoding, header), state)
+    st.session_state.setdefault('incremental_states', {})[get_file_fingerprint(uploaded_file)] = state
+    return state
+
+
+def render_summary_preview(state, uploaded_file):
+    """Muestra la vista previa y las métricas del archivo a partir del resumen incremental."""
+    
+    st.markdown('<p class="subtitle">📋 Vista Previa de Datos</p>', unsafe_allow_html=True)
+    with st.container():
+        st.markdown('<div class="card">', unsafe_allow_html=True)
+        if state.get('head') is not None:
+            st.dataframe(state['head'], use_container_width=True)
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("📊 Filas", f"{state['rows']:,}")
+        with col2:
+            st.metric("📈 Columnas", len(state['columns']))
+        with col3:
+            st.metric("❌ Valores Nulos", f"{sum(column['nulls'] for column in state['columns'].values()):,}")
+        with col4:
+            st.metric("💾 Tamaño del archivo", f"{uploaded_file.size / 1024:.1f} KB")
+        
+        st.caption("♻️ Resultados calculados a partir del resumen incremental, sin leer todas las filas del archivo")
+        st.markdown('</div>', unsafe_allow_html=True)
+
+
+def render_rows_required():
+    """Indica que la vista necesita leer todas las filas del archivo."""
+    st.info("📄 Este análisis trabaja fila a fila: marque **Cargar todas las filas** para leer el archivo completo.")
+
+
+@st.cache_data(show_spinner=False)
+def combine_datasets_cached(_datasets, fingerprint):
+    """Combina los conjuntos cargados; la caché se indexa por la huella de los archivos."""
+    return combine_datasets(_datasets)
+
+
+def load_projected_columns(uploaded_file, separator, decimal, encoding, header, engine, fingerprint):
+    """Carga solo las columnas seleccionadas de un CSV, con tipos compactos."""
+    
+    all_columns = read_csv_header(uploaded_file, separator, decimal, encoding, header)
+    selected_columns = st.multiselect(
+        f"📑 Columnas a cargar ({len(all_columns)} disponibles)",
+        all_columns,
+        default=all_columns[:FILE_CONFIG['projected_default_columns']],
+        key="projected_columns",
+        help="Solo se leen las columnas elegidas; las columnas ya cargadas no se vuelven a leer"
+    )
+    if not selected_columns:
+        st.warning("⚠️ Seleccione al menos una columna para cargar")
+        st.stop()
+    
+    with st.spinner('⏳ Cargando columnas seleccionadas...'):
+        return load_csv_columns(uploaded_file, selected_columns, separator, decimal, encoding, header, engine, fingerprint)
+
+
+def select_dataset(datasets, fingerprint):
+    """Permite combinar los conjuntos cargados o elegir uno de ellos; devuelve el conjunto y su huella."""
+    
+    if len(datasets) == 1:
+        name, df = next(iter(datasets.items()))
+        return df, derive_fingerprint(fingerprint, name)
+    
+    st.markdown('<p class="subtitle">🗂️ Conjuntos de Datos Cargados</p>', unsafe_allow_html=True)
+    with st.container():
+        st.markdown('<div class="card">', unsafe_allow_html=True)
+        
+        st.dataframe(
+            pd.DataFrame([
+                {'Conjunto': name, 'Filas': len(data), 'Columnas': data.shape[1]}
+                for name, data in datasets.items()
+            ]),
+            use_container_width=True,
+            hide_index=True
+        )
+        
+        mode = st.radio(
+            "¿Cómo desea analizar los archivos y hojas?",
+            ["Combinar en un solo conjunto", "Analizar un conjunto por separado"],
+            horizontal=True,
+            key="dataset_mode"
+        )
+        
+        if mode == "Combinar en un solo conjunto":
+            df = combine_datasets_cached(datasets, fingerprint)
+            dataset_fingerprint = derive_fingerprint(fingerprint, 'combinado')
+            st.caption(f"Se agregó la columna **{df.columns[0]}** con el archivo u hoja de origen de cada fila.")
+        else:
+            dataset_name = st.selectbox("Conjunto a analizar:", list(datasets), key="dataset_name")
+            df = datasets[dataset_name]
+            dataset_fingerprint = derive_fingerprint(fingerprint, dataset_name)
+        
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    return df, dataset_fingerprint
+
+
+def render_univariate_analysis(df, fingerprint=None, incremental_state=None):
+    """Renderiza el análisis univariado (sin `df`, a partir del resumen incremental)."""
     
     st.markdown('<p class="subtitle">Análisis de Variable Única</p>', unsafe_allow_html=True)
     
+    if df is None:
+        render_univariate_summary(incremental_state, fingerprint)
+        return
+    
     with st.container():
         st.markdown('<div class="card">', unsafe_allow_html=True)
         
@@ -318,134 +712,333 @@ def render_univariate_analysis(df):
         column_dtype = df[selected_column].dtype
         st.info(f"💡 Tipo de datos detectado: **{column_dtype}**")
         
-        # Manejo de valores nulos
-        missing_values = df[selected_column].isna().sum()
+        # Manejo de valores nulos (solo se materializa la columna seleccionada)
+        column_data = df[selected_column]
+        missing_values = column_data.isna().sum()
         if missing_values > 0:
             st.warning(f"⚠️ La columna contiene **{missing_values:,}** valores nulos ({(missing_values/len(df)*100):.1f}%)")
             
             handle_missing = st.radio(
                 "¿Cómo manejar los valores nulos?",
-                ["Eliminar", "Reemplazar por la media", "Reemplazar por la mediana", "Reemplazar por cero"],
+                ANALYSIS_CONFIG['imputation_methods'],
                 key="handle_missing_univar"
             )
+            imputation_options = render_imputation_options(df, selected_column, handle_missing)
             
-            df, msg = handle_missing_values(df, selected_column, handle_missing)
-            st.success(msg)
+            column_data, imputation = handle_missing_values(
+                df, selected_column, handle_missing, imputation_options, fingerprint=fingerprint
+            )
+            st.session_state.setdefault('imputations', {})[selected_column] = imputation
+            if imputation['Mensaje'].startswith("Error"):
+                st.error(imputation['Mensaje'])
+            elif imputation['Valor de relleno'] is not None:
+                st.success(f"{imputation['Mensaje']} Valor de relleno: {imputation['Valor de relleno']:.4f}")
+            else:
+                st.success(imputation['Mensaje'])
         
         st.markdown('</div>', unsafe_allow_html=True)
     
+    # Resultados ya calculados: sesión actual o almacén persistente
+    if missing_values > 0:
+        source_fingerprint = imputation['Huella']
+    elif fingerprint is not None:
+        source_fingerprint = column_fingerprint(fingerprint, selected_column)
+    else:
+        source_fingerprint = content_fingerprint(column_data)
+    
+    # Resumen incremental de la columna (sin imputación: describe los datos no nulos)
+    column_summary = None
+    if incremental_state is not None and (missing_values == 0 or imputation['Método'] == "Eliminar"):
+        column_summary = incremental_state['columns'].get(selected_column)
+        if column_summary is not None and not is_exact(column_summary):
+            column_summary = None
+    
+    render_column_analysis(column_data, selected_column, source_fingerprint, column_summary, fingerprint)
+
+
+def render_univariate_summary(state, fingerprint):
+    """Renderiza el análisis univariado de una columna a partir del resumen incremental, sin leer sus filas."""
+    
+    with st.container():
+        st.markdown('<div class="card">', unsafe_allow_html=True)
+        
+        selected_column = st.selectbox(
+            "Seleccione la columna a analizar:",
+            list(state['columns']),
+            key="univar_column"
+        )
+        
+        column_summary = state['columns'][selected_column]
+        nulls = column_summary['nulls']
+        if nulls > 0:
+            st.warning(
+                f"⚠️ La columna contiene **{nulls:,}** valores nulos ({nulls / state['rows'] * 100:.1f}%), "
+                f"que se excluyen del análisis. Para imputarlos, marque **Cargar todas las filas**."
+            )
+        if not is_exact(column_summary):
+            st.caption(
+                f"📐 Demasiados valores distintos para conservarlos todos: cuantiles y gráficos aproximados "
+                f"(error relativo máximo {ANALYSIS_CONFIG['sketch_relative_accuracy']:.0%})"
+            )
+        
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Se reconstruye una vez por columna y se conserva en la sesión, no en cada interacción
+    source_fingerprint = column_fingerprint(fingerprint, selected_column)
+    column_data = cached_result(
+        st.session_state.setdefault('summary_columns', {}), source_fingerprint,
+        lambda: data_from_state(column_summary).rename(selected_column),
+        ANALYSIS_CONFIG['summary_session_columns']
+    )
+    
+    render_column_analysis(column_data, selected_column, source_fingerprint, column_summary, fingerprint)
+
+
+def render_column_analysis(column_data, selected_column, source_fingerprint, column_summary=None, dataset_fingerprint=None):
+    """
+    Analiza una columna (ya con los nulos tratados) y muestra sus resultados y exportaciones.
+    
+    Con el resumen incremental de la columna, tablas, medidas y cuartiles salen
+    del resumen en lugar de recorrer los datos. Los gráficos interactivos de
+    correlación se añaden al informe solo si son del mismo conjunto de datos
+    (`dataset_fingerprint`).
+    """
+    
     # Análisis
-    data = df[selected_column].dropna()
+    data = column_data.dropna()
     variable_type = determine_variable_type(data)
+    if variable_type == "Cualitativa":
+        # Códigos enteros + diccionario: tablas, medidas y gráficos trabajan sobre los códigos
+        data = data.astype('category')
     
     st.info(f"🔍 Tipo de variable detectado: **{variable_type}**")
     
-    if st.button("🚀 Realizar Análisis Completo", key="analyze_univar", use_container_width=True):
-        with st.spinner('⏳ Analizando datos...'):
-            
-            # Cálculo de tabla de frecuencia
-            frequency_table = calculate_frequency_table(data, variable_type)
-            
-            # Medidas de resumen
-            if variable_type in ["Cuantitativa Continua", "Cuantitativa Discreta con Intervalos"]:
-                measures = calculate_all_measures_grouped(frequency_table)
-            else:
-                if variable_type == "Cuantitativa Discreta":
-                    # Usar función mejorada para datos no agrupados
-                    measures = calculate_statistics_summary(data)
-                else:
-                    mode_value = data.mode()[0] if not data.mode().empty else None
-                    measures = {
-                        'Moda': mode_value,
-                        'Frecuencia de la Moda': data.value_counts().iloc[0] if not data.value_counts().empty else 0,
-                        'Proporción de la Moda': round(data.value_counts().iloc[0] / len(data), 4) if not data.value_counts().empty else 0
-                    }
-            
-            # Cuartiles
-            quartiles = calculate_quartiles(data, frequency_table, variable_type)
-            
-            # Mostrar resultados
-            col1, col2 = st.columns([2, 1])
-            
-            with col1:
-                st.markdown("### 📊 Tabla de Frecuencia")
-                st.dataframe(pd.DataFrame(frequency_table), use_container_width=True, height=400)
-            
-            with col2:
-                if measures:
-                    st.markdown("### 📏 Medidas Estadísticas")
-                    measures_df = pd.DataFrame(list(measures.items()), columns=['Medida', 'Valor'])
-                    st.dataframe(measures_df, use_container_width=True, hide_index=True)
-                
-                if quartiles and any(v is not None for v in quartiles.values()):
-                    st.markdown("### 📐 Cuartiles")
-                    quartiles_df = pd.DataFrame(list(quartiles.items()), columns=['Cuartil', 'Valor'])
-                    st.dataframe(quartiles_df, use_container_width=True, hide_index=True)
-            
-            # Visualizaciones
-            st.markdown('<p class="subtitle">📈 Visualizaciones</p>', unsafe_allow_html=True)
-            
-            figs = []
-            
-            if variable_type in ["Cuantitativa Continua", "Cuantitativa Discreta con Intervalos"]:
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    fig_hist = generate_histogram(data, variable_type, selected_column)
-                    if fig_hist:
-                        st.pyplot(fig_hist)
-                        figs.append(fig_hist)
-                
-                with col2:
-                    fig_box = generate_boxplot(data, variable_type, selected_column)
-                    if fig_box:
-                        st.pyplot(fig_box)
-                        figs.append(fig_box)
-                
-                st.markdown("#### 🎯 Histograma Interactivo")
-                fig_interactive = generate_interactive_histogram(data, variable_type, selected_column)
-                if fig_interactive:
-                    st.plotly_chart(fig_interactive, use_container_width=True)
-                
-                fig_violin = generate_violinplot(data, variable_type, selected_column)
-                if fig_violin:
-                    st.pyplot(fig_violin)
-                    figs.append(fig_violin)
-                    
-            elif variable_type in ["Cualitativa", "Cuantitativa Discreta"]:
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    fig_bar = generate_bar_chart(data, variable_type, selected_column)
-                    if fig_bar:
-                        st.pyplot(fig_bar)
-                        figs.append(fig_bar)
-                
-                with col2:
-                    fig_pie = generate_pie_chart(data, variable_type, selected_column)
-                    if fig_pie:
-                        st.pyplot(fig_pie)
-                        figs.append(fig_pie)
-                
-                fig_hbar = generate_horizontal_bar_chart(data, variable_type, selected_column)
-                if fig_hbar:
-                    st.pyplot(fig_hbar)
-                    figs.append(fig_hbar)
+    bin_edges = None
+    if variable_type in ["Cuantitativa Continua", "Cuantitativa Discreta con Intervalos"]:
+        bin_edges = render_bin_edges_options(selected_column, data)
+    
+    key = result_key(source_fingerprint, variable_type, {
+        'columna': selected_column, 'tema': st.session_state.get('theme'), 'intervalos': bin_edges
+    })
+    
+    if column_summary is not None and column_summary['numeric'] == (variable_type == "Cualitativa"):
+        column_summary = None
+    
+    results = st.session_state.setdefault('analysis_results', {})
+    result = results.get(key) or load_result(key)
+    
+    # Con el perfilado activo se recalcula aunque el resultado esté guardado, para perfilar el cálculo
+    recompute = result is None or st.session_state.get('profile_runs')
+    if st.button("🚀 Realizar Análisis Completo", key="analyze_univar", use_container_width=True) and recompute:
+        with st.spinner('⏳ Analizando datos...'), profiled('univariado'):
+            with stage('análisis univariado', rows=len(data)):
+                result = compute_univariate_results(data, variable_type, selected_column, column_summary, bin_edges)
+            save_result(key, result)
+    
+    if result is not None:
+        # Se conservan en la sesión para que sobrevivan a la interacción con otros widgets
+        cached_result(results, key, lambda: result, STORE_CONFIG['session_entries'])
+        st.caption(f"💾 Resultados calculados el {result['calculado']}; se reutilizan mientras no cambien los datos ni las opciones")
+        
+        render_univariate_results(result, data, variable_type)
+        
+        if bin_edges is None and result.get('bin_edges'):
+            if st.button("💾 Guardar estos intervalos para la columna", key="save_bin_edges"):
+                save_result(bin_edges_key(selected_column), result['bin_edges'])
+                st.success("✅ Intervalos guardados: elija \"Fijos guardados\" para tabular otros archivos o periodos con ellos")
+        
+        # Opciones de exportación
+        report = report_interactive_figures(dataset_fingerprint)
+        render_export_section(
+            column_data.to_frame(), selected_column, variable_type, result['frequency_table'],
+            result['measures'], result['quartiles'],
+            [{'png': png, 'svg': result.get('vector_figures', {}).get(name)} for name, png in result['figures'].items()],
+            interactive_figs=[result['interactive']] + list(report['figuras'].values()),
+            cache_key=key,
+            interactive_version=report['version']
+        )
+        render_profile_downloads('univariado')
+
+
+def bin_edges_key(column):
+    """Clave de los intervalos fijos de una columna en el almacén de resultados."""
+    return derive_fingerprint('intervalos', column)
+
+
+def render_bin_edges_options(column, data):
+    """
+    Muestra las opciones de intervalos de la tabla agrupada y devuelve los límites fijos (o None).
+    
+    Si los datos quedan tan lejos de los límites que habría que añadir demasiados
+    intervalos, se avisa y se usan los automáticos.
+    """
+    
+    bin_modes = ANALYSIS_CONFIG['bin_modes']
+    mode = st.radio(
+        "📏 Intervalos de la tabla de frecuencia:",
+        bin_modes,
+        horizontal=True,
+        key="bin_mode",
+        help="Con intervalos fijos, las tablas de distintos archivos, bloques o periodos "
+             "tienen los mismos intervalos y se pueden sumar y comparar"
+    )
+    
+    if mode == bin_modes[1]:
+        edges = load_result(bin_edges_key(column))
+        if edges is None:
+            st.warning("⚠️ No hay intervalos guardados para esta columna: se usan los automáticos. "
+                       "Puede guardarlos después de un análisis con intervalos automáticos.")
+            return None
+        st.caption(f"📏 {len(edges) - 1} intervalos guardados, de {edges[0]:.4f} a {edges[-1]:.4f}")
+        return fit_bin_edges(edges, data)
+    
+    if mode == bin_modes[2]:
+        text = st.text_input(
+            "Límites de los intervalos (separados por punto y coma):",
+            placeholder="0; 10; 20; 30",
+            key="bin_edges_text"
+        )
+        if not text.strip():
+            return None
+        try:
+            edges = validate_bin_edges(
+                [float(value.strip().replace(',', '.')) for value in text.split(';') if value.strip()]
+            )
+        except ValueError as e:
+            st.error(f"❌ Límites no válidos: {e}")
+            return None
+        return fit_bin_edges(edges, data)
+    
+    return None
+
+
+def fit_bin_edges(edges, data):
+    """Devuelve los límites fijos si se pueden ampliar hasta cubrir los datos; si no, avisa y devuelve None."""
+    
+    try:
+        extend_bin_edges(edges, data.min(), data.max())
+    except ValueError as e:
+        st.warning(f"⚠️ {e}. Se usan los intervalos automáticos.")
+        return None
+    return edges
+
+
+def render_univariate_results(result, data, variable_type):
+    """Muestra los resultados (calculados o recuperados del almacén) de una columna."""
+    
+    frequency_table = result['frequency_table']
+    measures = result['measures']
+    quartiles = result['quartiles']
+    figures = result['figures']
+    
+    # Mostrar resultados
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        st.markdown("### 📊 Tabla de Frecuencia")
+        max_categories = ANALYSIS_CONFIG['frequency_max_categories']
+        if variable_type == "Cualitativa" and len(data.cat.categories) > max_categories:
+            st.caption(
+                f"🔝 {len(data.cat.categories):,} categorías distintas: se muestran las {max_categories} "
+                f"más frecuentes y el resto se agrupa en \"{ANALYSIS_CONFIG['other_category_label']}\""
+            )
+        st.dataframe(pd.DataFrame(frequency_table), use_container_width=True, height=400)
+    
+    with col2:
+        if measures:
+            st.markdown("### 📏 Medidas Estadísticas")
+            measures_df = pd.DataFrame(list(measures.items()), columns=['Medida', 'Valor'])
+            st.dataframe(measures_df, use_container_width=True, hide_index=True)
+        
+        if quartiles and any(v is not None for v in quartiles.values()):
+            st.markdown("### 📐 Cuartiles")
+            quartiles_df = pd.DataFrame(list(quartiles.items()), columns=['Cuartil', 'Valor'])
+            st.dataframe(quartiles_df, use_container_width=True, hide_index=True)
+    
+    # Visualizaciones
+    st.markdown('<p class="subtitle">📈 Visualizaciones</p>', unsafe_allow_html=True)
+    
+    if variable_type in ["Cuantitativa Continua", "Cuantitativa Discreta con Intervalos"]:
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            if 'histograma' in figures:
+                st.image(figures['histograma'], use_container_width=True)
+        
+        with col2:
+            if 'caja' in figures:
+                st.image(figures['caja'], use_container_width=True)
+        
+        st.markdown("#### 🎯 Histograma Interactivo")
+        if result['interactive']:
+            st.plotly_chart(result['interactive'], use_container_width=True)
+        
+        if 'violin' in figures:
+            st.image(figures['violin'], use_container_width=True)
             
-            # Opciones de exportación
-            render_export_section(df, selected_column, variable_type, frequency_table, measures, quartiles, figs)
+    elif variable_type in ["Cualitativa", "Cuantitativa Discreta"]:
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            if 'barras' in figures:
+                st.image(figures['barras'], use_container_width=True)
+        
+        with col2:
+            if 'sectores' in figures:
+                st.image(figures['sectores'], use_container_width=True)
+        
+        if 'barras_horizontales' in figures:
+            st.image(figures['barras_horizontales'], use_container_width=True)
 
 
-def render_correlation_analysis(df):
-    """Renderiza el análisis de correlación."""
+def render_imputation_options(df, column, method, key_prefix="impute"):
+    """Muestra las opciones de los métodos de imputación avanzados (`column=None`: varias columnas)."""
     
-    st.markdown('<p class="subtitle">Análisis de Correlación entre Variables</p>', unsafe_allow_html=True)
+    other_columns = [c for c in df.columns if c != column]
+    options = {}
+    
+    if method in ("Media por grupo", "Mediana por grupo"):
+        options['group_column'] = st.selectbox(
+            "Columna que define los grupos:",
+            [c for c in get_categorical_columns(df) if c != column] or other_columns,
+            key=f"{key_prefix}_group_column"
+        )
+    
+    elif method in ("Propagar hacia adelante", "Propagar hacia atrás", "Interpolación lineal"):
+        date_column = st.selectbox(
+            "Ordenar por la columna de fechas:",
+            ["(orden de las filas)"] + other_columns,
+            key=f"{key_prefix}_date_column"
+        )
+        options['date_column'] = None if date_column == "(orden de las filas)" else date_column
     
-    # Información sobre conversión de fechas
-    st.info("💡 **Tip:** Si tienes columnas con fechas (ej: 16/04/2024), se convertirán automáticamente a días transcurridos para poder calcular correlaciones.")
+    elif method == "K vecinos más cercanos":
+        numeric_columns = [c for c in get_numeric_columns(df) if c != column]
+        options['neighbor_columns'] = st.multiselect(
+            "Columnas numéricas de apoyo:",
+            numeric_columns,
+            default=numeric_columns[:3],
+            key=f"{key_prefix}_neighbor_columns"
+        )
+        options['k'] = st.slider("Número de vecinos (k):", 1, 25, ANALYSIS_CONFIG['knn_neighbors'], key=f"{key_prefix}_k")
     
-    # Preparar datos para correlación (convierte fechas automáticamente)
-    df_prepared, conversion_info = prepare_data_for_correlation(df)
+    return options
+
+
+def render_correlation_analysis(df, incremental_state=None, fingerprint=None):
+    """Renderiza el análisis de correlación (sin `df`, a partir del resumen incremental)."""
+    
+    st.markdown('<p class="subtitle">Análisis de Correlación entre Variables</p>', unsafe_allow_html=True)
+    
+    if df is None:
+        # Solo las columnas numéricas del resumen; las fechas se convierten al leer todas las filas
+        df_prepared, conversion_info = pd.DataFrame(columns=incremental_state['correlation']['columns']), {}
+    else:
+        # Información sobre conversión de fechas
+        st.info("💡 **Tip:** Si tienes columnas con fechas (ej: 16/04/2024), se convertirán automáticamente a días transcurridos para poder calcular correlaciones.")
+        
+        # Preparar datos para correlación (convierte fechas automáticamente)
+        df_prepared, conversion_info = prepare_data_for_correlation(df)
     
     # Mostrar información de conversiones si hay
     if conversion_info:
@@ -478,8 +1071,13 @@ def render_correlation_analysis(df):
         
         if len(selected_cols) >= 2:
             if st.button("🔗 Calcular Matriz de Correlación", key="calc_corr", use_container_width=True):
-                with st.spinner('Calculando correlaciones...'):
-                    corr_matrix = calculate_correlation_matrix(df_prepared, selected_cols)
+                with st.spinner('Calculando correlaciones...'), profiled('correlacion'):
+                    summary_columns = incremental_state['correlation']['columns'] if incremental_state else []
+                    if all(col in summary_columns for col in selected_cols):
+                        # Productos cruzados del resumen incremental
+                        corr_matrix = correlation_from_state(incremental_state['correlation'], selected_cols)
+                    else:
+                        corr_matrix = calculate_correlation_matrix(df_prepared, selected_cols)
                     
                     col1, col2 = st.columns([1, 1])
                     
@@ -495,6 +1093,7 @@ def render_correlation_analysis(df):
                     st.markdown("### 🎯 Mapa de Calor Interactivo")
                     fig_interactive = generate_interactive_correlation_heatmap(corr_matrix)
                     st.plotly_chart(fig_interactive, use_container_width=True)
+                    store_report_figure(fingerprint, 'correlacion', fig_interactive)
                     
                     # Pares de variables más correlacionadas
                     st.markdown("### 🔝 Correlaciones Más Fuertes")
@@ -510,10 +1109,14 @@ def render_correlation_analysis(df):
                     corr_pairs_df = pd.DataFrame(corr_pairs).sort_values('Correlación', key=abs, ascending=False)
                     st.dataframe(corr_pairs_df.head(10), use_container_width=True, hide_index=True)
         
+        render_profile_downloads('correlacion')
+        
         st.markdown('</div>', unsafe_allow_html=True)
     
     # Análisis de dispersión
-    if len(numeric_cols) >= 2:
+    if df is None:
+        render_rows_required()
+    elif len(numeric_cols) >= 2:
         st.markdown("### 📍 Análisis de Dispersión")
         
         with st.container():
@@ -535,10 +1138,30 @@ def render_correlation_analysis(df):
                 with col2:
                     fig_scatter_int = generate_interactive_scatter(df, x_var, y_var)
                     st.plotly_chart(fig_scatter_int, use_container_width=True)
+                    store_report_figure(fingerprint, 'dispersion', fig_scatter_int)
             
             st.markdown('</div>', unsafe_allow_html=True)
 
 
+def store_report_figure(fingerprint, name, fig):
+    """Guarda un gráfico interactivo para el informe HTML, descartando los de otro conjunto de datos."""
+    
+    report = st.session_state.get('report_interactive')
+    if report is None or report['huella'] != fingerprint:
+        report = st.session_state['report_interactive'] = {'huella': fingerprint, 'version': 0, 'figuras': {}}
+    report['figuras'][name] = fig
+    report['version'] += 1
+
+
+def report_interactive_figures(fingerprint):
+    """Gráficos interactivos guardados para el informe HTML del conjunto de datos (versión y figuras)."""
+    
+    report = st.session_state.get('report_interactive')
+    if report is None or fingerprint is None or report['huella'] != fingerprint:
+        return {'version': 0, 'figuras': {}}
+    return report
+
+
 def render_outlier_detection(df):
     """Renderiza la detección de outliers."""
     
@@ -569,7 +1192,7 @@ def render_outlier_detection(df):
             threshold = st.slider("Umbral de Z-score:", 1.0, 4.0, 3.0, 0.1, key="zscore_threshold")
         
         if st.button("🎯 Detectar Outliers", key="detect_outliers", use_container_width=True):
-            with st.spinner('Detectando valores atípicos...'):
+            with st.spinner('Detectando valores atípicos...'), profiled('outliers'):
                 data = df[selected_column].dropna()
                 
                 if method == "IQR (Rango Intercuartílico)":
@@ -594,10 +1217,12 @@ def render_outlier_detection(df):
                     st.markdown("### 📋 Valores Atípicos Detectados (Primeros 20)")
                     st.write(outliers_info['Valores Atípicos'])
         
+        render_profile_downloads('outliers')
+        
         st.markdown('</div>', unsafe_allow_html=True)
 
 
-def render_normality_tests(df):
+def render_normality_tests(df, fingerprint=None):
     """Renderiza las pruebas de normalidad."""
     
     st.markdown('<p class="subtitle">Pruebas de Normalidad</p>', unsafe_allow_html=True)
@@ -618,10 +1243,16 @@ def render_normality_tests(df):
         )
         
         if st.button("📐 Realizar Pruebas de Normalidad", key="test_normality", use_container_width=True):
-            with st.spinner('Realizando pruebas estadísticas...'):
+            with st.spinner('Realizando pruebas estadísticas...'), profiled('normalidad'):
                 data = df[selected_column].dropna()
+                sample_view = build_sample_view(data)
                 
-                normality_results = test_normality(data)
+                if sample_view['n'] > ANALYSIS_CONFIG['shapiro_max_n']:
+                    st.info(f"ℹ️ Modo de muestras grandes ({sample_view['n']:,} valores): se aplican Anderson-Darling, "
+                            f"Jarque-Bera y Shapiro-Wilk sobre submuestras estratificadas de "
+                            f"{ANALYSIS_CONFIG['shapiro_max_n']:,} valores.")
+                
+                normality_results = test_normality(data, sample_view)
                 
                 if 'error' in normality_results:
                     st.error(f"❌ {normality_results['error']}")
@@ -654,19 +1285,121 @@ def render_normality_tests(df):
                     
                     with col1:
                         st.markdown("#### Gráfico Q-Q")
-                        fig_qq = generate_qq_plot(data, selected_column)
+                        fig_qq = generate_qq_plot(data, selected_column, sample_view)
                         st.pyplot(fig_qq)
                     
                     with col2:
                         st.markdown("#### Comparación con Normal")
-                        fig_dist = generate_distribution_comparison(data, selected_column)
+                        fig_dist = generate_distribution_comparison(data, selected_column, sample_view)
                         st.pyplot(fig_dist)
         
+        render_profile_downloads('normalidad')
+        
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Reporte por lotes sobre todas las variables numéricas
+    st.markdown("### 📋 Reporte de Normalidad por Lotes")
+    
+    with st.container():
+        st.markdown('<div class="card">', unsafe_allow_html=True)
+        
+        batch_columns = st.multiselect(
+            "Variables a evaluar:",
+            numeric_cols,
+            default=numeric_cols,
+            key="normality_batch_columns"
+        )
+        
+        if st.button("📋 Evaluar Todas las Variables", key="test_normality_batch", use_container_width=True):
+            with st.spinner(f'Evaluando {len(batch_columns)} variables en paralelo...'), profiled('normalidad_lote'):
+                summary = test_normality_batch(df, batch_columns, fingerprint=fingerprint)
+                
+                normal_columns = summary.groupby('Variable')['Es Normal (α=0.05)'].apply(
+                    lambda verdicts: verdicts.notna().any() and verdicts.dropna().all()
+                )
+                st.metric("Variables normales en todas las pruebas", f"{int(normal_columns.sum())} / {len(normal_columns)}")
+                
+                st.dataframe(summary, use_container_width=True, hide_index=True)
+                st.download_button(
+                    label="📥 Descargar Reporte (CSV)",
+                    data=summary.to_csv(index=False).encode('utf-8'),
+                    file_name="Reporte_Normalidad.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
+        
+        render_profile_downloads('normalidad_lote')
+        
         st.markdown('</div>', unsafe_allow_html=True)
 
 
-def render_export_section(df, selected_column, variable_type, frequency_table, measures, quartiles, figs):
-    """Renderiza la sección de exportación."""
+def render_report_bundle(df, fingerprint=None):
+    """Renderiza la exportación conjunta de varias columnas (Excel, PDF, HTML y R en un ZIP)."""
+    
+    st.markdown('<p class="subtitle">Informe de Varias Columnas</p>', unsafe_allow_html=True)
+    
+    with st.container():
+        st.markdown('<div class="card">', unsafe_allow_html=True)
+        
+        st.markdown("Analiza varias columnas a la vez y descarga un ZIP con un Excel (una hoja por columna), "
+                    "un PDF conjunto, un índice HTML con un informe por columna y un script R por columna.")
+        
+        columns = st.multiselect("Seleccione las columnas:", df.columns.tolist(), key="bundle_columns")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            missing_method = st.selectbox(
+                "Valores nulos:", ANALYSIS_CONFIG['batch_imputation_methods'], key="bundle_missing",
+                help="Las columnas en las que no se puede aplicar el método (por ejemplo, la media de una "
+                     "variable cualitativa) eliminan sus nulos; el resumen lo indica"
+            )
+            missing_options = render_imputation_options(df, None, missing_method, key_prefix="bundle_impute")
+        with col2:
+            figure_formats = VISUALIZATION_CONFIG['figure_formats']
+            figure_format = figure_formats[st.selectbox(
+                "Formato de los gráficos:", list(figure_formats), key="bundle_figure_format"
+            )]
+        
+        if st.button("📦 Generar Informe", key="build_bundle", use_container_width=True, disabled=not columns):
+            progress_bar = st.progress(0.0, text="Preparando columnas...")
+            with profiled('informe_multiple'):
+                bundle, summary = build_report_bundle(
+                    df, columns, missing_method, missing_options, fingerprint, figure_format,
+                    progress=lambda fraction, message: progress_bar.progress(fraction, text=message)
+                )
+            st.session_state['report_bundle'] = {'zip': bundle.getvalue(), 'resumen': summary}
+        
+        report = st.session_state.get('report_bundle')
+        if report is not None:
+            st.dataframe(pd.DataFrame(report['resumen']), use_container_width=True, hide_index=True)
+            st.download_button(
+                label="📥 Descargar Informe (ZIP)",
+                data=report['zip'],
+                file_name="Informe_columnas.zip",
+                mime="application/zip",
+                key="download_bundle",
+                use_container_width=True
+            )
+        
+        render_profile_downloads('informe_multiple')
+        
+        st.markdown('</div>', unsafe_allow_html=True)
+
+
+def render_export_section(df, selected_column, variable_type, frequency_table, measures, quartiles, figs, interactive_figs=None,
+                          cache_key=None, interactive_version=0):
+    """
+    Renderiza la sección de exportación.
+    
+    Los gráficos interactivos (histograma, y el mapa de calor y la dispersión
+    de la última correlación calculada) solo se incluyen en el informe HTML en ZIP.
+    El Excel y el HTML en ZIP se generan solo al pedirlos y se conservan en la
+    sesión con `cache_key` (la clave del resultado) y las opciones elegidas;
+    `interactive_version` cambia cuando se recalculan los gráficos interactivos.
+    """
+    
+    if cache_key is None:
+        cache_key = content_fingerprint(df[selected_column])
     
     st.markdown('<p class="subtitle">📥 Exportación de Resultados</p>', unsafe_allow_html=True)
     
@@ -683,6 +1416,13 @@ def render_export_section(df, selected_column, variable_type, frequency_table, m
         with col2:
             include_quartiles = st.checkbox("Cuartiles", value=True, key="export_quartiles")
             include_graphs = st.checkbox("Gráficos", value=True, key="export_graphs")
+            include_data = st.checkbox("Datos (solo Excel)", value=False, key="export_data")
+        
+        figure_formats = VISUALIZATION_CONFIG['figure_formats']
+        figure_format = figure_formats[st.radio(
+            "Formato de los gráficos en PDF y HTML:", list(figure_formats), horizontal=True, key="export_figure_format",
+            help="Los gráficos vectoriales ocupan menos y se ven nítidos a cualquier tamaño; los gráficos con muchos puntos se exportan siempre como imagen"
+        )]
         
         selected_items = []
         if include_freq_table:
@@ -693,24 +1433,32 @@ def render_export_section(df, selected_column, variable_type, frequency_table, m
             selected_items.append('cuartiles')
         if include_graphs:
             selected_items.append('graficos')
+        if include_data:
+            selected_items.append('datos')
         
         st.markdown("#### Descargar Resultados:")
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
             excel_filename = f"Analisis_{selected_column}.xlsx"
-            excel_data = export_to_excel(frequency_table, measures, quartiles, figs, selected_items, excel_filename)
-            st.download_button(
+            render_on_demand_download(
+                "⚙️ Generar Excel",
+                derive_fingerprint('excel', cache_key, selected_items),
+                lambda: export_to_excel(
+                    frequency_table, measures, quartiles, figs, selected_items, excel_filename, data=df[selected_column]
+                ),
                 label="📊 Descargar Excel",
-                data=excel_data,
                 file_name=excel_filename,
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
+                key="download_excel"
             )
         
         with col2:
             pdf_filename = f"Analisis_{selected_column}.pdf"
-            pdf_data = export_to_pdf(df, selected_column, variable_type, frequency_table, measures, quartiles, figs, selected_items, pdf_filename)
+            pdf_data = export_to_pdf(
+                df, selected_column, variable_type, frequency_table, measures, quartiles, figs, selected_items, pdf_filename,
+                figure_format=figure_format
+            )
             st.download_button(
                 label="📄 Descargar PDF",
                 data=pdf_data,
@@ -720,7 +1468,9 @@ def render_export_section(df, selected_column, variable_type, frequency_table, m
             )
         
         with col3:
-            html_report = generate_html_report(df, selected_column, variable_type, frequency_table, measures, quartiles, figs)
+            html_report = generate_html_report(
+                df, selected_column, variable_type, frequency_table, measures, quartiles, figs, figure_format=figure_format
+            )
             html_filename = f"Informe_{selected_column}.html"
             st.download_button(
                 label="🌐 Descargar HTML",
@@ -729,22 +1479,67 @@ def render_export_section(df, selected_column, variable_type, frequency_table, m
                 mime="text/html",
                 use_container_width=True
             )
+            render_on_demand_download(
+                "⚙️ Generar HTML en carpeta",
+                derive_fingerprint('html_zip', cache_key, figure_format, interactive_version),
+                lambda: generate_html_bundle(
+                    df, selected_column, variable_type, frequency_table, measures, quartiles, figs,
+                    interactive_figs=interactive_figs, figure_format=figure_format
+                ),
+                label="🗂️ HTML en carpeta (ZIP)",
+                file_name=f"Informe_{selected_column}.zip",
+                mime="application/zip",
+                help="Gráficos en archivos aparte y gráficos interactivos con un único plotly.js: se abre más rápido con muchos datos",
+                key="download_html_bundle"
+            )
         
         with col4:
-            # Obtener los valores originales de los datos
-            data_values = df[selected_column].dropna().tolist()
-            r_code = generate_r_code(df, selected_column, variable_type, frequency_table, measures, quartiles, data_values)
-            r_filename = f"Codigo_R_{selected_column}.R"
-            st.download_button(
-                label="📈 Código R Studio",
-                data=r_code,
-                file_name=r_filename,
-                mime="text/plain",
-                use_container_width=True
-            )
+            if df[selected_column].count() > EXPORT_CONFIG['r_inline_max_values']:
+                # Muchos valores: script con los datos en un CSV aparte (ZIP)
+                render_on_demand_download(
+                    "⚙️ Generar Código R",
+                    derive_fingerprint('r_bundle', cache_key),
+                    lambda: generate_r_bundle(
+                        df, selected_column, variable_type, frequency_table, measures, quartiles, df[selected_column]
+                    ),
+                    label="📈 Código R Studio",
+                    file_name=f"Codigo_R_{selected_column}.zip",
+                    mime="application/zip",
+                    help=f"Script R y datos en {EXPORT_CONFIG['r_data_file']}: descomprima ambos en la misma carpeta",
+                    key="download_r_bundle"
+                )
+            else:
+                # Obtener los valores originales de los datos
+                data_values = df[selected_column].dropna().tolist()
+                r_code = generate_r_code(df, selected_column, variable_type, frequency_table, measures, quartiles, data_values)
+                r_filename = f"Codigo_R_{selected_column}.R"
+                st.download_button(
+                    label="📈 Código R Studio",
+                    data=r_code,
+                    file_name=r_filename,
+                    mime="text/plain",
+                    use_container_width=True
+                )
         
         st.markdown('</div>', unsafe_allow_html=True)
 
 
+def render_on_demand_download(build_label, cache_key, build, **download_args):
+    """
+    Muestra un botón que genera el archivo solo al pulsarlo y después el botón de descarga.
+    
+    El archivo generado se conserva en la sesión con `cache_key`, así que las
+    demás interacciones no lo vuelven a generar.
+    """
+    
+    downloads = st.session_state.setdefault('export_downloads', {})
+    if cache_key not in downloads:
+        if not st.button(build_label, key=f"build_{download_args['key']}", use_container_width=True):
+            return
+        with st.spinner('⏳ Generando archivo...'):
+            cached_result(downloads, cache_key, build, EXPORT_CONFIG['session_downloads'])
+    st.download_button(data=downloads[cache_key], use_container_width=True, **download_args)
+
+
 if __name__ == "__main__":
     main()
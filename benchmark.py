@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Benchmark de rendimiento - Análisis, visualización y exportación
+
+Genera conjuntos de datos sintéticos (continuos, discretos, cualitativos,
+fechas, alta cardinalidad y con nulos), mide el tiempo y el pico de memoria
+de las funciones de análisis, de cada generador de gráficos y de cada
+exportador, y compara los resultados con una línea base guardada en JSON.
+
+Uso:
+    python benchmark.py                       # tamaños por defecto, compara con la línea base
+    python benchmark.py --full                # de 10³ a 10⁷ filas
+    python benchmark.py --sizes 1000 50000    # tamaños concretos
+    python benchmark.py --only frecuencia     # solo los casos cuyo nombre contiene el texto
+    python benchmark.py --save                # guarda los resultados como nueva línea base
+
+Devuelve código de salida 1 si alguna medición es una regresión respecto a la línea base.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from src import analysis, export, utils, visualization
+from src.config import BENCHMARK_CONFIG
+
+
+# Tipos de variable de cada conjunto sintético (el de fechas solo se usa para la detección de fechas)
+DATASET_TYPES = {
+    'continua': "Cuantitativa Continua",
+    'discreta': "Cuantitativa Discreta",
+    'cualitativa': "Cualitativa",
+    'alta_cardinalidad': "Cualitativa",
+    'con_nulos': "Cuantitativa Continua",
+    'fechas': None,
+}
+
+
+def generate_dataset(kind, n, seed=None):
+    """
+    Genera una columna sintética.
+
+    Args:
+        kind (str): Tipo de conjunto (ver DATASET_TYPES)
+        n (int): Número de filas
+        seed (int): Semilla del generador aleatorio
+
+    Returns:
+        pd.Series: Columna generada
+    """
+    rng = np.random.default_rng(BENCHMARK_CONFIG['seed'] if seed is None else seed)
+
+    if kind == 'continua':
+        values = np.round(rng.normal(50, 12, n), 2)
+    elif kind == 'discreta':
+        values = rng.poisson(4, n)
+    elif kind == 'cualitativa':
+        categories = np.array(['Norte', 'Sur', 'Este', 'Oeste', 'Centro', 'Islas', 'Costa', 'Sierra'])
+        values = categories[rng.integers(0, len(categories), n)]
+    elif kind == 'alta_cardinalidad':
+        values = np.char.add('ID-', rng.integers(0, max(n // 2, 1), n).astype(str))
+    elif kind == 'con_nulos':
+        values = np.round(rng.lognormal(3, 0.5, n), 2)
+        values[rng.random(n) < 0.2] = np.nan
+    elif kind == 'fechas':
+        days = rng.integers(0, 3650, n).astype('timedelta64[D]')
+        values = np.datetime_as_string(np.datetime64('2015-01-01') + days, unit='D')
+    else:
+        raise ValueError(f"Tipo de conjunto desconocido: {kind}")
+
+    return pd.Series(values, name=kind.capitalize())
+
+
+def generate_dataframe(n, seed=None):
+    """
+    Genera un DataFrame numérico correlacionado (con nulos) para correlación y dispersión.
+
+    Args:
+        n (int): Número de filas
+        seed (int): Semilla del generador aleatorio
+
+    Returns:
+        pd.DataFrame: DataFrame con cinco columnas numéricas
+    """
+    rng = np.random.default_rng(BENCHMARK_CONFIG['seed'] if seed is None else seed)
+    base = rng.normal(0, 1, n)
+    df = pd.DataFrame({
+        'Precio': np.round(50 + 10 * base, 2),
+        'Ventas': np.round(200 + 40 * (0.7 * base + 0.3 * rng.normal(0, 1, n))).astype(int),
+        'Margen': np.round(rng.lognormal(1, 0.4, n), 3),
+        'Descuento': np.round(rng.uniform(0, 0.3, n), 3),
+        'Cantidad': rng.poisson(5, n),
+    })
+    df.loc[rng.random(n) < 0.05, 'Margen'] = np.nan
+    return df
+
+
+def benchmark_cases(n, seed=None):
+    """
+    Prepara los casos del benchmark para un tamaño.
+
+    Los datos y los resultados intermedios (tablas, medidas, figuras para los
+    exportadores) se calculan aquí, fuera de la medición.
+
+    Args:
+        n (int): Número de filas
+        seed (int): Semilla del generador aleatorio
+
+    Returns:
+        list: Tuplas (caso, conjunto, función sin argumentos)
+    """
+    include_figures = n <= BENCHMARK_CONFIG['figure_max_rows']
+    cases = []
+
+    for kind, variable_type in DATASET_TYPES.items():
+        raw = generate_dataset(kind, n, seed)
+
+        if variable_type is None:
+            cases.append(('detect_and_convert_dates', kind, lambda raw=raw: utils.detect_and_convert_dates(raw)))
+            continue
+
+        data = raw.dropna()
+        column = str(raw.name)
+        cases.append(('determine_variable_type', kind, lambda raw=raw: utils.determine_variable_type(raw)))
+        cases.append(('calculate_frequency_table', kind, lambda data=data, t=variable_type: analysis.calculate_frequency_table(data, t)))
+        frequency_table = analysis.calculate_frequency_table(data, variable_type)
+        cases.append(('calculate_quartiles', kind, lambda data=data, ft=frequency_table, t=variable_type: analysis.calculate_quartiles(data, ft, t)))
+        quartiles = analysis.calculate_quartiles(data, frequency_table, variable_type)
+
+        if variable_type == "Cuantitativa Continua":
+            cases.append(('calculate_all_measures_grouped', kind, lambda ft=frequency_table: analysis.calculate_all_measures_grouped(ft)))
+            measures = analysis.calculate_all_measures_grouped(frequency_table)
+        elif variable_type == "Cuantitativa Discreta":
+            measures = analysis.calculate_statistics_summary(data)
+        else:
+            cases.append(('qualitative_measures', kind, lambda data=data: analysis.qualitative_measures(data)))
+            measures = analysis.qualitative_measures(data)
+
+        numeric = variable_type != "Cualitativa"
+        if numeric:
+            cases.append(('calculate_statistics_summary', kind, lambda data=data: analysis.calculate_statistics_summary(data)))
+            cases.append(('detect_outliers_iqr', kind, lambda data=data: analysis.detect_outliers_iqr(data)))
+            cases.append(('detect_outliers_zscore', kind, lambda data=data: analysis.detect_outliers_zscore(data)))
+            cases.append(('test_normality', kind, lambda data=data: analysis.test_normality(data)))
+
+        if not include_figures:
+            continue
+
+        if variable_type == "Cuantitativa Continua":
+            generators = [visualization.generate_histogram, visualization.generate_interactive_histogram,
+                          visualization.generate_boxplot, visualization.generate_violinplot]
+        else:
+            generators = [visualization.generate_bar_chart, visualization.generate_pie_chart,
+                          visualization.generate_horizontal_bar_chart]
+        for generate in generators:
+            cases.append((generate.__name__, kind, lambda data=data, g=generate, t=variable_type, c=column: g(data, t, c)))
+
+        if numeric:
+            outliers = analysis.detect_outliers_iqr(data)
+            cases.append(('generate_qq_plot', kind, lambda data=data, c=column: visualization.generate_qq_plot(data, c)))
+            cases.append(('generate_outliers_plot', kind, lambda data=data, o=outliers, c=column: visualization.generate_outliers_plot(data, o, c)))
+            cases.append(('generate_distribution_comparison', kind, lambda data=data, c=column: visualization.generate_distribution_comparison(data, c)))
+
+        # Exportadores con las mismas entradas que la aplicación
+        df = raw.to_frame()
+        fig = generators[0](data, variable_type, column)
+        figs = [{'svg': visualization.figure_to_svg(fig), 'png': visualization.figure_to_png(fig)}]
+        items = ['tabla_frecuencia', 'medidas_resumen', 'cuartiles', 'graficos']
+        args = (df, column, variable_type, frequency_table, measures, quartiles)
+        cases.append(('export_to_excel', kind, lambda ft=frequency_table, m=measures, q=quartiles, f=figs, data=data: export.export_to_excel(
+            ft, m, q, f, items + ['datos'], data=data)))
+        cases.append(('export_to_pdf', kind, lambda args=args, f=figs: export.export_to_pdf(*args, f, items)))
+        cases.append(('generate_html_report', kind, lambda args=args, f=figs: export.generate_html_report(*args, f)))
+        cases.append(('generate_html_report_svg', kind, lambda args=args, f=figs: export.generate_html_report(*args, f, figure_format='svg')))
+        cases.append(('generate_html_bundle', kind, lambda args=args, f=figs: export.generate_html_bundle(*args, f)))
+        cases.append(('generate_r_code', kind, lambda args=args, data=data: export.generate_r_code(*args, data.tolist())))
+        cases.append(('generate_r_bundle', kind, lambda args=args, data=data: export.generate_r_bundle(*args, data)))
+
+    # Correlación y gráficos de dos variables
+    df = generate_dataframe(n, seed)
+    cases.append(('calculate_correlation_matrix', 'dataframe', lambda: analysis.calculate_correlation_matrix(df)))
+    if include_figures:
+        corr = analysis.calculate_correlation_matrix(df)
+        cases.append(('generate_correlation_heatmap', 'dataframe', lambda: visualization.generate_correlation_heatmap(corr)))
+        cases.append(('generate_interactive_correlation_heatmap', 'dataframe', lambda: visualization.generate_interactive_correlation_heatmap(corr)))
+        cases.append(('generate_scatter_plot', 'dataframe', lambda: visualization.generate_scatter_plot(df, 'Precio', 'Ventas')))
+        cases.append(('generate_interactive_scatter', 'dataframe', lambda: visualization.generate_interactive_scatter(df, 'Precio', 'Ventas')))
+
+    return cases
+
+
+def measure(func, repeat):
+    """
+    Mide el tiempo (mínimo de varias repeticiones) y el pico de memoria de una función.
+
+    La memoria se mide en una ejecución aparte con tracemalloc, que ralentiza
+    las asignaciones y distorsionaría el tiempo.
+
+    Args:
+        func (callable): Función sin argumentos
+        repeat (int): Número de repeticiones para el tiempo
+
+    Returns:
+        dict: 'tiempo' en segundos y 'memoria' en bytes
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+        plt.close('all')
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        plt.close('all')
+
+    return {'tiempo': min(times), 'memoria': peak}
+
+
+def run_benchmarks(sizes, only=None, seed=None):
+    """
+    Ejecuta el benchmark para varios tamaños.
+
+    Args:
+        sizes (list): Números de filas
+        only (str): Ejecutar solo los casos cuyo nombre contiene este texto
+        seed (int): Semilla del generador aleatorio
+
+    Returns:
+        dict: Resultados indexados por 'caso|conjunto|filas'
+    """
+    results = {}
+    for n in sizes:
+        print(f"\n📏 {n:,} filas")
+        repeat = 1 if n >= BENCHMARK_CONFIG['large_size'] else BENCHMARK_CONFIG['repeat']
+        for name, kind, func in benchmark_cases(n, seed):
+            if only and only not in name:
+                continue
+            key = f"{name}|{kind}|{n}"
+            try:
+                results[key] = measure(func, repeat)
+            except Exception as e:
+                print(f"   ❌ {name} ({kind}): {e}")
+                continue
+            print(f"   {name:<42} {kind:<18} {results[key]['tiempo'] * 1000:>10.1f} ms {results[key]['memoria'] / 2**20:>9.1f} MB")
+    return results
+
+
+def compare_with_baseline(results, baseline):
+    """
+    Compara los resultados con la línea base.
+
+    Una medición es una regresión si supera la línea base en más de la
+    tolerancia relativa y además en más de la diferencia mínima absoluta
+    (para no marcar el ruido de las funciones muy rápidas).
+
+    Args:
+        results (dict): Resultados de `run_benchmarks`
+        baseline (dict): Resultados de la línea base
+
+    Returns:
+        list: Regresiones como tuplas (clave, métrica, base, actual)
+    """
+    limits = {
+        'tiempo': (BENCHMARK_CONFIG['time_tolerance'], BENCHMARK_CONFIG['min_time_delta']),
+        'memoria': (BENCHMARK_CONFIG['memory_tolerance'], BENCHMARK_CONFIG['min_memory_delta']),
+    }
+    regressions = []
+    for key, current in results.items():
+        if key not in baseline:
+            continue
+        for metric, (tolerance, min_delta) in limits.items():
+            base, value = baseline[key][metric], current[metric]
+            if value > base * (1 + tolerance) and value - base > min_delta:
+                regressions.append((key, metric, base, value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de análisis, visualización y exportación")
+    parser.add_argument('--sizes', type=int, nargs='+', help="Números de filas a medir")
+    parser.add_argument('--full', action='store_true', help="Medir de 10³ a 10⁷ filas")
+    parser.add_argument('--only', help="Solo los casos cuyo nombre contiene este texto")
+    parser.add_argument('--baseline', default=BENCHMARK_CONFIG['baseline'], help="Archivo JSON de la línea base")
+    parser.add_argument('--save', action='store_true', help="Guardar los resultados como línea base")
+    parser.add_argument('--seed', type=int, default=BENCHMARK_CONFIG['seed'])
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (BENCHMARK_CONFIG['full_sizes'] if args.full else BENCHMARK_CONFIG['sizes'])
+
+    print("=" * 60)
+    print("⏱️ BENCHMARK: Análisis, Visualización y Exportación")
+    print("=" * 60)
+    results = run_benchmarks(sizes, args.only, args.seed)
+
+    regressions = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline['resultados'])
+        compared = len(set(results) & set(baseline['resultados']))
+        print(f"\n📊 Comparación con {args.baseline} ({baseline['metadatos']['fecha']}): {compared} mediciones")
+        for key, metric, base, value in regressions:
+            if metric == 'tiempo':
+                print(f"   ⚠️ {key}: {base * 1000:.1f} ms → {value * 1000:.1f} ms ({value / base - 1:+.0%})")
+            else:
+                print(f"   ⚠️ {key}: {base / 2**20:.1f} MB → {value / 2**20:.1f} MB ({value / base - 1:+.0%})")
+        if not regressions:
+            print("   ✅ Sin regresiones")
+    else:
+        print(f"\nℹ️ No existe la línea base {args.baseline}; use --save para crearla")
+
+    if args.save:
+        baseline = {'metadatos': {}, 'resultados': {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline['resultados'].update(results)  # Conserva los tamaños no medidos en esta ejecución
+        baseline['metadatos'] = {
+            'fecha': datetime.now().strftime('%d/%m/%Y %H:%M'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'plataforma': platform.platform(),
+        }
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, ensure_ascii=False)
+        print(f"💾 Línea base guardada en {args.baseline}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
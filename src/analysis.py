@@ -4,134 +4,428 @@ Contiene funciones para calcular tablas de frecuencia, medidas estadísticas y c
 """
 import pandas as pd
 import numpy as np
-import streamlit as st
+import logging
 from math import log, exp
-from scipy import stats
 import re
+from src.config import ANALYSIS_CONFIG
+from src.cache import column_fingerprint, content_fingerprint
+from src.utils import get_numeric_columns, run_parallel
+from src.instrumentation import instrumented
 
+# Los errores se registran con logging para que el módulo no dependa de la interfaz;
+# scipy.stats se importa dentro de las funciones que lo usan para acelerar el arranque
+logger = logging.getLogger(__name__)
 
-def calculate_frequency_table(data, variable_type):
+
+def encode_categorical(data, as_text=False):
+    """
+    Codifica una variable cualitativa como códigos enteros y diccionario de categorías.
+    
+    Las series con tipo 'category' reutilizan sus códigos sin recorrer los
+    valores; el resto se codifica una sola vez con `pd.factorize`.
+    
+    Args:
+        data (pd.Series): Datos a codificar
+        as_text (bool): Si es True, las categorías se agrupan por su texto
+                        (equivalente a `data.astype(str)`)
+        
+    Returns:
+        tuple: (códigos np.ndarray con -1 para nulos, categorías ordenadas pd.Index)
+    """
+    if isinstance(data.dtype, pd.CategoricalDtype):
+        codes = data.cat.codes.to_numpy()
+        categories = data.cat.categories
+    else:
+        try:
+            codes, categories = pd.factorize(data, sort=True)
+        except TypeError:  # Tipos mezclados que no se pueden ordenar
+            codes, categories = pd.factorize(data)
+    
+    if as_text:
+        # Solo se convierte el diccionario; valores como 1 y '1' pasan a una misma categoría
+        text_codes, categories = pd.factorize(categories.astype(str), sort=True)
+        if len(text_codes) > 0:
+            codes = np.where(codes >= 0, text_codes[codes], -1)
+    
+    return codes, pd.Index(categories)
+
+
+def categorical_counts(data, as_text=False):
+    """
+    Cuenta la frecuencia de cada categoría con `np.bincount` sobre los códigos.
+    
+    Args:
+        data (pd.Series): Datos a contar
+        as_text (bool): Si es True, las categorías se agrupan por su texto
+        
+    Returns:
+        pd.Series: Frecuencias por categoría en orden de categoría, sin nulos
+                   ni categorías vacías
+    """
+    codes, categories = encode_categorical(data, as_text)
+    counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+    present = counts > 0
+    return pd.Series(counts[present], index=categories[present])
+
+
+def top_categories(counts, max_categories, other_label=None):
+    """
+    Conserva las categorías más frecuentes y agrupa el resto en una sola categoría.
+    
+    Args:
+        counts (pd.Series): Frecuencias por categoría (`categorical_counts`)
+        max_categories (int): Número de categorías que se conservan
+        other_label (str): Etiqueta de la categoría agrupada (por defecto "Otros")
+        
+    Returns:
+        pd.Series: Frecuencias de mayor a menor (empates en orden de categoría),
+                   con como máximo `max_categories` + 1 filas
+    """
+    if other_label is None:
+        other_label = ANALYSIS_CONFIG['other_category_label']
+    
+    ordered = counts.sort_values(ascending=False, kind='stable')
+    if len(ordered) <= max_categories:
+        return ordered
+    
+    top = ordered.iloc[:max_categories]
+    other = pd.Series([ordered.iloc[max_categories:].sum()], index=[other_label])
+    return pd.concat([top, other])
+
+
+@instrumented()
+def qualitative_measures(data, counts=None):
+    """
+    Calcula moda, frecuencia y proporción de la moda y entropía de una variable cualitativa.
+    
+    Args:
+        data (pd.Series): Datos de la variable (None si se pasan `counts`); los nulos no cuentan
+        counts (pd.Series): Resultado de `categorical_counts` ya calculado (opcional)
+        
+    Returns:
+        dict: Medidas de la variable cualitativa
+    """
+    if counts is None:
+        counts = categorical_counts(data)
+    # Las proporciones se calculan sobre los datos no nulos, como la tabla de frecuencia
+    n = int(counts.sum())
+    
+    if counts.empty:
+        return {'Moda': None, 'Frecuencia de la Moda': 0, 'Proporción de la Moda': 0,
+                'Valores Únicos': 0, 'Entropía': 0}
+    
+    # Primera categoría con la frecuencia máxima, como `data.mode()[0]`
+    mode_position = int(np.argmax(counts.to_numpy()))
+    mode_count = counts.iloc[mode_position]
+    proportions = counts.to_numpy() / n
+    
+    return {
+        'Moda': counts.index[mode_position],
+        'Frecuencia de la Moda': mode_count,
+        'Proporción de la Moda': round(mode_count / n, 4),
+        'Valores Únicos': len(counts),
+        'Entropía': round(float(-np.sum(proportions * np.log2(proportions))), 4)
+    }
+
+
+@instrumented()
+def calculate_frequency_table(data, variable_type, max_categories=None, bin_edges=None):
     """
     Calcula la tabla de frecuencia para diferentes tipos de variables.
     
+    En variables cualitativas con más de `max_categories` valores distintos
+    (identificadores, texto libre) la tabla muestra las categorías más
+    frecuentes y agrupa el resto en una fila "Otros".
+    
+    Con `bin_edges` las variables agrupadas usan intervalos fijos en lugar de
+    calcularlos a partir de los datos, de modo que las tablas de distintos
+    bloques, archivos o periodos tienen los mismos intervalos y se pueden
+    sumar (`merge_frequency_tables`) o comparar directamente.
+    
     Args:
         data (pd.Series): Datos a analizar
         variable_type (str): Tipo de variable
+        max_categories (int): Máximo de categorías cualitativas en la tabla
+                              (None = valor de ANALYSIS_CONFIG)
+        bin_edges (list): Límites fijos de los intervalos (None = automáticos);
+                          se amplían con intervalos de la misma amplitud si hay
+                          datos fuera de ellos
         
     Returns:
         list: Lista de diccionarios con la tabla de frecuencia
     """
-    frequency_table = []
-    total_frecuencia_absoluta = 0
-    total_frecuencia_relativa = 0
-    total_frecuencia_porcentual = 0
-
     if variable_type == "Cualitativa":
-        data = data.astype(str)
-        unique_values = data.value_counts().sort_index()
-        frecuencia_acumulada = 0
-        for value, count in unique_values.items():
-            frecuencia_acumulada += count
-            frecuencia_relativa = count / len(data)
-            frecuencia_relativa_acumulada = frecuencia_acumulada / len(data)
-            frequency_table.append({
-                'valor': value,
-                'frecuenciaAbsoluta': count,
-                'frecuenciaRelativa': round(frecuencia_relativa, 4),
-                'frecuenciaPorcentual': round(frecuencia_relativa * 100, 2),
-                'frecuenciaAcumulada': frecuencia_acumulada,
-                'frecuenciaRelativaAcumulada': round(frecuencia_relativa_acumulada, 4),
-                'frecuenciaPorcentualAcumulada': round(frecuencia_relativa_acumulada * 100, 2)
-            })
-            total_frecuencia_absoluta += count
-            total_frecuencia_relativa += frecuencia_relativa
-            total_frecuencia_porcentual += frecuencia_relativa * 100
+        counts = categorical_counts(data, as_text=True)
+        # Los nulos no forman categoría: el total son los datos no nulos
+        return frequency_table_from_counts(counts, variable_type, int(counts.sum()), max_categories)
 
     elif variable_type == "Cuantitativa Discreta":
         data = pd.to_numeric(data, errors='coerce')
         data = data.dropna()
-        unique_values = data.value_counts().sort_index()
-        frecuencia_acumulada = 0
-        for value, count in unique_values.items():
-            frecuencia_acumulada += count
-            frecuencia_relativa = count / len(data)
-            frecuencia_relativa_acumulada = frecuencia_acumulada / len(data)
-            frequency_table.append({
-                'valor': value,
-                'frecuenciaAbsoluta': count,
-                'frecuenciaRelativa': round(frecuencia_relativa, 4),
-                'frecuenciaPorcentual': round(frecuencia_relativa * 100, 2),
-                'frecuenciaAcumulada': frecuencia_acumulada,
-                'frecuenciaRelativaAcumulada': round(frecuencia_relativa_acumulada, 4),
-                'frecuenciaPorcentualAcumulada': round(frecuencia_relativa_acumulada * 100, 2)
-            })
-            total_frecuencia_absoluta += count
-            total_frecuencia_relativa += frecuencia_relativa
-            total_frecuencia_porcentual += frecuencia_relativa * 100
+        return frequency_table_from_counts(data.value_counts().sort_index(), variable_type, len(data))
 
     elif variable_type in ["Cuantitativa Discreta con Intervalos", "Cuantitativa Continua"]:
         data = pd.to_numeric(data, errors='coerce')
         data = data.dropna()
-        min_value = data.min()
-        max_value = data.max()
-        n = len(data)
+        if bin_edges is not None:
+            bins = extend_bin_edges(bin_edges, data.min(), data.max())
+        else:
+            bins = compute_bin_edges(data)
 
-        # Calcular el número de intervalos usando múltiples reglas y elegir la mejor
-        # Regla de Sturges (clásica)
-        k_sturges = int(np.ceil(1 + 3.322 * np.log10(n)))
-        
-        # Regla de Rice (alternativa)
-        k_rice = int(np.ceil(2 * np.power(n, 1/3)))
+        # Crear los intervalos usando pd.cut con precisión
+        intervals = pd.cut(data, bins=bins, right=False, include_lowest=True)
+
+        # Calcular frecuencias
+        freq = intervals.value_counts().sort_index()
+        return frequency_table_from_counts(freq, variable_type, len(data))
+
+    return []
+
+
+def compute_bin_edges(data):
+    """
+    Calcula los límites automáticos de los intervalos de una variable agrupada.
+    
+    Los límites pueden guardarse y pasarse después como `bin_edges` a
+    `calculate_frequency_table` para tabular otros datos con los mismos intervalos.
+    
+    Args:
+        data (pd.Series): Datos numéricos
         
-        # Regla de Scott (basada en desviación estándar)
-        h_scott = 3.5 * data.std() / np.power(n, 1/3)
-        k_scott = int(np.ceil((max_value - min_value) / h_scott)) if h_scott > 0 else k_sturges
+    Returns:
+        list: Límites de los intervalos, cerrados por la izquierda
+    """
+    data = pd.to_numeric(data, errors='coerce').dropna()
+    iqr = data.quantile(0.75) - data.quantile(0.25)
+    return [float(edge) for edge in interval_bins(len(data), data.min(), data.max(), data.std(), iqr)]
+
+
+def extend_bin_edges(bin_edges, min_value, max_value):
+    """
+    Amplía unos límites fijos con intervalos de igual amplitud hasta cubrir los datos.
+    
+    Los intervalos originales se conservan, así que las tablas siguen siendo
+    combinables con las calculadas con los límites sin ampliar.
+    
+    Args:
+        bin_edges (list): Límites de los intervalos, en orden creciente
+        min_value (float): Valor mínimo de los datos
+        max_value (float): Valor máximo de los datos
         
-        # Regla de Freedman-Diaconis (más robusta)
-        iqr = data.quantile(0.75) - data.quantile(0.25)
-        h_fd = 2 * iqr / np.power(n, 1/3) if iqr > 0 else h_scott
-        k_fd = int(np.ceil((max_value - min_value) / h_fd)) if h_fd > 0 else k_sturges
+    Returns:
+        list: Límites ampliados
         
-        # Elegir el número óptimo de intervalos (promedio ponderado)
-        # Preferir métodos robustos pero limitar valores extremos
-        k_options = [k_sturges, k_rice, k_scott, k_fd]
-        k_options = [k for k in k_options if 5 <= k <= 30]  # Limitar entre 5 y 30 intervalos
+    Raises:
+        ValueError: Si los límites no son válidos (`validate_bin_edges`) o si cubrir
+                    los datos exige más de `ANALYSIS_CONFIG['max_extra_intervals']`
+                    intervalos nuevos
+    """
+    edges = validate_bin_edges(bin_edges)
+    
+    # Amplitud del primer intervalo (el último de los límites automáticos es más estrecho)
+    width = edges[1] - edges[0]
+    n_lower = max(int(np.ceil((edges[0] - min_value) / width)), 0)
+    n_upper = max(int(np.floor((max_value - edges[-1]) / width)) + 1, 0)
+    max_extra = ANALYSIS_CONFIG['max_extra_intervals']
+    if n_lower + n_upper > max_extra:
+        raise ValueError(
+            f"Los datos ({min_value:g} a {max_value:g}) quedan muy lejos de los límites fijos "
+            f"({edges[0]:g} a {edges[-1]:g}): harían falta {n_lower + n_upper} intervalos nuevos "
+            f"(máximo {max_extra})"
+        )
+    
+    lower = [edges[0] - width * i for i in range(1, n_lower + 1)]
+    upper = [edges[-1] + width * i for i in range(1, n_upper + 1)]
+    return lower[::-1] + edges + upper
+
+
+def validate_bin_edges(bin_edges):
+    """
+    Comprueba unos límites de intervalos y los devuelve como números.
+    
+    Args:
+        bin_edges (list): Límites de los intervalos
         
-        if k_options:
-            number_of_intervals = int(np.median(k_options))  # Usar mediana para robustez
-        else:
-            number_of_intervals = max(5, min(20, k_sturges))  # Valor por defecto seguro
+    Returns:
+        list: Límites como float, sin cambios
         
-        # Ajustar si hay muy pocos datos
-        if n < 30:
-            number_of_intervals = min(number_of_intervals, int(np.sqrt(n)))
+    Raises:
+        ValueError: Si hay menos de dos límites o no son estrictamente crecientes
+    """
+    edges = [float(edge) for edge in bin_edges]
+    if len(edges) < 2 or any(b <= a for a, b in zip(edges, edges[1:])):
+        raise ValueError("Los límites de los intervalos deben ser al menos dos y estrictamente crecientes")
+    return edges
 
-        # Calcular el tamaño del intervalo con precisión
-        interval_size = (max_value - min_value) / number_of_intervals
+
+@instrumented()
+def merge_frequency_tables(tables, variable_type, max_categories=None):
+    """
+    Suma tablas de frecuencia de varios bloques, archivos o periodos.
+    
+    Las tablas agrupadas deben haberse calculado con los mismos límites
+    (`bin_edges`); los intervalos que solo aparecen en algunas tablas se
+    suman como si en las demás tuvieran frecuencia cero.
+    
+    Args:
+        tables (list): Tablas de `calculate_frequency_table`
+        variable_type (str): Tipo de variable
+        max_categories (int): Máximo de categorías cualitativas en la tabla combinada
         
-        # Redondear el tamaño del intervalo a un valor "limpio" si es apropiado
-        # Esto mejora la legibilidad sin perder precisión
-        magnitude = 10 ** np.floor(np.log10(interval_size))
-        interval_size_rounded = np.ceil(interval_size / magnitude) * magnitude
+    Returns:
+        list: Tabla de frecuencia combinada
+    """
+    grouped = variable_type in ["Cuantitativa Discreta con Intervalos", "Cuantitativa Continua"]
+    label, count = ('Intervalo', 'Frecuencia Absoluta') if grouped else ('valor', 'frecuenciaAbsoluta')
+    
+    counts = {}
+    for table in tables:
+        for row in table:
+            if row[label] != 'Total':
+                counts[row[label]] = counts.get(row[label], 0) + row[count]
+    
+    if grouped:
+        # "[a - b)" → intervalo cerrado por la izquierda
+        intervals = [pd.Interval(*map(float, text[1:-1].split(' - ')), closed='left') for text in counts]
+        merged = pd.Series(list(counts.values()), index=pd.IntervalIndex(intervals)).sort_index()
+    else:
+        merged = pd.Series(counts)
+        try:
+            merged = merged.sort_index()
+        except TypeError:  # Tipos mezclados que no se pueden ordenar
+            pass
+    return frequency_table_from_counts(merged, variable_type, max_categories=max_categories)
+
+
+def interval_bins(n, min_value, max_value, std, iqr):
+    """
+    Calcula los límites de los intervalos de una tabla de frecuencia agrupada.
+    
+    El número de intervalos es la mediana de las reglas de Sturges, Rice, Scott
+    y Freedman-Diaconis, y la amplitud se redondea a un valor "limpio".
+    
+    Args:
+        n (int): Número de datos
+        min_value (float): Valor mínimo
+        max_value (float): Valor máximo
+        std (float): Desviación estándar muestral
+        iqr (float): Rango intercuartílico
         
-        # Recalcular número de intervalos con el tamaño redondeado
-        if interval_size_rounded > 0:
-            number_of_intervals = int(np.ceil((max_value - min_value) / interval_size_rounded))
-            interval_size = interval_size_rounded
+    Returns:
+        list: Límites de los intervalos, cerrados por la izquierda
+    """
+    # Calcular el número de intervalos usando múltiples reglas y elegir la mejor
+    # Regla de Sturges (clásica)
+    k_sturges = int(np.ceil(1 + 3.322 * np.log10(n)))
+    
+    # Regla de Rice (alternativa)
+    k_rice = int(np.ceil(2 * np.power(n, 1/3)))
+    
+    # Regla de Scott (basada en desviación estándar)
+    h_scott = 3.5 * std / np.power(n, 1/3)
+    k_scott = int(np.ceil((max_value - min_value) / h_scott)) if h_scott > 0 else k_sturges
+    
+    # Regla de Freedman-Diaconis (más robusta)
+    h_fd = 2 * iqr / np.power(n, 1/3) if iqr > 0 else h_scott
+    k_fd = int(np.ceil((max_value - min_value) / h_fd)) if h_fd > 0 else k_sturges
+    
+    # Elegir el número óptimo de intervalos (promedio ponderado)
+    # Preferir métodos robustos pero limitar valores extremos
+    k_options = [k_sturges, k_rice, k_scott, k_fd]
+    k_options = [k for k in k_options if 5 <= k <= 30]  # Limitar entre 5 y 30 intervalos
+    
+    if k_options:
+        number_of_intervals = int(np.median(k_options))  # Usar mediana para robustez
+    else:
+        number_of_intervals = max(5, min(20, k_sturges))  # Valor por defecto seguro
+    
+    # Ajustar si hay muy pocos datos
+    if n < 30:
+        number_of_intervals = min(number_of_intervals, int(np.sqrt(n)))
 
-        # Crear los límites de los intervalos con precisión
-        bins = [min_value + i * interval_size for i in range(number_of_intervals + 1)]
-        bins[-1] = max_value + 0.0001  # Ajuste mínimo para incluir el último valor
+    # Calcular el tamaño del intervalo con precisión
+    interval_size = (max_value - min_value) / number_of_intervals
+    
+    # Redondear el tamaño del intervalo a un valor "limpio" si es apropiado
+    # Esto mejora la legibilidad sin perder precisión
+    magnitude = 10 ** np.floor(np.log10(interval_size))
+    interval_size_rounded = np.ceil(interval_size / magnitude) * magnitude
+    
+    # Recalcular número de intervalos con el tamaño redondeado
+    if interval_size_rounded > 0:
+        number_of_intervals = int(np.ceil((max_value - min_value) / interval_size_rounded))
+        interval_size = interval_size_rounded
 
-        # Crear los intervalos usando pd.cut con precisión
-        intervals = pd.cut(data, bins=bins, right=False, include_lowest=True)
+    # Crear los límites de los intervalos con precisión
+    bins = [min_value + i * interval_size for i in range(number_of_intervals + 1)]
+    bins[-1] = max_value + 0.0001  # Ajuste mínimo para incluir el último valor
+    return bins
 
-        # Calcular frecuencias
-        freq = intervals.value_counts().sort_index()
 
+def frequency_table_from_counts(counts, variable_type, n=None, max_categories=None):
+    """
+    Construye la tabla de frecuencia a partir de las frecuencias absolutas.
+    
+    Permite generar la tabla sin recorrer los datos cuando las frecuencias ya
+    están calculadas (por ejemplo, acumuladas de forma incremental).
+    
+    Args:
+        counts (pd.Series): Frecuencias por valor, categoría o intervalo (índice de
+                            `pd.Interval` en las variables agrupadas)
+        variable_type (str): Tipo de variable
+        n (int): Total de datos (por defecto, la suma de las frecuencias)
+        max_categories (int): Máximo de categorías cualitativas en la tabla
+                              (None = valor de ANALYSIS_CONFIG)
+        
+    Returns:
+        list: Lista de diccionarios con la tabla de frecuencia
+    """
+    if n is None:
+        n = int(counts.sum())
+    
+    frequency_table = []
+    total_frecuencia_absoluta = 0
+    total_frecuencia_relativa = 0
+    total_frecuencia_porcentual = 0
+    frecuencia_acumulada = 0
+
+    if variable_type in ["Cualitativa", "Cuantitativa Discreta"]:
+        if variable_type == "Cualitativa":
+            if max_categories is None:
+                max_categories = ANALYSIS_CONFIG['frequency_max_categories']
+            if len(counts) > max_categories:
+                counts = top_categories(counts, max_categories)
+        for value, count in counts.items():
+            frecuencia_acumulada += count
+            frecuencia_relativa = count / n
+            frecuencia_relativa_acumulada = frecuencia_acumulada / n
+            frequency_table.append({
+                'valor': value,
+                'frecuenciaAbsoluta': count,
+                'frecuenciaRelativa': round(frecuencia_relativa, 4),
+                'frecuenciaPorcentual': round(frecuencia_relativa * 100, 2),
+                'frecuenciaAcumulada': frecuencia_acumulada,
+                'frecuenciaRelativaAcumulada': round(frecuencia_relativa_acumulada, 4),
+                'frecuenciaPorcentualAcumulada': round(frecuencia_relativa_acumulada * 100, 2)
+            })
+            total_frecuencia_absoluta += count
+            total_frecuencia_relativa += frecuencia_relativa
+            total_frecuencia_porcentual += frecuencia_relativa * 100
+
+        # Agregar fila de totales
+        frequency_table.append({
+            'valor': 'Total',
+            'frecuenciaAbsoluta': total_frecuencia_absoluta,
+            'frecuenciaRelativa': round(total_frecuencia_relativa, 4),
+            'frecuenciaPorcentual': round(total_frecuencia_porcentual, 2),
+            'frecuenciaAcumulada': None,
+            'frecuenciaRelativaAcumulada': None,
+            'frecuenciaPorcentualAcumulada': None
+        })
+
+    elif variable_type in ["Cuantitativa Discreta con Intervalos", "Cuantitativa Continua"]:
         # Generar la tabla de frecuencia
-        frecuencia_acumulada = 0
-        for interval, count in freq.items():
+        for interval, count in counts.items():
             frecuencia_acumulada += count
             frecuencia_relativa = count / n
             frecuencia_relativa_acumulada = frecuencia_acumulada / n
@@ -153,18 +447,7 @@ def calculate_frequency_table(data, variable_type):
             total_frecuencia_relativa += frecuencia_relativa
             total_frecuencia_porcentual += frecuencia_relativa * 100
 
-    # Agregar fila de totales
-    if variable_type in ["Cualitativa", "Cuantitativa Discreta"]:
-        frequency_table.append({
-            'valor': 'Total',
-            'frecuenciaAbsoluta': total_frecuencia_absoluta,
-            'frecuenciaRelativa': round(total_frecuencia_relativa, 4),
-            'frecuenciaPorcentual': round(total_frecuencia_porcentual, 2),
-            'frecuenciaAcumulada': None,
-            'frecuenciaRelativaAcumulada': None,
-            'frecuenciaPorcentualAcumulada': None
-        })
-    elif variable_type in ["Cuantitativa Discreta con Intervalos", "Cuantitativa Continua"]:
+        # Agregar fila de totales
         frequency_table.append({
             'Intervalo': 'Total',
             'Marca de Clase': None,
@@ -179,6 +462,7 @@ def calculate_frequency_table(data, variable_type):
     return frequency_table
 
 
+@instrumented()
 def calculate_all_measures_grouped(frequency_table):
     """
     Calcula todas las medidas estadísticas para datos agrupados con métodos precisos.
@@ -340,6 +624,7 @@ def calculate_all_measures_grouped(frequency_table):
     }
 
 
+@instrumented()
 def calculate_quartiles(data, frequency_table, variable_type):
     """
     Calcula los cuartiles (Q1, Q2, Q3) para datos agrupados o no agrupados.
@@ -361,31 +646,24 @@ def calculate_quartiles(data, frequency_table, variable_type):
     if variable_type == "Cuantitativa Discreta":
         try:
             sorted_data = sorted(data.dropna())
-            n = len(sorted_data)
-            
-            q1_pos = (n + 1) * 0.25
-            q2_pos = (n + 1) * 0.5
-            q3_pos = (n + 1) * 0.75
-            
-            def get_percentile(pos):
-                if pos.is_integer():
-                    return sorted_data[int(pos) - 1]
-                else:
-                    lower_pos = int(pos)
-                    fraction = pos - lower_pos
-                    lower_val = sorted_data[lower_pos - 1]
-                    upper_val = sorted_data[lower_pos] if lower_pos < n else sorted_data[lower_pos - 1]
-                    return lower_val + fraction * (upper_val - lower_val)
-            
-            q1 = get_percentile(q1_pos)
-            q2 = get_percentile(q2_pos)
-            q3 = get_percentile(q3_pos)
-            
-            return {'Q1': round(q1, 2), 'Q2': round(q2, 2), 'Q3': round(q3, 2)}
+            return ranked_quartiles(sorted_data.__getitem__, len(sorted_data))
         except Exception as e:
-            st.error(f"Error al calcular cuartiles para datos discretos: {e}")
+            logger.error("Error al calcular cuartiles para datos discretos: %s", e)
             return {'Q1': None, 'Q2': None, 'Q3': None}
 
+    return grouped_quartiles(frequency_table)
+
+
+def grouped_quartiles(frequency_table):
+    """
+    Calcula los cuartiles de datos agrupados por interpolación dentro de los intervalos.
+    
+    Args:
+        frequency_table (list): Tabla de frecuencia con intervalos
+        
+    Returns:
+        dict: Un diccionario con los cuartiles (Q1, Q2, Q3)
+    """
     try:
         intervals = []
         frequencies = []
@@ -412,7 +690,7 @@ def calculate_quartiles(data, frequency_table, variable_type):
                     
                     frequencies.append(row.get('Frecuencia Absoluta', 0))
                 except (ValueError, TypeError, AttributeError) as e:
-                    st.error(f"Error procesando intervalo '{row.get('Intervalo')}': {e}")
+                    logger.error("Error procesando intervalo '%s': %s", row.get('Intervalo'), e)
                     continue
         
         if not intervals or not frequencies:
@@ -450,12 +728,42 @@ def calculate_quartiles(data, frequency_table, variable_type):
         
         return {'Q1': q1, 'Q2': q2, 'Q3': q3}
     except Exception as e:
-        st.error(f"Error al calcular cuartiles para datos agrupados: {e}")
+        logger.error("Error al calcular cuartiles para datos agrupados: %s", e)
         return {'Q1': None, 'Q2': None, 'Q3': None}
 
 
+def ranked_quartiles(value_at, n):
+    """
+    Calcula los cuartiles por la posición (n + 1)p con interpolación lineal.
+    
+    Args:
+        value_at (callable): Función que devuelve el valor en una posición (base 0)
+                             de los datos ordenados
+        n (int): Número de datos
+        
+    Returns:
+        dict: Un diccionario con los cuartiles (Q1, Q2, Q3)
+    """
+    def get_percentile(pos):
+        if pos.is_integer():
+            return value_at(int(pos) - 1)
+        else:
+            lower_pos = int(pos)
+            fraction = pos - lower_pos
+            lower_val = value_at(lower_pos - 1)
+            upper_val = value_at(lower_pos) if lower_pos < n else value_at(lower_pos - 1)
+            return lower_val + fraction * (upper_val - lower_val)
+    
+    q1 = get_percentile((n + 1) * 0.25)
+    q2 = get_percentile((n + 1) * 0.5)
+    q3 = get_percentile((n + 1) * 0.75)
+    
+    return {'Q1': round(q1, 2), 'Q2': round(q2, 2), 'Q3': round(q3, 2)}
+
+
 # ============= NUEVAS FUNCIONALIDADES =============
 
+@instrumented()
 def calculate_correlation_matrix(df, columns=None):
     """
     Calcula la matriz de correlación para variables numéricas.
@@ -478,6 +786,7 @@ def calculate_correlation_matrix(df, columns=None):
     return df[numeric_cols].corr()
 
 
+@instrumented()
 def detect_outliers_iqr(data):
     """
     Detecta valores atípicos usando el método IQR (Rango Intercuartílico).
@@ -509,6 +818,7 @@ def detect_outliers_iqr(data):
     }
 
 
+@instrumented()
 def detect_outliers_zscore(data, threshold=3):
     """
     Detecta valores atípicos usando el método Z-score.
@@ -536,16 +846,182 @@ def detect_outliers_zscore(data, threshold=3):
     }
 
 
-def test_normality(data):
+@instrumented()
+def build_sample_view(data):
+    """
+    Construye una vista ordenada de los datos junto con sus momentos centrales.
+    
+    La vista se calcula una sola vez y la reutilizan el resumen estadístico,
+    las pruebas de normalidad y los gráficos de cuantiles, evitando ordenar
+    y recorrer los datos repetidamente.
+    
+    Args:
+        data (pd.Series): Serie de datos numéricos
+        
+    Returns:
+        dict: Valores ordenados ('sorted'), tamaño ('n'), media ('mean'),
+              desviación estándar muestral ('std'), momento central de orden 2
+              ('m2'), asimetría y curtosis de exceso sin corregir
+              ('skew', 'kurtosis'), mínimo y máximo
+    """
+    values = np.sort(pd.Series(data).dropna().to_numpy(dtype=float))
+    n = len(values)
+    
+    if n == 0:
+        return {'sorted': values, 'n': 0, 'mean': np.nan, 'std': np.nan, 'm2': np.nan,
+                'skew': np.nan, 'kurtosis': np.nan, 'min': np.nan, 'max': np.nan}
+    
+    mean = float(values.mean())
+    deviations = values - mean
+    squared = deviations * deviations
+    m2 = float(squared.mean())
+    m3 = float((squared * deviations).mean())
+    m4 = float((squared * squared).mean())
+    
+    return {
+        'sorted': values,
+        'n': n,
+        'mean': mean,
+        'std': float(np.sqrt(m2 * n / (n - 1))) if n > 1 else np.nan,
+        'm2': m2,
+        'skew': m3 / m2 ** 1.5 if m2 > 0 else np.nan,
+        'kurtosis': m4 / m2 ** 2 - 3 if m2 > 0 else np.nan,
+        'min': float(values[0]),
+        'max': float(values[-1]),
+    }
+
+
+def sorted_quantile(sorted_values, q):
+    """
+    Calcula un cuantil por interpolación lineal (R tipo 7) sobre datos ordenados.
+    
+    Args:
+        sorted_values (np.ndarray): Valores ordenados de menor a mayor
+        q (float): Probabilidad del cuantil (0 a 1)
+        
+    Returns:
+        float: Valor del cuantil
+    """
+    position = q * (len(sorted_values) - 1)
+    lower = int(np.floor(position))
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return float(sorted_values[lower] + fraction * (sorted_values[upper] - sorted_values[lower]))
+
+
+def _normality_result(statistic, p_value, **extra):
+    """Construye el diccionario de resultado de una prueba de normalidad."""
+    result = {
+        'Estadístico': round(float(statistic), 4),
+        'p-valor': round(float(p_value), 4),
+        'Es Normal (α=0.05)': p_value > 0.05,
+        'Interpretación': 'Los datos siguen una distribución normal' if p_value > 0.05
+                         else 'Los datos NO siguen una distribución normal'
+    }
+    result.update(extra)
+    return result
+
+
+def _anderson_darling(view):
+    """
+    Prueba de Anderson-Darling para normalidad con media y varianza estimadas.
+    
+    Usa la vista ordenada (sin volver a ordenar) y el p-valor aproximado de
+    D'Agostino y Stephens (1986) para el estadístico ajustado A²*.
+    """
+    from scipy import stats
+    
+    n = view['n']
+    z = (view['sorted'] - view['mean']) / view['std']
+    i = np.arange(1, n + 1)
+    a2 = -n - np.sum((2 * i - 1) / n * (stats.norm.logcdf(z) + stats.norm.logsf(z[::-1])))
+    a2_star = a2 * (1 + 0.75 / n + 2.25 / n ** 2)
+    
+    if a2_star >= 153:
+        p_value = 0.0  # La aproximación deja de ser monótona; el p-valor es nulo en la práctica
+    elif a2_star >= 0.6:
+        p_value = np.exp(1.2937 - 5.709 * a2_star + 0.0186 * a2_star ** 2)
+    elif a2_star >= 0.34:
+        p_value = np.exp(0.9177 - 4.279 * a2_star - 1.38 * a2_star ** 2)
+    elif a2_star > 0.2:
+        p_value = 1 - np.exp(-8.318 + 42.796 * a2_star - 59.938 * a2_star ** 2)
+    else:
+        p_value = 1 - np.exp(-13.436 + 101.14 * a2_star - 223.73 * a2_star ** 2)
+    
+    return a2, float(np.clip(p_value, 0, 1))
+
+
+def _jarque_bera(view):
+    """Prueba de Jarque-Bera a partir de la asimetría y curtosis de la vista."""
+    from scipy import stats
+    
+    statistic = view['n'] / 6 * (view['skew'] ** 2 + view['kurtosis'] ** 2 / 4)
+    return statistic, float(stats.chi2.sf(statistic, 2))
+
+
+def _kolmogorov_smirnov(view):
+    """Prueba de Kolmogorov-Smirnov contra la normal ajustada, sobre la vista ordenada."""
+    from scipy import stats
+    
+    n = view['n']
+    cdf = stats.norm.cdf(view['sorted'], loc=view['mean'], scale=view['std'])
+    i = np.arange(1, n + 1)
+    statistic = max(np.max(i / n - cdf), np.max(cdf - (i - 1) / n))
+    return statistic, float(stats.kstwobign.sf(statistic * np.sqrt(n)))
+
+
+def _stratified_shapiro(view, sample_size, draws, strata, seed):
+    """
+    Shapiro-Wilk sobre submuestras estratificadas reproducibles.
+    
+    La vista ordenada se divide en `strata` estratos contiguos (por cuantiles)
+    y en cada extracción se toman al azar, sin reemplazo, la misma cantidad de
+    valores de cada estrato, de modo que cada submuestra cubre toda la
+    distribución, incluidas las colas.
+    
+    Returns:
+        tuple: (mediana del estadístico W, mediana del p-valor)
+    """
+    from scipy import stats
+    
+    values = view['sorted']
+    bounds = np.linspace(0, view['n'], strata + 1).astype(np.int64)
+    per_stratum = sample_size // strata
+    rng = np.random.default_rng(seed)
+    
+    statistics, p_values = [], []
+    for _ in range(draws):
+        indices = np.concatenate([
+            start + rng.choice(stop - start, size=per_stratum, replace=False)
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        ])
+        statistic, p_value = stats.shapiro(values[indices])
+        statistics.append(statistic)
+        p_values.append(p_value)
+    
+    return float(np.median(statistics)), float(np.median(p_values))
+
+
+@instrumented()
+def test_normality(data, sample_view=None):
     """
     Realiza pruebas de normalidad sobre los datos.
     
+    Con hasta `shapiro_max_n` valores se aplican Shapiro-Wilk,
+    Kolmogorov-Smirnov y D'Agostino-Pearson. Con más valores se usa el modo
+    de muestras grandes: Anderson-Darling, Jarque-Bera (desde los momentos ya
+    calculados), Shapiro-Wilk sobre submuestras estratificadas repetidas,
+    Kolmogorov-Smirnov y D'Agostino-Pearson.
+    
     Args:
         data (pd.Series): Serie de datos numéricos
+        sample_view (dict): Vista de `build_sample_view` ya calculada (opcional)
         
     Returns:
         dict: Resultados de las pruebas de normalidad
     """
+    from scipy import stats
+    
     data_clean = data.dropna()
     
     if len(data_clean) < 3:
@@ -553,53 +1029,156 @@ def test_normality(data):
             'error': 'Datos insuficientes para realizar pruebas de normalidad (mínimo 3 valores)'
         }
     
+    if sample_view is None:
+        sample_view = build_sample_view(data_clean)
+    
     results = {}
+    max_n = ANALYSIS_CONFIG['shapiro_max_n']
     
-    # Prueba de Shapiro-Wilk (mejor para n < 50)
-    if len(data_clean) <= 5000:
+    if sample_view['n'] <= max_n:
+        # Prueba de Shapiro-Wilk (mejor para n < 50)
         try:
             shapiro_stat, shapiro_p = stats.shapiro(data_clean)
-            results['Shapiro-Wilk'] = {
-                'Estadístico': round(shapiro_stat, 4),
-                'p-valor': round(shapiro_p, 4),
-                'Es Normal (α=0.05)': shapiro_p > 0.05,
-                'Interpretación': 'Los datos siguen una distribución normal' if shapiro_p > 0.05 
-                                 else 'Los datos NO siguen una distribución normal'
-            }
+            results['Shapiro-Wilk'] = _normality_result(shapiro_stat, shapiro_p)
         except Exception as e:
             results['Shapiro-Wilk'] = {'error': str(e)}
-    
-    # Prueba de Kolmogorov-Smirnov
-    try:
-        ks_stat, ks_p = stats.kstest(data_clean, 'norm', args=(data_clean.mean(), data_clean.std()))
-        results['Kolmogorov-Smirnov'] = {
-            'Estadístico': round(ks_stat, 4),
-            'p-valor': round(ks_p, 4),
-            'Es Normal (α=0.05)': ks_p > 0.05,
-            'Interpretación': 'Los datos siguen una distribución normal' if ks_p > 0.05 
-                             else 'Los datos NO siguen una distribución normal'
-        }
-    except Exception as e:
-        results['Kolmogorov-Smirnov'] = {'error': str(e)}
+        
+        # Prueba de Kolmogorov-Smirnov
+        try:
+            ks_stat, ks_p = stats.kstest(data_clean, 'norm', args=(sample_view['mean'], sample_view['std']))
+            results['Kolmogorov-Smirnov'] = _normality_result(ks_stat, ks_p)
+        except Exception as e:
+            results['Kolmogorov-Smirnov'] = {'error': str(e)}
+    else:
+        # Modo de muestras grandes
+        try:
+            ad_stat, ad_p = _anderson_darling(sample_view)
+            results['Anderson-Darling'] = _normality_result(ad_stat, ad_p)
+        except Exception as e:
+            results['Anderson-Darling'] = {'error': str(e)}
+        
+        try:
+            jb_stat, jb_p = _jarque_bera(sample_view)
+            results['Jarque-Bera'] = _normality_result(jb_stat, jb_p)
+        except Exception as e:
+            results['Jarque-Bera'] = {'error': str(e)}
+        
+        try:
+            draws = ANALYSIS_CONFIG['shapiro_subsample_draws']
+            sw_stat, sw_p = _stratified_shapiro(sample_view, max_n, draws,
+                                                ANALYSIS_CONFIG['shapiro_strata'],
+                                                ANALYSIS_CONFIG['random_seed'])
+            results['Shapiro-Wilk (submuestras)'] = _normality_result(
+                sw_stat, sw_p, **{'Tamaño de submuestra': max_n, 'Extracciones': draws}
+            )
+        except Exception as e:
+            results['Shapiro-Wilk (submuestras)'] = {'error': str(e)}
+        
+        try:
+            ks_stat, ks_p = _kolmogorov_smirnov(sample_view)
+            results['Kolmogorov-Smirnov'] = _normality_result(ks_stat, ks_p)
+        except Exception as e:
+            results['Kolmogorov-Smirnov'] = {'error': str(e)}
     
     # Prueba de D'Agostino-Pearson
     if len(data_clean) >= 8:
         try:
             k2_stat, k2_p = stats.normaltest(data_clean)
-            results['D\'Agostino-Pearson'] = {
-                'Estadístico': round(k2_stat, 4),
-                'p-valor': round(k2_p, 4),
-                'Es Normal (α=0.05)': k2_p > 0.05,
-                'Interpretación': 'Los datos siguen una distribución normal' if k2_p > 0.05 
-                                 else 'Los datos NO siguen una distribución normal'
-            }
+            results['D\'Agostino-Pearson'] = _normality_result(k2_stat, k2_p)
         except Exception as e:
             results['D\'Agostino-Pearson'] = {'error': str(e)}
     
     return results
 
 
-def calculate_statistics_summary(data):
+# Resultados de normalidad ya calculados, indexados por la huella de la columna
+_NORMALITY_CACHE = {}
+
+
+def _normality_worker(item):
+    """Ejecuta las pruebas de normalidad de una columna (apto para procesos)."""
+    name, values = item
+    return name, test_normality(pd.Series(values))
+
+
+@instrumented()
+def test_normality_batch(df, columns=None, max_workers=None, fingerprint=None):
+    """
+    Realiza las pruebas de normalidad sobre varias columnas numéricas a la vez.
+    
+    Las columnas se evalúan en paralelo en un pool de procesos y los
+    resultados se guardan en caché según la huella de cada columna, de modo
+    que una columna ya evaluada no se vuelve a calcular. Con la huella del
+    conjunto de datos la clave se obtiene sin recorrer los valores.
+    
+    Args:
+        df (pd.DataFrame): DataFrame con los datos
+        columns (list): Columnas a evaluar (None = todas las numéricas)
+        max_workers (int): Número máximo de procesos (None = automático)
+        fingerprint (str): Huella del conjunto de datos (`src.cache`); sin ella
+                           se usa la huella del contenido de cada columna
+        
+    Returns:
+        pd.DataFrame: Tabla resumen con una fila por columna y prueba
+    """
+    if columns is None:
+        columns = get_numeric_columns(df)
+    
+    results = {}
+    pending = []
+    keys = {}
+    
+    for col in columns:
+        if fingerprint is not None:
+            keys[col] = column_fingerprint(fingerprint, col, 'dropna')
+        else:
+            keys[col] = content_fingerprint(df[col].dropna())
+        if keys[col] in _NORMALITY_CACHE:
+            results[col] = _NORMALITY_CACHE[keys[col]]
+        else:
+            pending.append((col, df[col].dropna().to_numpy(dtype=float)))
+    
+    for col, col_results in run_parallel(_normality_worker, pending, max_workers):
+        results[col] = col_results
+        if len(_NORMALITY_CACHE) >= ANALYSIS_CONFIG['normality_cache_size']:
+            _NORMALITY_CACHE.pop(next(iter(_NORMALITY_CACHE)))
+        _NORMALITY_CACHE[keys[col]] = col_results
+    
+    rows = []
+    for col in columns:
+        col_results = results[col]
+        n = int(df[col].notna().sum())
+        
+        if 'error' in col_results:
+            rows.append({
+                'Variable': col, 'N': n, 'Prueba': None,
+                'Estadístico': None, 'p-valor': None,
+                'Es Normal (α=0.05)': None, 'Observación': col_results['error']
+            })
+            continue
+        
+        for test_name, test_result in col_results.items():
+            if 'error' in test_result:
+                rows.append({
+                    'Variable': col, 'N': n, 'Prueba': test_name,
+                    'Estadístico': None, 'p-valor': None,
+                    'Es Normal (α=0.05)': None, 'Observación': test_result['error']
+                })
+            else:
+                rows.append({
+                    'Variable': col, 'N': n, 'Prueba': test_name,
+                    'Estadístico': test_result['Estadístico'],
+                    'p-valor': test_result['p-valor'],
+                    'Es Normal (α=0.05)': test_result['Es Normal (α=0.05)'],
+                    'Observación': None
+                })
+    
+    return pd.DataFrame(rows, columns=['Variable', 'N', 'Prueba', 'Estadístico', 'p-valor',
+                                       'Es Normal (α=0.05)', 'Observación'])
+
+
+@instrumented()
+def calculate_statistics_summary(data, sample_view=None):
     """
     Calcula un resumen estadístico completo y preciso de los datos usando métodos exactos.
     
@@ -613,171 +1192,206 @@ def calculate_statistics_summary(data):
     - Curtosis: Momento estandarizado de cuarto orden (exceso)
     - Percentiles: Método de interpolación lineal
     
+    Los momentos y cuantiles se obtienen de una única vista ordenada
+    (`build_sample_view`), que puede reutilizarse después en las pruebas de
+    normalidad y los gráficos de cuantiles.
+    
     Args:
         data (pd.Series): Serie de datos
+        sample_view (dict): Vista de `build_sample_view` ya calculada (opcional)
         
     Returns:
         dict: Resumen estadístico completo
     """
+    from scipy import stats
+    
     if pd.api.types.is_numeric_dtype(data):
         data_clean = data.dropna()
         
         if len(data_clean) == 0:
             return {'Error': 'No hay datos válidos'}
         
-        # Calcular media (exacta)
-        media = float(np.mean(data_clean))
-        
-        # Calcular mediana (método de interpolación lineal - más preciso)
-        mediana = float(np.median(data_clean))
-        
-        # Calcular moda(s) - puede haber múltiples
-        moda_series = data_clean.mode()
-        if len(moda_series) > 0:
-            if len(moda_series) == 1:
-                moda = float(moda_series.iloc[0])
-                tipo_moda = "Unimodal"
-            elif len(moda_series) == 2:
-                moda = float(moda_series.iloc[0])  # Primera moda
-                tipo_moda = "Bimodal"
-            else:
-                moda = float(moda_series.iloc[0])  # Primera moda
-                tipo_moda = "Multimodal"
-        else:
-            moda = None
-            tipo_moda = "Sin moda"
-        
-        # Varianza y desviación estándar MUESTRAL (n-1) - más preciso
-        varianza = float(np.var(data_clean, ddof=1))  # ddof=1 para muestral
-        desv_std = float(np.std(data_clean, ddof=1))
-        
-        # Varianza y desviación estándar POBLACIONAL (n) - para referencia
-        varianza_pob = float(np.var(data_clean, ddof=0))
-        desv_std_pob = float(np.std(data_clean, ddof=0))
-        
-        # Coeficiente de variación (en porcentaje)
-        cv = (desv_std / media * 100) if media != 0 else 0
-        
-        # Valores extremos
-        minimo = float(data_clean.min())
-        maximo = float(data_clean.max())
-        rango = maximo - minimo
-        
-        # Cuartiles usando el método exclusivo (R type 7) - más estándar
-        q1 = float(data_clean.quantile(0.25, interpolation='linear'))
-        q2 = mediana  # Q2 es la mediana
-        q3 = float(data_clean.quantile(0.75, interpolation='linear'))
-        iqr = q3 - q1  # Rango intercuartílico
-        
-        # Percentiles adicionales
-        p10 = float(data_clean.quantile(0.10, interpolation='linear'))
-        p90 = float(data_clean.quantile(0.90, interpolation='linear'))
-        
-        # Asimetría (skewness) - método más robusto
-        asimetria = float(stats.skew(data_clean, bias=False))  # bias=False para corrección muestral
-        
-        # Curtosis (kurtosis) - exceso de curtosis (Fisher)
-        curtosis = float(stats.kurtosis(data_clean, bias=False, fisher=True))
-        
-        # Error estándar de la media
-        error_estandar = desv_std / np.sqrt(len(data_clean))
-        
-        # Intervalos de confianza 95% para la media
-        from scipy import stats as sp_stats
-        confianza = 0.95
-        grados_libertad = len(data_clean) - 1
-        t_critico = sp_stats.t.ppf((1 + confianza) / 2, grados_libertad)
-        margen_error = t_critico * error_estandar
-        ic_inferior = media - margen_error
-        ic_superior = media + margen_error
-        
-        # Media armónica (solo para valores positivos)
-        if (data_clean > 0).all():
-            media_armonica = float(stats.hmean(data_clean))
-        else:
-            media_armonica = None
-        
-        # Media geométrica (solo para valores positivos)
-        if (data_clean > 0).all():
-            media_geometrica = float(stats.gmean(data_clean))
-        else:
-            media_geometrica = None
+        if sample_view is None:
+            sample_view = build_sample_view(data_clean)
+        sorted_values = sample_view['sorted']
+        positive = sample_view['min'] > 0
         
-        # Coeficiente de variación de Pearson
-        cv_pearson = (desv_std / media) if media != 0 else None
-        
-        # Interpretación de asimetría
-        if asimetria > 1:
-            interp_asim = "Fuertemente asimétrica positiva (cola derecha)"
-        elif asimetria > 0.5:
-            interp_asim = "Moderadamente asimétrica positiva"
-        elif asimetria > -0.5:
-            interp_asim = "Aproximadamente simétrica"
-        elif asimetria > -1:
-            interp_asim = "Moderadamente asimétrica negativa"
-        else:
-            interp_asim = "Fuertemente asimétrica negativa (cola izquierda)"
-        
-        # Interpretación de curtosis
-        if curtosis > 1:
-            interp_curt = "Leptocúrtica (más puntiaguda que normal)"
-        elif curtosis < -1:
-            interp_curt = "Platicúrtica (más plana que normal)"
-        else:
-            interp_curt = "Mesocúrtica (similar a normal)"
-        
-        return {
-            # Medidas de tendencia central
-            'N (tamaño)': len(data_clean),
-            'Media': round(media, 4),
-            'Mediana': round(mediana, 4),
-            'Moda': round(moda, 4) if moda is not None else 'Sin moda',
-            'Tipo de Moda': tipo_moda,
-            'Media Armónica': round(media_armonica, 4) if media_armonica is not None else 'N/A (valores ≤ 0)',
-            'Media Geométrica': round(media_geometrica, 4) if media_geometrica is not None else 'N/A (valores ≤ 0)',
-            
-            # Medidas de dispersión
-            'Varianza Muestral': round(varianza, 4),
-            'Desviación Estándar Muestral': round(desv_std, 4),
-            'Varianza Poblacional': round(varianza_pob, 4),
-            'Desviación Estándar Poblacional': round(desv_std_pob, 4),
-            'Coeficiente de Variación (%)': round(cv, 2),
-            'Error Estándar': round(error_estandar, 4),
-            
-            # Valores extremos y rango
-            'Mínimo': round(minimo, 4),
-            'Máximo': round(maximo, 4),
-            'Rango': round(rango, 4),
-            
-            # Cuartiles y percentiles
-            'Q1 (Percentil 25)': round(q1, 4),
-            'Q2 (Mediana/Percentil 50)': round(q2, 4),
-            'Q3 (Percentil 75)': round(q3, 4),
-            'Rango Intercuartílico (IQR)': round(iqr, 4),
-            'Percentil 10': round(p10, 4),
-            'Percentil 90': round(p90, 4),
-            
-            # Forma de la distribución
-            'Asimetría (Skewness)': round(asimetria, 4),
-            'Interpretación Asimetría': interp_asim,
-            'Curtosis (Exceso)': round(curtosis, 4),
-            'Interpretación Curtosis': interp_curt,
-            
-            # Intervalo de confianza
-            'IC 95% Inferior': round(ic_inferior, 4),
-            'IC 95% Superior': round(ic_superior, 4),
-            'Margen de Error (95%)': round(margen_error, 4)
-        }
+        return summary_from_view(
+            sample_view,
+            quantile=lambda q: sorted_quantile(sorted_values, q),
+            modes=data_clean.mode(),
+            # Medias armónica y geométrica (solo para valores positivos)
+            harmonic_mean=float(stats.hmean(sorted_values)) if positive else None,
+            geometric_mean=float(stats.gmean(sorted_values)) if positive else None
+        )
     else:
-        # Para variables cualitativas
-        mode_value = data.mode()[0] if not data.mode().empty else None
-        value_counts = data.value_counts()
+        # Para variables cualitativas: una sola pasada sobre los códigos enteros
+        measures = qualitative_measures(data)
         
         return {
             'N (tamaño)': len(data),
-            'Valores Únicos': data.nunique(),
-            'Moda': mode_value,
-            'Frecuencia de la Moda': value_counts.iloc[0] if not value_counts.empty else 0,
-            'Proporción de la Moda': round(value_counts.iloc[0] / len(data), 4) if not value_counts.empty else 0,
-            'Entropía': round(-sum((value_counts/len(data)) * np.log2(value_counts/len(data))), 4)
+            'Valores Únicos': measures['Valores Únicos'],
+            'Moda': measures['Moda'],
+            'Frecuencia de la Moda': measures['Frecuencia de la Moda'],
+            'Proporción de la Moda': measures['Proporción de la Moda'],
+            'Entropía': measures['Entropía']
         }
+
+
+def summary_from_view(sample_view, quantile, modes, harmonic_mean=None, geometric_mean=None):
+    """
+    Calcula el resumen estadístico de una variable numérica a partir de sus momentos.
+    
+    Separa las fórmulas del resumen del origen de los datos: la vista puede
+    venir de `build_sample_view` o de un estado acumulado de forma incremental.
+    
+    Args:
+        sample_view (dict): Tamaño ('n'), media ('mean'), momento central de orden 2
+                            ('m2'), asimetría y curtosis sin corregir ('skew',
+                            'kurtosis'), mínimo ('min') y máximo ('max')
+        quantile (callable): Función que devuelve el cuantil (R tipo 7) de una probabilidad
+        modes (list): Valor o valores más frecuentes, de menor a mayor
+        harmonic_mean (float): Media armónica (None si hay valores ≤ 0)
+        geometric_mean (float): Media geométrica (None si hay valores ≤ 0)
+        
+    Returns:
+        dict: Resumen estadístico completo
+    """
+    n = sample_view['n']
+    
+    # Calcular media (exacta)
+    media = sample_view['mean']
+    
+    # Calcular mediana (método de interpolación lineal - más preciso)
+    mediana = quantile(0.5)
+    
+    # Calcular moda(s) - puede haber múltiples
+    moda_series = pd.Series(modes)
+    if len(moda_series) > 0:
+        if len(moda_series) == 1:
+            moda = float(moda_series.iloc[0])
+            tipo_moda = "Unimodal"
+        elif len(moda_series) == 2:
+            moda = float(moda_series.iloc[0])  # Primera moda
+            tipo_moda = "Bimodal"
+        else:
+            moda = float(moda_series.iloc[0])  # Primera moda
+            tipo_moda = "Multimodal"
+    else:
+        moda = None
+        tipo_moda = "Sin moda"
+    
+    # Varianza y desviación estándar MUESTRAL (n-1) - más preciso
+    varianza = sample_view['m2'] * n / (n - 1) if n > 1 else np.nan  # ddof=1 para muestral
+    desv_std = float(np.sqrt(varianza))
+    
+    # Varianza y desviación estándar POBLACIONAL (n) - para referencia
+    varianza_pob = sample_view['m2']
+    desv_std_pob = float(np.sqrt(varianza_pob))
+    
+    # Coeficiente de variación (en porcentaje)
+    cv = (desv_std / media * 100) if media != 0 else 0
+    
+    # Valores extremos
+    minimo = sample_view['min']
+    maximo = sample_view['max']
+    rango = maximo - minimo
+    
+    # Cuartiles usando el método exclusivo (R type 7) - más estándar
+    q1 = quantile(0.25)
+    q2 = mediana  # Q2 es la mediana
+    q3 = quantile(0.75)
+    iqr = q3 - q1  # Rango intercuartílico
+    
+    # Percentiles adicionales
+    p10 = quantile(0.10)
+    p90 = quantile(0.90)
+    
+    # Asimetría (skewness) con corrección muestral (equivalente a bias=False)
+    g1 = sample_view['skew']
+    asimetria = float(g1 * np.sqrt(n * (n - 1)) / (n - 2)) if n > 2 else float(g1)
+    
+    # Curtosis (kurtosis) - exceso de curtosis (Fisher) con corrección muestral
+    g2 = sample_view['kurtosis']
+    curtosis = float(((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3))) if n > 3 else float(g2)
+    
+    # Error estándar de la media
+    error_estandar = desv_std / np.sqrt(n)
+    
+    # Intervalos de confianza 95% para la media
+    from scipy import stats as sp_stats
+    confianza = 0.95
+    grados_libertad = n - 1
+    t_critico = sp_stats.t.ppf((1 + confianza) / 2, grados_libertad)
+    margen_error = t_critico * error_estandar
+    ic_inferior = media - margen_error
+    ic_superior = media + margen_error
+    
+    media_armonica = harmonic_mean
+    media_geometrica = geometric_mean
+    
+    # Coeficiente de variación de Pearson
+    cv_pearson = (desv_std / media) if media != 0 else None
+    
+    # Interpretación de asimetría
+    if asimetria > 1:
+        interp_asim = "Fuertemente asimétrica positiva (cola derecha)"
+    elif asimetria > 0.5:
+        interp_asim = "Moderadamente asimétrica positiva"
+    elif asimetria > -0.5:
+        interp_asim = "Aproximadamente simétrica"
+    elif asimetria > -1:
+        interp_asim = "Moderadamente asimétrica negativa"
+    else:
+        interp_asim = "Fuertemente asimétrica negativa (cola izquierda)"
+    
+    # Interpretación de curtosis
+    if curtosis > 1:
+        interp_curt = "Leptocúrtica (más puntiaguda que normal)"
+    elif curtosis < -1:
+        interp_curt = "Platicúrtica (más plana que normal)"
+    else:
+        interp_curt = "Mesocúrtica (similar a normal)"
+    
+    return {
+        # Medidas de tendencia central
+        'N (tamaño)': n,
+        'Media': round(media, 4),
+        'Mediana': round(mediana, 4),
+        'Moda': round(moda, 4) if moda is not None else 'Sin moda',
+        'Tipo de Moda': tipo_moda,
+        'Media Armónica': round(media_armonica, 4) if media_armonica is not None else 'N/A (valores ≤ 0)',
+        'Media Geométrica': round(media_geometrica, 4) if media_geometrica is not None else 'N/A (valores ≤ 0)',
+        
+        # Medidas de dispersión
+        'Varianza Muestral': round(varianza, 4),
+        'Desviación Estándar Muestral': round(desv_std, 4),
+        'Varianza Poblacional': round(varianza_pob, 4),
+        'Desviación Estándar Poblacional': round(desv_std_pob, 4),
+        'Coeficiente de Variación (%)': round(cv, 2),
+        'Error Estándar': round(error_estandar, 4),
+        
+        # Valores extremos y rango
+        'Mínimo': round(minimo, 4),
+        'Máximo': round(maximo, 4),
+        'Rango': round(rango, 4),
+        
+        # Cuartiles y percentiles
+        'Q1 (Percentil 25)': round(q1, 4),
+        'Q2 (Mediana/Percentil 50)': round(q2, 4),
+        'Q3 (Percentil 75)': round(q3, 4),
+        'Rango Intercuartílico (IQR)': round(iqr, 4),
+        'Percentil 10': round(p10, 4),
+        'Percentil 90': round(p90, 4),
+        
+        # Forma de la distribución
+        'Asimetría (Skewness)': round(asimetria, 4),
+        'Interpretación Asimetría': interp_asim,
+        'Curtosis (Exceso)': round(curtosis, 4),
+        'Interpretación Curtosis': interp_curt,
+        
+        # Intervalo de confianza
+        'IC 95% Inferior': round(ic_inferior, 4),
+        'IC 95% Superior': round(ic_superior, 4),
+        'Margen de Error (95%)': round(margen_error, 4)
+    }
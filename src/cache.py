@@ -0,0 +1,105 @@
+"""
+Huellas de datos para indexar las cachés.
+
+La huella de un archivo se calcula una sola vez a partir de sus bytes; las
+huellas de los conjuntos de datos, columnas y transformaciones se derivan de
+ella combinando la huella de origen con la descripción del paso aplicado
+(opciones de lectura, nombre de la columna, método de imputación...). Así las
+búsquedas en caché son O(1) en cada recarga, sin volver a hashear los datos.
+"""
+import hashlib
+import pandas as pd
+
+
+def fingerprint_bytes(content):
+    """
+    Calcula la huella del contenido de un archivo.
+    
+    Args:
+        content (bytes): Contenido del archivo
+    
+    Returns:
+        str: Huella hexadecimal
+    """
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def derive_fingerprint(parent, *steps):
+    """
+    Deriva una huella a partir de otra y de los pasos aplicados sobre los datos.
+    
+    Args:
+        parent (str): Huella de origen
+        *steps: Descripción de cada paso (valores con `repr` estable: str, números,
+                tuplas, listas, diccionarios, None)
+    
+    Returns:
+        str: Huella hexadecimal derivada
+    """
+    history = repr((parent,) + tuple(_stable(step) for step in steps))
+    return hashlib.blake2b(history.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def column_fingerprint(dataset_fingerprint, column, *history):
+    """
+    Huella de una columna de un conjunto de datos con su historial de transformaciones.
+    
+    Args:
+        dataset_fingerprint (str): Huella del conjunto de datos
+        column (str): Nombre de la columna
+        *history: Transformaciones aplicadas a la columna, en orden
+    
+    Returns:
+        str: Huella hexadecimal de la columna
+    """
+    return derive_fingerprint(dataset_fingerprint, 'columna', column, *history)
+
+
+def content_fingerprint(data):
+    """
+    Calcula una huella del contenido de una serie (independiente del nombre).
+    
+    Recorre todos los valores: se usa solo cuando no se dispone de la huella
+    del conjunto de datos de origen.
+    
+    Args:
+        data (pd.Series): Serie de datos
+    
+    Returns:
+        str: Huella hexadecimal del contenido
+    """
+    hashes = pd.util.hash_pandas_object(data, index=False).to_numpy()
+    return hashlib.blake2b(hashes.tobytes(), digest_size=16).hexdigest()
+
+
+def cached_result(cache, key, compute, max_size):
+    """
+    Devuelve el resultado en caché para `key` o lo calcula y lo guarda.
+    
+    Cuando la caché alcanza `max_size` entradas se descarta la más antigua.
+    
+    Args:
+        cache (dict): Diccionario que actúa como caché
+        key: Clave (normalmente una huella)
+        compute (callable): Función sin argumentos que calcula el resultado
+        max_size (int): Número máximo de entradas
+    
+    Returns:
+        Resultado en caché o recién calculado
+    """
+    if key not in cache:
+        if len(cache) >= max_size:
+            cache.pop(next(iter(cache)))
+        cache[key] = compute()
+    return cache[key]
+
+
+def _stable(value):
+    """Convierte listas, conjuntos y diccionarios en tuplas con orden estable."""
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _stable(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_stable(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(repr(v) for v in value))
+    return value
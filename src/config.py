@@ -15,9 +15,20 @@ FILE_CONFIG = {
     "allowed_extensions": ["csv", "xlsx", "txt"],
     "max_file_size_mb": 200,
     "default_encoding": "utf-8",
-    "encodings": ["utf-8", "latin-1", "ISO-8859-1"],
+    "encodings": ["utf-8", "latin-1", "ISO-8859-1", "utf-16"],
     "separators": [",", ";", "\t", "|", " "],
     "decimals": [".", ","],
+    "source_column": "Origen",  # Columna con el archivo/hoja de origen al combinar
+    "sniff_sample_kb": 256,  # Bytes iniciales inspeccionados para detectar el formato
+    "sniff_max_lines": 200,
+    "load_modes": ["Completo", "Solo columnas seleccionadas"],
+    "csv_engines": {"Pandas (C)": "c", "Arrow (multihilo)": "pyarrow"},
+    "projected_default_columns": 5,  # Columnas precargadas en el modo por columnas
+    "dtype_sample_rows": 1000,  # Filas leídas para inferir tipos compactos
+    "category_max_ratio": 0.5,  # Texto con menos valores únicos que esta fracción → category
+    "column_cache_files": 4,  # Archivos con columnas en memoria (modo por columnas)
+    "load_cache_entries": 8,  # Archivos cargados conservados en memoria
+    "preview_rows": 10,  # Filas de la vista previa de datos
 }
 
 # Configuración de visualización
@@ -32,7 +43,13 @@ VISUALIZATION_CONFIG = {
     "figure_size": (10, 6),
     "dpi": 300,
     "max_categories_pie": 10,
-    "max_categories_bar": 15,
+    "qq_max_points": 1000,  # Cuantiles graficados en el gráfico Q-Q
+    "qq_tail_points": 50,  # Cuantiles exactos conservados en cada cola
+    "distribution_max_bins": 100,
+    "figure_formats": {"Vectorial (SVG)": "svg", "Imagen (PNG)": "png"},  # Formato de los gráficos en PDF y HTML
+    "vector_max_elements": 5000,  # Puntos o vértices por encima de los cuales un gráfico se exporta como PNG
+    "interactive_max_points": 5000,  # Puntos por traza de los gráficos interactivos incrustados en informes
+    "interactive_seed": 42,
 }
 
 # Configuración de análisis estadístico
@@ -40,6 +57,89 @@ ANALYSIS_CONFIG = {
     "min_data_points": 4,
     "max_intervals": 20,
     "confidence_level": 0.95,
+    "parallel_workers": None,  # None = usar todos los núcleos disponibles
+    "parallel_min_items": 4,  # Por debajo de este número se procesa en serie
+    "normality_cache_size": 256,
+    "imputation_cache_size": 32,
+    "imputation_methods": [
+        "Eliminar", "Reemplazar por la media", "Reemplazar por la mediana", "Reemplazar por cero",
+        "Media por grupo", "Mediana por grupo", "Propagar hacia adelante", "Propagar hacia atrás",
+        "Interpolación lineal", "K vecinos más cercanos",
+    ],
+    # Métodos del informe de varias columnas: se aplican con las mismas opciones a todas las columnas
+    "batch_imputation_methods": [
+        "Eliminar", "Reemplazar por la media", "Reemplazar por la mediana", "Reemplazar por cero",
+        "Media por grupo", "Mediana por grupo", "Propagar hacia adelante", "Propagar hacia atrás",
+        "Interpolación lineal",
+    ],
+    "knn_neighbors": 5,
+    "knn_max_reference": 200000,  # Filas de referencia máximas en el índice de vecinos
+    "knn_query_chunk": 10000,  # Filas imputadas por bloque de consultas
+    "shapiro_max_n": 5000,  # Por encima se usa el modo de muestras grandes
+    "shapiro_subsample_draws": 10,
+    "shapiro_strata": 10,  # Estratos por cuantiles para las submuestras
+    "random_seed": 42,
+    "frequency_max_categories": 50,  # Por encima: categorías más frecuentes + "Otros"
+    "other_category_label": "Otros",
+    "bin_modes": ["Automáticos", "Fijos guardados", "Personalizados"],
+    "max_extra_intervals": 1000,  # Intervalos que se pueden añadir a unos límites fijos para cubrir los datos
+    "incremental_max_distinct": 1000000,  # Por encima: esquema de cuantiles aproximado
+    "sketch_relative_accuracy": 0.01,  # Error relativo máximo de los cuantiles aproximados
+    "summary_session_columns": 2,  # Columnas reconstruidas desde el resumen conservadas por sesión
+}
+
+# Almacén persistente de resultados de análisis
+STORE_CONFIG = {
+    "path": ".cache/resultados.sqlite",
+    "version": 1,  # Cambiar invalida los resultados guardados con un formato anterior
+    "max_entries": 500,
+    "session_entries": 16,  # Resultados conservados en memoria por sesión
+    "timeout": 5,  # Segundos de espera si otra sesión está escribiendo
+}
+
+# Instrumentación de etapas (src/instrumentation.py)
+INSTRUMENTATION_CONFIG = {
+    "enabled": False,
+    "log_path": ".cache/tiempos.log",
+    "max_records": 500,  # Registros conservados por ejecución
+    "metrics_port": None,  # Puerto para exponer /metrics en formato Prometheus (None: desactivado)
+}
+
+# Perfilado de ejecuciones (src/profiling.py)
+PROFILING_CONFIG = {
+    "text_limit": 40,  # Funciones mostradas en el resumen en texto
+    "flame_min_fraction": 0.005,  # Ramas del gráfico de llama por debajo del 0,5% del total se omiten
+    "flame_max_depth": 40,
+    "pyinstrument_interval": 0.001,  # Segundos entre muestras de pyinstrument
+}
+
+# Exportación de resultados (src/export.py)
+EXPORT_CONFIG = {
+    "excel_chunk_rows": 50000,  # Filas de la hoja de datos convertidas por bloque
+    "excel_max_rows": 1048576,  # Límite de filas por hoja de Excel
+    "excel_image_size": (640, 384),  # Ancho y alto de los gráficos en píxeles
+    "excel_image_rows": 21,  # Filas ocupadas por cada gráfico en la hoja 'Gráficos'
+    "pdf_max_columns": 6,  # Columnas por tabla en el PDF (las demás siguen en otra tabla)
+    "pdf_table_chunk_rows": 200,  # Filas por bloque de tabla en el PDF (par para alternar bien los colores)
+    "r_inline_max_values": 10000,  # Por encima, el código R se descarga en un ZIP con los datos en CSV
+    "r_data_file": "datos.csv",
+    "session_downloads": 4,  # Archivos generados a petición conservados por sesión
+}
+
+# Benchmark de rendimiento (benchmark.py)
+BENCHMARK_CONFIG = {
+    "sizes": [1000, 10000, 100000],  # Tamaños por defecto (--full usa hasta 10⁷ filas)
+    "full_sizes": [1000, 10000, 100000, 1000000, 10000000],
+    "baseline": "benchmark_baseline.json",
+    "repeat": 3,  # Repeticiones por medición (se toma el mínimo)
+    "large_size": 1000000,  # Desde este tamaño se mide una sola vez
+    "figure_max_rows": 1000000,  # Gráficos y exportaciones solo hasta este tamaño
+    "time_tolerance": 0.25,  # Regresión si es más de un 25% más lento...
+    "min_time_delta": 0.01,  # ...y la diferencia supera 10 ms
+    "memory_tolerance": 0.25,
+    "min_memory_delta": 1024 * 1024,  # 1 MB
+    "seed": 42,
+    "import_budget_s": 3.0,  # Tiempo máximo de importación de los módulos de src (test_import_time.py)
 }
 
 # Estilos CSS personalizados
@@ -3,53 +3,148 @@ Módulo de exportación de resultados.
 Contiene funciones para exportar a Excel, PDF, HTML y código R.
 """
 import pandas as pd
+import numpy as np
 import io
-from datetime import datetime
-from openpyxl import Workbook
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, KeepTogether
+from datetime import date, datetime
 import base64
-from src.visualization import save_plot_for_pdf
+import importlib.util
+import re
+import zipfile
+from html import escape as html_escape
+from src.config import EXPORT_CONFIG, VISUALIZATION_CONFIG
+from src.visualization import downsample_interactive_figure, figure_to_svg
+from src.instrumentation import instrumented
 
+# svglib es opcional: sin él, los gráficos del PDF se incrustan como PNG
+_SVGLIB = importlib.util.find_spec('svglib') is not None
 
-def export_to_excel(frequency_table, measures, quartiles, graphs, selected_items, filename="Resultados.xlsx"):
+
+@instrumented()
+def export_to_excel(frequency_table, measures, quartiles, graphs, selected_items, filename="Resultados.xlsx", data=None):
     """
     Exporta los resultados a un archivo Excel.
     
+    El libro se escribe en modo de solo escritura de openpyxl: las filas se
+    vuelcan a disco según se añaden, sin mantener el modelo de celdas en
+    memoria, de modo que las tablas de alta cardinalidad y la hoja de datos
+    no multiplican el uso de memoria.
+    
     Args:
         frequency_table (list): Tabla de frecuencia
         measures (dict): Medidas estadísticas
         quartiles (dict): Cuartiles
-        graphs: Gráficos (no se incluyen en Excel)
-        selected_items (list): Items seleccionados para exportar
+        graphs (list): Gráficos (bytes PNG, diccionario con 'png' y 'svg' o Figure de matplotlib), en la hoja 'Gráficos'
+        selected_items (list): Items seleccionados para exportar ('datos' añade la columna analizada)
         filename (str): Nombre del archivo
+        data (pd.Series): Columna analizada ya limpia (para la hoja 'Datos')
         
     Returns:
         io.BytesIO: Buffer con el archivo Excel
     """
-    output = io.BytesIO()
+    # openpyxl se importa al exportar, no al cargar el módulo
+    from openpyxl import Workbook
+    from openpyxl.drawing.image import Image as ExcelImage
     
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        if 'tabla_frecuencia' in selected_items and frequency_table:
-            pd.DataFrame(frequency_table).to_excel(writer, sheet_name='Tabla de Frecuencia', index=False)
-        
-        if 'medidas_resumen' in selected_items and measures:
-            pd.DataFrame(list(measures.items()), columns=['Medida', 'Valor']).to_excel(
-                writer, sheet_name='Medidas de Resumen', index=False
-            )
-        
-        if 'cuartiles' in selected_items and quartiles and any(v is not None for v in quartiles.values()):
-            pd.DataFrame(list(quartiles.items()), columns=['Cuartil', 'Valor']).to_excel(
-                writer, sheet_name='Cuartiles', index=False
-            )
+    workbook = Workbook(write_only=True)
+    
+    if 'tabla_frecuencia' in selected_items and frequency_table:
+        columns = list(frequency_table[0].keys())
+        sheet = _excel_sheet(workbook, 'Tabla de Frecuencia', columns)
+        for row in frequency_table:
+            sheet.append([_excel_value(row.get(column)) for column in columns])
+    
+    if 'medidas_resumen' in selected_items and measures:
+        sheet = _excel_sheet(workbook, 'Medidas de Resumen', ['Medida', 'Valor'])
+        for measure, value in measures.items():
+            sheet.append([measure, _excel_value(value)])
     
+    if 'cuartiles' in selected_items and quartiles and any(v is not None for v in quartiles.values()):
+        sheet = _excel_sheet(workbook, 'Cuartiles', ['Cuartil', 'Valor'])
+        for quartile, value in quartiles.items():
+            sheet.append([quartile, _excel_value(value)])
+    
+    if 'datos' in selected_items and data is not None and len(data):
+        _write_data_sheets(workbook, data)
+    
+    if 'graficos' in selected_items and graphs:
+        images = [graph for graph in graphs if graph is not None]
+        if images:
+            sheet = workbook.create_sheet('Gráficos')
+            for i, graph in enumerate(images):
+                image = ExcelImage(io.BytesIO(_figure_png(graph, VISUALIZATION_CONFIG['dpi'])))
+                image.width, image.height = EXPORT_CONFIG['excel_image_size']
+                image.anchor = f"A{1 + i * EXPORT_CONFIG['excel_image_rows']}"
+                sheet.add_image(image)
+    
+    # Un libro sin hojas no se puede guardar
+    if not workbook.worksheets:
+        workbook.create_sheet('Resultados')
+    
+    output = io.BytesIO()
+    workbook.save(output)
     output.seek(0)
     return output
 
 
-def export_to_pdf(df, selected_column, variable_type, frequency_table, measures, quartiles, figs, selected_items, filename="Resultados.pdf"):
+def _excel_sheet(workbook, title, columns):
+    """Crea una hoja de solo escritura con la fila de encabezados en negrita."""
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    
+    sheet = workbook.create_sheet(title)
+    header = []
+    for column in columns:
+        cell = WriteOnlyCell(sheet, value=str(column))
+        cell.font = Font(bold=True)
+        header.append(cell)
+    sheet.append(header)
+    return sheet
+
+
+def _write_data_sheets(workbook, data):
+    """
+    Escribe la columna analizada por bloques, repartida en varias hojas si
+    supera el máximo de filas de Excel.
+    """
+    name = str(data.name) if data.name is not None else 'Valor'
+    chunk_rows = EXPORT_CONFIG['excel_chunk_rows']
+    # La primera fila de cada hoja es el encabezado
+    sheet_rows = EXPORT_CONFIG['excel_max_rows'] - 1
+    
+    for sheet_index, sheet_start in enumerate(range(0, len(data), sheet_rows)):
+        title = 'Datos' if sheet_index == 0 else f'Datos ({sheet_index + 1})'
+        sheet = _excel_sheet(workbook, title, [name])
+        sheet_end = min(sheet_start + sheet_rows, len(data))
+        for start in range(sheet_start, sheet_end, chunk_rows):
+            chunk = data.iloc[start:min(start + chunk_rows, sheet_end)]
+            if chunk.hasnans:
+                chunk = chunk.astype(object).where(chunk.notna(), None)
+            for value in chunk.tolist():
+                sheet.append([_excel_value(value)])
+
+
+def _excel_value(value):
+    """Convierte un valor a un tipo que openpyxl pueda escribir (NaN y tipos no admitidos)."""
+    if isinstance(value, (np.datetime64, np.timedelta64)):
+        value = pd.Timestamp(value) if isinstance(value, np.datetime64) else pd.Timedelta(value)
+    elif isinstance(value, np.generic):
+        value = value.item()
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, (str, bool, int)):
+        return value
+    if isinstance(value, float):
+        return None if value != value else value
+    if isinstance(value, pd.Timestamp):
+        return value.tz_localize(None).to_pydatetime() if value.tzinfo else value.to_pydatetime()
+    if isinstance(value, (datetime, date)):
+        return value
+    return str(value)
+
+
+@instrumented()
+def export_to_pdf(df, selected_column, variable_type, frequency_table, measures, quartiles, figs, selected_items, filename="Resultados.pdf",
+                  figure_format="png"):
     """
     Exporta los resultados a un archivo PDF.
     
@@ -60,15 +155,49 @@ def export_to_pdf(df, selected_column, variable_type, frequency_table, measures,
         frequency_table (list): Tabla de frecuencia
         measures (dict): Medidas estadísticas
         quartiles (dict): Cuartiles
-        figs (list): Lista de figuras
+        figs (list): Lista de figuras (Figure de matplotlib, bytes PNG o diccionario con 'png' y 'svg')
         selected_items (list): Items seleccionados para exportar
         filename (str): Nombre del archivo
+        figure_format (str): 'svg' para dibujar los gráficos como vectores (requiere svglib) o 'png'
         
     Returns:
         io.BytesIO: Buffer con el archivo PDF
     """
+    # reportlab se importa al exportar, no al cargar el módulo
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.platypus import SimpleDocTemplate
+    
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=landscape(letter), rightMargin=36, leftMargin=36, topMargin=36, bottomMargin=18)
+    doc.build(_pdf_elements(
+        len(df[selected_column].dropna()), selected_column, variable_type, frequency_table, measures, quartiles,
+        figs, selected_items, figure_format
+    ))
+    buffer.seek(0)
+    return buffer
+
+
+def _pdf_elements(n, selected_column, variable_type, frequency_table, measures, quartiles, figs, selected_items, figure_format):
+    """
+    Construye los elementos del PDF de una columna (título, tablas y gráficos).
+    
+    Args:
+        n (int): Número de observaciones
+        selected_column (str): Columna analizada
+        variable_type (str): Tipo de variable
+        frequency_table (list): Tabla de frecuencia
+        measures (dict): Medidas estadísticas
+        quartiles (dict): Cuartiles
+        figs (list): Lista de figuras
+        selected_items (list): Items seleccionados para exportar
+        figure_format (str): 'svg' o 'png'
+        
+    Returns:
+        list: Elementos de reportlab
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Table, TableStyle, Paragraph, Spacer, Image, KeepTogether
     
     styles = getSampleStyleSheet()
     title_style = styles["Heading1"]
@@ -102,46 +231,33 @@ def export_to_pdf(df, selected_column, variable_type, frequency_table, measures,
     elements.append(Spacer(1, 12))
     elements.append(Paragraph(f"Fecha: {datetime.now().strftime('%d/%m/%Y %H:%M')}", normal_style))
     elements.append(Paragraph(f"Tipo de variable: {variable_type}", normal_style))
-    elements.append(Paragraph(f"Número de observaciones: {len(df[selected_column].dropna())}", normal_style))
+    elements.append(Paragraph(f"Número de observaciones: {n}", normal_style))
     elements.append(Spacer(1, 12))
     
     # Tabla de frecuencia
     if 'tabla_frecuencia' in selected_items and frequency_table:
         elements.append(Paragraph("Tabla de Frecuencia", subtitle_style))
         
-        frequency_df = pd.DataFrame(frequency_table)
-        all_columns = frequency_df.columns.tolist()
-        max_cols_per_table = 6
+        all_columns = list(frequency_table[0].keys())
+        # La columna de valores (o la primera) se repite en cada grupo de columnas para identificar las filas
+        key_column = 'valor' if 'valor' in all_columns else all_columns[0]
+        other_columns = [column for column in all_columns if column != key_column]
+        group_size = EXPORT_CONFIG['pdf_max_columns'] - 1
+        column_groups = [[key_column] + other_columns[i:i + group_size]
+                         for i in range(0, max(len(other_columns), 1), group_size)]
         
-        column_groups = [all_columns[i:i + max_cols_per_table] 
-                         for i in range(0, len(all_columns), max_cols_per_table)]
+        # Celdas como texto por columna, una sola vez para todos los grupos
+        cells = {column: ['' if row.get(column) is None else str(row.get(column)) for row in frequency_table]
+                 for column in all_columns}
         
-        for group_idx, col_group in enumerate(column_groups):
+        for group_idx, selected_cols in enumerate(column_groups):
             if group_idx > 0:
                 elements.append(Paragraph(f"Tabla de Frecuencia (continuación {group_idx+1})", subtitle_style))
             
-            if 'valor' in frequency_df.columns and 'valor' not in col_group:
-                selected_cols = ['valor'] + col_group
-            elif group_idx > 0:
-                first_col = all_columns[0]
-                selected_cols = [first_col] + col_group
-                if first_col in col_group:
-                    selected_cols.remove(first_col)
-            else:
-                selected_cols = col_group
-            
-            partial_df = frequency_df[selected_cols]
-            
-            if len(partial_df) > 40:
-                partial_df = pd.concat([partial_df.head(20), partial_df.tail(20)])
-                elements.append(Paragraph("(Se muestran las primeras y últimas 20 filas)", normal_style))
-            
-            data = [partial_df.columns.tolist()] + partial_df.values.tolist()
+            rows = [list(row) for row in zip(*(cells[column] for column in selected_cols))]
             col_widths = [min(80, 500/len(selected_cols)) for _ in selected_cols]
-            table = Table(data, colWidths=col_widths)
-            table.setStyle(table_style)
-            
-            elements.append(KeepTogether([table, Spacer(1, 12)]))
+            elements.extend(_pdf_long_tables([str(column) for column in selected_cols], rows, col_widths, table_style))
+            elements.append(Spacer(1, 12))
     
     # Medidas de resumen
     if 'medidas_resumen' in selected_items and measures:
@@ -183,19 +299,97 @@ def export_to_pdf(df, selected_column, variable_type, frequency_table, measures,
     if 'graficos' in selected_items and figs:
         elements.append(Paragraph("Visualizaciones", subtitle_style))
         
-        for i, fig in enumerate(figs):
+        for fig in figs:
             if fig is not None:
-                img_buf = save_plot_for_pdf(fig, f"graph_{i}")
-                img = Image(img_buf, width=500, height=300)
-                elements.append(img)
+                drawing = _svg_drawing(_figure_svg(fig), 500) if figure_format == 'svg' and _SVGLIB else None
+                if drawing is not None:
+                    elements.append(drawing)
+                else:
+                    elements.append(Image(io.BytesIO(_figure_png(fig, VISUALIZATION_CONFIG['dpi'])), width=500, height=300))
                 elements.append(Spacer(1, 12))
     
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
+    return elements
 
 
-def generate_html_report(df, selected_column, variable_type, frequency_table, measures, quartiles, figs):
+def _pdf_long_tables(header, rows, col_widths, table_style):
+    """
+    Divide una tabla larga en bloques de tablas que continúan entre páginas
+    repitiendo el encabezado.
+    
+    reportlab vuelve a medir todas las filas restantes cada vez que parte una
+    tabla en una página nueva; con bloques de tamaño fijo el coste crece de
+    forma lineal con el número de filas.
+    
+    Args:
+        header (list): Encabezados
+        rows (list): Filas con las celdas como texto
+        col_widths (list): Anchos de columna
+        table_style (TableStyle): Estilo de la tabla
+        
+    Returns:
+        list: Tablas listas para añadir al documento
+    """
+    from reportlab.platypus import LongTable
+    
+    chunk_rows = EXPORT_CONFIG['pdf_table_chunk_rows']
+    tables = []
+    for start in range(0, len(rows), chunk_rows):
+        table = LongTable([header] + rows[start:start + chunk_rows], colWidths=col_widths, repeatRows=1)
+        table.setStyle(table_style)
+        tables.append(table)
+    return tables
+
+
+def _figure_png(fig, dpi):
+    """Bytes PNG de un gráfico (bytes PNG, diccionario con 'png' y 'svg' o Figure de matplotlib)."""
+    if isinstance(fig, dict):
+        fig = fig['png']
+    if isinstance(fig, bytes):
+        # Gráfico ya renderizado (almacén de resultados)
+        return fig
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=dpi, bbox_inches='tight')
+    return buf.getvalue()
+
+
+def _figure_svg(fig):
+    """SVG de un gráfico, o None si solo está disponible como PNG o es demasiado denso."""
+    if isinstance(fig, dict):
+        return fig.get('svg')
+    if isinstance(fig, bytes):
+        return None
+    return figure_to_svg(fig)
+
+
+def _svg_drawing(svg, width):
+    """
+    Convierte un SVG en un dibujo vectorial de reportlab con el ancho indicado.
+    
+    Args:
+        svg (bytes): Documento SVG (None si no hay)
+        width (float): Ancho en puntos
+        
+    Returns:
+        Drawing: Dibujo de reportlab, o None si no se puede convertir (se usa el PNG)
+    """
+    if svg is None:
+        return None
+    from svglib.svglib import svg2rlg
+    
+    try:
+        drawing = svg2rlg(io.BytesIO(svg))
+    except Exception:
+        return None
+    if drawing is None or not drawing.width:
+        return None
+    scale = width / drawing.width
+    drawing.scale(scale, scale)
+    drawing.width, drawing.height = drawing.width * scale, drawing.height * scale
+    return drawing
+
+
+@instrumented()
+def generate_html_report(df, selected_column, variable_type, frequency_table, measures, quartiles, figs, figure_format="png"):
     """
     Genera un informe HTML completo.
     
@@ -206,7 +400,8 @@ def generate_html_report(df, selected_column, variable_type, frequency_table, me
         frequency_table (list): Tabla de frecuencia
         measures (dict): Medidas estadísticas
         quartiles (dict): Cuartiles
-        figs (list): Lista de figuras
+        figs (list): Lista de figuras (Figure de matplotlib, bytes PNG o diccionario con 'png' y 'svg')
+        figure_format (str): 'svg' para incrustar los gráficos como SVG o 'png'
         
     Returns:
         str: Código HTML del informe
@@ -214,12 +409,31 @@ def generate_html_report(df, selected_column, variable_type, frequency_table, me
     graph_imgs = []
     for fig in figs:
         if fig is not None:
-            buf = io.BytesIO()
-            fig.savefig(buf, format='png', dpi=100, bbox_inches='tight')
-            buf.seek(0)
-            img_str = base64.b64encode(buf.read()).decode()
-            graph_imgs.append(f'<img src="data:image/png;base64,{img_str}" style="max-width:100%;">')
+            svg = _figure_svg(fig) if figure_format == 'svg' else None
+            if svg is not None:
+                # SVG en línea, sin la declaración XML
+                svg_text = svg.decode('utf-8')
+                graph_imgs.append(f'<div class="grafico">{svg_text[svg_text.index("<svg"):]}</div>')
+            else:
+                img_str = base64.b64encode(_figure_png(fig, 100)).decode()
+                graph_imgs.append(f'<img src="data:image/png;base64,{img_str}" style="max-width:100%;">')
+    
+    return _html_document(df, selected_column, variable_type, frequency_table, measures, quartiles, "".join(graph_imgs))
+
+
+def _html_document(df, selected_column, variable_type, frequency_table, measures, quartiles, graphs_html,
+                   interactive_html="", scripts=""):
+    """
+    Construye el documento HTML del informe.
     
+    Args:
+        graphs_html (str): Etiquetas de los gráficos estáticos
+        interactive_html (str): Sección de gráficos interactivos (informe en carpeta)
+        scripts (str): Etiquetas <script> de la cabecera
+        
+    Returns:
+        str: Código HTML del informe
+    """
     freq_table_html = pd.DataFrame(frequency_table).to_html(index=False, classes='dataframe')
     
     measures_html = ""
@@ -239,6 +453,7 @@ def generate_html_report(df, selected_column, variable_type, frequency_table, me
     <html>
     <head>
         <title>Informe Estadístico - {selected_column}</title>
+        {scripts}
         <style>
             body {{
                 font-family: Arial, sans-serif;
@@ -271,6 +486,15 @@ def generate_html_report(df, selected_column, variable_type, frequency_table, me
             .dataframe tr:nth-child(even) {{
                 background-color: #f2f2f2;
             }}
+            .grafico svg {{
+                max-width: 100%;
+                height: auto;
+            }}
+            .interactivo {{
+                width: 100%;
+                height: 500px;
+                margin: 20px 0;
+            }}
             .graph-container {{
                 margin: 30px 0;
                 text-align: center;
@@ -314,8 +538,9 @@ def generate_html_report(df, selected_column, variable_type, frequency_table, me
         
         <h2>Visualizaciones</h2>
         <div class="graph-container">
-            {"".join(graph_imgs)}
+            {graphs_html}
         </div>
+        {interactive_html}
         
         <div class="footer">
             Informe generado automáticamente por Análisis Estadístico v2.0<br>
@@ -327,7 +552,76 @@ def generate_html_report(df, selected_column, variable_type, frequency_table, me
     return html
 
 
-def generate_r_code(df, selected_column, variable_type, frequency_table, measures, quartiles, data_values):
+@instrumented()
+def generate_html_bundle(df, selected_column, variable_type, frequency_table, measures, quartiles, figs,
+                         interactive_figs=None, figure_format="svg"):
+    """
+    Genera el informe HTML como un ZIP con los recursos en archivos aparte.
+    
+    Los gráficos se guardan en la carpeta 'graficos' en lugar de incrustarse
+    en base64, y los gráficos interactivos comparten un único plotly.js
+    ('js/plotly.min.js') con los datos reducidos, de modo que el documento
+    principal se abre rápido aunque el análisis tenga muchos datos.
+    
+    Args:
+        df (pd.DataFrame): DataFrame con los datos
+        selected_column (str): Columna analizada
+        variable_type (str): Tipo de variable
+        frequency_table (list): Tabla de frecuencia
+        measures (dict): Medidas estadísticas
+        quartiles (dict): Cuartiles
+        figs (list): Lista de figuras (Figure de matplotlib, bytes PNG o diccionario con 'png' y 'svg')
+        interactive_figs (list): Figuras de Plotly (opcional)
+        figure_format (str): 'svg' o 'png' para los gráficos estáticos
+        
+    Returns:
+        io.BytesIO: Buffer con el archivo ZIP (informe.html, graficos/ y js/)
+    """
+    files = {}
+    graph_tags = []
+    for fig in figs:
+        if fig is not None:
+            svg = _figure_svg(fig) if figure_format == 'svg' else None
+            path = f"graficos/grafico_{len(graph_tags) + 1}.{'svg' if svg is not None else 'png'}"
+            files[path] = svg if svg is not None else _figure_png(fig, 100)
+            graph_tags.append(f'<img src="{path}" loading="lazy" style="max-width:100%;">')
+    
+    interactive_tags = []
+    scripts = ""
+    interactive_figs = [fig for fig in interactive_figs or [] if fig is not None]
+    if interactive_figs:
+        from plotly.offline import get_plotlyjs
+        
+        files['js/plotly.min.js'] = get_plotlyjs().encode('utf-8')
+        # Scripts diferidos: se ejecutan en orden cuando el documento ya está mostrado
+        scripts = '<script src="js/plotly.min.js" defer></script>'
+        for number, fig in enumerate(interactive_figs, 1):
+            element_id = f"interactivo_{number}"
+            path = f"graficos/{element_id}.js"
+            figure_json = downsample_interactive_figure(fig).to_json()
+            files[path] = (
+                f"(function () {{\n    var figura = {figure_json};\n"
+                f"    Plotly.newPlot('{element_id}', figura.data, figura.layout, {{responsive: true}});\n}})();\n"
+            ).encode('utf-8')
+            interactive_tags.append(f'<div id="{element_id}" class="interactivo"></div>\n        <script src="{path}" defer></script>')
+    
+    interactive_html = ""
+    if interactive_tags:
+        interactive_html = "<h2>Gráficos Interactivos</h2>\n        " + "\n        ".join(interactive_tags)
+    files['informe.html'] = _html_document(
+        df, selected_column, variable_type, frequency_table, measures, quartiles, "".join(graph_tags), interactive_html, scripts
+    ).encode('utf-8')
+    
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for path in ['informe.html'] + [path for path in files if path != 'informe.html']:
+            archive.writestr(path, files[path])
+    buffer.seek(0)
+    return buffer
+
+
+@instrumented()
+def generate_r_code(df, selected_column, variable_type, frequency_table, measures, quartiles, data_values, data_file=None):
     """
     Genera código R con los datos y el análisis estadístico.
     
@@ -339,21 +633,29 @@ def generate_r_code(df, selected_column, variable_type, frequency_table, measure
         measures (dict): Medidas estadísticas
         quartiles (dict): Cuartiles
         data_values (list): Valores originales de los datos
+        data_file (str): Archivo CSV con los datos que acompaña al script; si se
+            indica, el script lo lee en lugar de incluir los valores en c(...)
         
     Returns:
         str: Código R completo
     """
     now = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+    data_type = "character" if variable_type == "Cualitativa" else "numeric"
     
     # Preparar los datos
-    if variable_type == "Cualitativa":
-        # Para datos cualitativos, usar comillas
-        data_str = ", ".join([f'"{str(v)}"' for v in data_values if pd.notna(v)])
-        data_type = "character"
+    if data_file is not None:
+        data_block = f"""# Leer los datos del archivo que acompaña al script
+# (establezca como directorio de trabajo la carpeta donde está {data_file})
+datos <- read.csv("{data_file}", colClasses = "{data_type}", encoding = "UTF-8")[[1]]"""
     else:
-        # Para datos cuantitativos, sin comillas
-        data_str = ", ".join([str(v) for v in data_values if pd.notna(v)])
-        data_type = "numeric"
+        if variable_type == "Cualitativa":
+            # Para datos cualitativos, usar comillas
+            data_str = ", ".join([f'"{str(v)}"' for v in data_values if pd.notna(v)])
+        else:
+            # Para datos cuantitativos, sin comillas
+            data_str = ", ".join([str(v) for v in data_values if pd.notna(v)])
+        data_block = f"""# Ingresar los datos
+datos <- c({data_str})"""
     
     # Construir el código R
     r_code = f"""# ============================================================
@@ -372,8 +674,7 @@ library(dplyr)
 # DATOS ORIGINALES
 # ============================================================
 
-# Ingresar los datos
-datos <- c({data_str})
+{data_block}
 
 # Convertir a data frame
 df <- data.frame(
@@ -621,3 +922,212 @@ qqline(df${selected_column}, col = "red")
 
     return r_code
 
+
+@instrumented()
+def generate_r_bundle(df, selected_column, variable_type, frequency_table, measures, quartiles, data_values):
+    """
+    Genera un ZIP con el script R y los datos en un CSV aparte.
+    
+    El tamaño y el tiempo de generación del script no dependen del número de
+    filas: los valores se escriben una sola vez en 'datos.csv' (que R lee con
+    read.csv) en lugar de pegarse en un vector c(...).
+    
+    Args:
+        df (pd.DataFrame): DataFrame con los datos
+        selected_column (str): Columna analizada
+        variable_type (str): Tipo de variable
+        frequency_table (list): Tabla de frecuencia
+        measures (dict): Medidas estadísticas
+        quartiles (dict): Cuartiles
+        data_values (pd.Series): Valores originales de los datos (o lista)
+        
+    Returns:
+        io.BytesIO: Buffer con el archivo ZIP (analisis.R y datos.csv)
+    """
+    data_file = EXPORT_CONFIG['r_data_file']
+    values = data_values if isinstance(data_values, pd.Series) else pd.Series(data_values)
+    r_code = generate_r_code(df, selected_column, variable_type, frequency_table, measures, quartiles, [], data_file=data_file)
+    
+    buffer = io.BytesIO()
+    # Compresión rápida: el CSV puede ocupar decenas de MB
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        archive.writestr('analisis.R', r_code)
+        archive.writestr(data_file, _r_data_csv(values, selected_column))
+    buffer.seek(0)
+    return buffer
+
+
+def _r_data_csv(values, column):
+    """CSV de una columna (sin nulos) para leerlo desde R con read.csv."""
+    values = values.dropna()
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        # Números: str() de Python da la representación exacta más corta, más rápido que to_csv
+        header = '"' + str(column).replace('"', '""') + '"'
+        return '\n'.join([header] + list(map(str, values.to_numpy().tolist()))) + '\n'
+    return values.to_csv(index=False, header=[str(column)], lineterminator='\n')
+
+
+@instrumented()
+def export_report_bundle(analyses, figure_format="svg"):
+    """
+    Genera un ZIP con el informe de varias columnas en todos los formatos.
+    
+    Contiene un libro de Excel con una hoja por columna, un PDF con todas las
+    columnas, un índice HTML con un informe por columna y un script R por
+    columna (con los datos en un CSV aparte si tiene muchos valores).
+    
+    Args:
+        analyses (list): Un diccionario por columna con 'columna', 'tipo',
+            'datos' (pd.Series sin nulos) y 'resultado' (ver
+            `src.pipeline.compute_univariate_results`) o 'error'
+        figure_format (str): 'svg' o 'png' para los gráficos del PDF y del HTML
+        
+    Returns:
+        io.BytesIO: Buffer con el archivo ZIP
+    """
+    from openpyxl import Workbook
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.platypus import SimpleDocTemplate, PageBreak
+    
+    completed = [analysis for analysis in analyses if 'error' not in analysis]
+    names = _unique_names([analysis['columna'] for analysis in completed])
+    items = ['tabla_frecuencia', 'medidas_resumen', 'cuartiles', 'graficos']
+    
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        # Excel: una hoja por columna con sus tres tablas una debajo de otra
+        workbook = Workbook(write_only=True)
+        for analysis, name in zip(completed, names):
+            _excel_column_sheet(workbook, name[:31], analysis['resultado'])
+        if not workbook.worksheets:
+            workbook.create_sheet('Resultados')
+        excel = io.BytesIO()
+        workbook.save(excel)
+        archive.writestr('resultados.xlsx', excel.getvalue())
+        
+        # PDF: todas las columnas, cada una desde una página nueva
+        elements = []
+        for analysis in completed:
+            result = analysis['resultado']
+            if elements:
+                elements.append(PageBreak())
+            elements.extend(_pdf_elements(
+                len(analysis['datos']), analysis['columna'], analysis['tipo'], result['frequency_table'],
+                result['measures'], result['quartiles'], _result_figures(result), items, figure_format
+            ))
+        pdf = io.BytesIO()
+        doc = SimpleDocTemplate(pdf, pagesize=landscape(letter), rightMargin=36, leftMargin=36, topMargin=36, bottomMargin=18)
+        doc.build(elements or [PageBreak()])
+        archive.writestr('informe.pdf', pdf.getvalue())
+        
+        # HTML y R: un archivo por columna
+        rows = []
+        for analysis, name in zip(completed, names):
+            result, data, column = analysis['resultado'], analysis['datos'], analysis['columna']
+            archive.writestr(f'html/{name}.html', generate_html_report(
+                data.to_frame(column), column, analysis['tipo'], result['frequency_table'], result['measures'],
+                result['quartiles'], _result_figures(result), figure_format=figure_format
+            ))
+            if len(data) > EXPORT_CONFIG['r_inline_max_values']:
+                archive.writestr(f'R/{name}.csv', _r_data_csv(data, column))
+                data_file, data_values = f'{name}.csv', []
+            else:
+                data_file, data_values = None, data.tolist()
+            archive.writestr(f'R/{name}.R', generate_r_code(
+                data.to_frame(column), column, analysis['tipo'], result['frequency_table'], result['measures'],
+                result['quartiles'], data_values, data_file=data_file
+            ))
+            rows.append(f'<tr><td><a href="{name}.html">{html_escape(str(column))}</a></td>'
+                        f'<td>{html_escape(analysis["tipo"])}</td><td>{len(data):,}</td><td></td></tr>')
+        for analysis in analyses:
+            if 'error' in analysis:
+                rows.append(f'<tr><td>{html_escape(str(analysis["columna"]))}</td><td></td><td></td>'
+                            f'<td>{html_escape(analysis["error"])}</td></tr>')
+        archive.writestr('html/index.html', _html_index(rows))
+    
+    buffer.seek(0)
+    return buffer
+
+
+def _excel_column_sheet(workbook, title, result):
+    """Escribe la tabla de frecuencia, las medidas y los cuartiles de una columna en una hoja."""
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    
+    sheet = workbook.create_sheet(title)
+    
+    def header(*values):
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(sheet, value=str(value))
+            cell.font = Font(bold=True)
+            cells.append(cell)
+        sheet.append(cells)
+    
+    frequency_table = result['frequency_table']
+    if frequency_table:
+        columns = list(frequency_table[0].keys())
+        header('Tabla de Frecuencia')
+        header(*columns)
+        for row in frequency_table:
+            sheet.append([_excel_value(row.get(column)) for column in columns])
+        sheet.append([])
+    
+    if result['measures']:
+        header('Medida', 'Valor')
+        for measure, value in result['measures'].items():
+            sheet.append([measure, _excel_value(value)])
+        sheet.append([])
+    
+    quartiles = result['quartiles']
+    if quartiles and any(v is not None for v in quartiles.values()):
+        header('Cuartil', 'Valor')
+        for quartile, value in quartiles.items():
+            sheet.append([quartile, _excel_value(value)])
+
+
+def _result_figures(result):
+    """Gráficos de un resultado como diccionarios con 'png' y 'svg'."""
+    vector_figures = result.get('vector_figures', {})
+    return [{'png': png, 'svg': vector_figures.get(name)} for name, png in result['figures'].items()]
+
+
+def _unique_names(columns):
+    """Nombres de archivo (y de hoja de Excel) únicos y seguros para cada columna."""
+    names = []
+    for column in columns:
+        base = re.sub(r'[^\w\-]+', '_', str(column)).strip('_')[:28] or 'columna'
+        name, number = base, 2
+        while name.lower() in (existing.lower() for existing in names):
+            name, number = f"{base}_{number}", number + 1
+        names.append(name)
+    return names
+
+
+def _html_index(rows):
+    """Índice HTML del informe de varias columnas."""
+    now = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+    return f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>Informe Estadístico - Varias columnas</title>
+<style>
+    body {{ font-family: Arial, sans-serif; margin: 40px; line-height: 1.6; }}
+    h1 {{ color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px; }}
+    table {{ border-collapse: collapse; width: 100%; margin: 20px 0; }}
+    th, td {{ text-align: left; padding: 12px; border-bottom: 1px solid #ddd; }}
+    th {{ background-color: #3498db; color: white; }}
+</style>
+</head>
+<body>
+<h1>Informe Estadístico: {len(rows)} columnas</h1>
+<p><strong>Fecha de generación:</strong> {now}</p>
+<p>Cada columna tiene su informe HTML; el PDF y el libro de Excel reúnen todas las columnas y la carpeta R contiene un script por columna.</p>
+<table>
+<tr><th>Columna</th><th>Tipo de variable</th><th>Observaciones</th><th>Error</th></tr>
+{''.join(rows)}
+</table>
+</body>
+</html>
+"""
@@ -0,0 +1,616 @@
+"""
+Análisis incremental de archivos que crecen añadiendo filas.
+
+El estado de cada columna es un resumen combinable de sus datos: momentos
+centrales (fórmulas de Pébay), frecuencias por valor o categoría y, cuando
+hay demasiados valores distintos, un esquema de cuantiles por cubetas
+logarítmicas. Para la correlación se guardan productos cruzados por pares de
+columnas. Cuando se vuelve a subir un archivo cuyo inicio coincide con el ya
+analizado (misma huella del prefijo), solo se leen y resumen las filas
+nuevas y se combinan con el estado guardado.
+"""
+import numpy as np
+import pandas as pd
+from src.analysis import (
+    categorical_counts,
+    extend_bin_edges,
+    frequency_table_from_counts,
+    grouped_quartiles,
+    interval_bins,
+    qualitative_measures,
+    ranked_quartiles,
+    summary_from_view,
+)
+from src.cache import fingerprint_bytes
+from src.config import ANALYSIS_CONFIG, FILE_CONFIG
+from src.instrumentation import instrumented
+from src.utils import get_numeric_columns
+
+# Desplazamiento de los índices de las cubetas para que sean siempre positivos
+_SKETCH_BIAS = 2000
+_SKETCH_MIN_VALUE = 1e-12  # Valores menores en magnitud van a la cubeta del cero
+
+
+# ============= ESTADO POR COLUMNA =============
+
+def column_state(data):
+    """
+    Resume una columna en un estado combinable con el de otras filas.
+    
+    Args:
+        data (pd.Series): Datos de la columna
+    
+    Returns:
+        dict: Estado con el número de datos ('n') y nulos ('nulls'), las
+              frecuencias por valor ('counts') y, en columnas numéricas, los
+              suma y momentos ('sum', 'mean', 'M2', 'M3', 'M4'), extremos, sumas para las
+              medias armónica y geométrica y el esquema de cuantiles ('sketch')
+    """
+    clean = data.dropna()
+    nulls = len(data) - len(clean)
+    
+    if not pd.api.types.is_numeric_dtype(clean) or pd.api.types.is_bool_dtype(clean):
+        return {'numeric': False, 'n': len(clean), 'nulls': nulls, 'counts': categorical_counts(clean)}
+    
+    values = clean.to_numpy(dtype=float)
+    n = len(values)
+    state = {
+        'numeric': True, 'n': n, 'nulls': nulls,
+        'sum': 0.0, 'mean': 0.0, 'M2': 0.0, 'M3': 0.0, 'M4': 0.0,
+        'min': np.nan, 'max': np.nan,
+        'sum_reciprocal': 0.0, 'sum_log': 0.0,
+        'counts': clean.value_counts().sort_index(), 'sketch': None,
+    }
+    if n > 0:
+        total = float(values.sum())
+        mean = total / n
+        deviations = values - mean
+        squared = deviations * deviations
+        positive = bool((values > 0).all())
+        state.update({
+            'sum': total,
+            'mean': mean,
+            'M2': float(squared.sum()),
+            'M3': float((squared * deviations).sum()),
+            'M4': float((squared * squared).sum()),
+            'min': float(values.min()),
+            'max': float(values.max()),
+            'sum_reciprocal': float(np.sum(1 / values)) if positive else None,
+            'sum_log': float(np.sum(np.log(values))) if positive else None,
+        })
+    return _limit_distinct(state)
+
+
+def merge_states(left, right):
+    """
+    Combina los estados de dos bloques de filas de una misma columna.
+    
+    El coste es proporcional al tamaño de los estados (valores distintos), no
+    al número de filas ya analizadas.
+    
+    Args:
+        left (dict): Estado de las primeras filas (`column_state`)
+        right (dict): Estado de las filas siguientes
+    
+    Returns:
+        dict: Estado de todas las filas
+    
+    Raises:
+        ValueError: Si uno de los estados es numérico y el otro no
+    """
+    if left['numeric'] != right['numeric']:
+        raise ValueError("Los bloques tienen tipos de datos distintos")
+    if right['n'] == 0:
+        return dict(left, nulls=left['nulls'] + right['nulls'])
+    if left['n'] == 0:
+        return dict(right, nulls=left['nulls'] + right['nulls'])
+    
+    merged = {
+        'numeric': left['numeric'],
+        'n': left['n'] + right['n'],
+        'nulls': left['nulls'] + right['nulls'],
+    }
+    if not left['numeric']:
+        merged['counts'] = _add_counts(left['counts'], right['counts'])
+        return merged
+    
+    # Momentos centrales combinados (Pébay, 2008)
+    na, nb, n = left['n'], right['n'], merged['n']
+    delta = right['mean'] - left['mean']
+    M2a, M2b, M3a, M3b = left['M2'], right['M2'], left['M3'], right['M3']
+    merged.update({
+        # La media sale de la suma acumulada: exacta con datos enteros
+        'sum': left['sum'] + right['sum'],
+        'mean': (left['sum'] + right['sum']) / n,
+        'M2': M2a + M2b + delta ** 2 * na * nb / n,
+        'M3': (M3a + M3b + delta ** 3 * na * nb * (na - nb) / n ** 2
+               + 3 * delta * (na * M2b - nb * M2a) / n),
+        'M4': (left['M4'] + right['M4']
+               + delta ** 4 * na * nb * (na ** 2 - na * nb + nb ** 2) / n ** 3
+               + 6 * delta ** 2 * (na ** 2 * M2b + nb ** 2 * M2a) / n ** 2
+               + 4 * delta * (na * M3b - nb * M3a) / n),
+        'min': min(left['min'], right['min']),
+        'max': max(left['max'], right['max']),
+    })
+    for key in ('sum_reciprocal', 'sum_log'):
+        both = left[key] is not None and right[key] is not None
+        merged[key] = left[key] + right[key] if both else None
+    
+    if left['counts'] is not None and right['counts'] is not None:
+        merged['counts'] = _add_counts(left['counts'], right['counts'])
+        merged['sketch'] = None
+    else:
+        merged['counts'] = None
+        merged['sketch'] = _add_counts(_state_sketch(left), _state_sketch(right))
+    return _limit_distinct(merged)
+
+
+def is_exact(state):
+    """Indica si el estado conserva las frecuencias exactas de cada valor."""
+    return state['counts'] is not None
+
+
+def state_quantile(state, q):
+    """
+    Calcula un cuantil (R tipo 7, como `sorted_quantile`) a partir del estado.
+    
+    Es exacto mientras el estado conserve las frecuencias por valor; con el
+    esquema de cubetas el error relativo está acotado por
+    ANALYSIS_CONFIG['sketch_relative_accuracy'].
+    
+    Args:
+        state (dict): Estado de una columna numérica
+        q (float): Probabilidad del cuantil (0 a 1)
+    
+    Returns:
+        float: Valor del cuantil
+    """
+    value_at = _rank_accessor(state)
+    position = q * (state['n'] - 1)
+    lower = int(np.floor(position))
+    upper = min(lower + 1, state['n'] - 1)
+    fraction = position - lower
+    lower_value, upper_value = value_at(lower), value_at(upper)
+    return float(lower_value + fraction * (upper_value - lower_value))
+
+
+def sample_view_from_state(state):
+    """
+    Construye a partir del estado la vista de momentos de `build_sample_view` (sin 'sorted').
+    
+    Args:
+        state (dict): Estado de una columna numérica
+    
+    Returns:
+        dict: Tamaño, media, desviación estándar, momento de orden 2, asimetría,
+              curtosis de exceso, mínimo y máximo
+    """
+    n = state['n']
+    m2 = state['M2'] / n if n else np.nan
+    return {
+        'n': n,
+        'mean': state['mean'] if n else np.nan,
+        'std': float(np.sqrt(state['M2'] / (n - 1))) if n > 1 else np.nan,
+        'm2': m2,
+        'skew': (state['M3'] / n) / m2 ** 1.5 if n and m2 > 0 else np.nan,
+        'kurtosis': (state['M4'] / n) / m2 ** 2 - 3 if n and m2 > 0 else np.nan,
+        'min': state['min'],
+        'max': state['max'],
+    }
+
+
+def data_from_state(state):
+    """
+    Reconstruye los valores no nulos de una columna a partir de sus frecuencias.
+    
+    Sirve para dibujar los gráficos sin leer las filas del archivo: los valores
+    salen ordenados, no en el orden original. Con el esquema de cubetas se usa
+    el representante de cada cubeta, con el error relativo de
+    ANALYSIS_CONFIG['sketch_relative_accuracy'].
+    
+    Args:
+        state (dict): Estado de la columna
+    
+    Returns:
+        pd.Series: Valores de la columna (categóricos si la columna no es numérica)
+    """
+    if not state['numeric']:
+        counts = state['counts']
+        codes = np.repeat(np.arange(len(counts)), counts.to_numpy())
+        return pd.Series(pd.Categorical.from_codes(codes, categories=counts.index))
+    
+    values, counts = _distribution(state)
+    return pd.Series(np.repeat(values, counts))
+
+
+# ============= RESULTADOS A PARTIR DEL ESTADO =============
+
+def frequency_table_from_state(state, variable_type, max_categories=None, bin_edges=None):
+    """
+    Calcula la tabla de frecuencia (como `calculate_frequency_table`) a partir del estado.
+    
+    Args:
+        state (dict): Estado de la columna
+        variable_type (str): Tipo de variable
+        max_categories (int): Máximo de categorías cualitativas en la tabla
+        bin_edges (list): Límites fijos de los intervalos (None = automáticos)
+    
+    Returns:
+        list: Lista de diccionarios con la tabla de frecuencia
+    """
+    n = state['n']
+    if variable_type == "Cualitativa":
+        counts = state['counts']
+        # Agrupación por texto, como `categorical_counts(..., as_text=True)`
+        text_counts = counts.groupby(counts.index.astype(str)).sum()
+        return frequency_table_from_counts(text_counts, variable_type, n, max_categories)
+    
+    if not state['numeric']:
+        return []
+    
+    if variable_type == "Cuantitativa Discreta":
+        values, counts = _distribution(state)
+        return frequency_table_from_counts(pd.Series(counts, index=values), variable_type, n)
+    
+    if variable_type in ["Cuantitativa Discreta con Intervalos", "Cuantitativa Continua"]:
+        if bin_edges is not None:
+            bins = extend_bin_edges(bin_edges, state['min'], state['max'])
+        else:
+            bins = bin_edges_from_state(state)
+        values, counts = _distribution(state)
+        intervals = pd.cut(values, bins=bins, right=False, include_lowest=True)
+        freq = pd.Series(counts).groupby(intervals, observed=False).sum()
+        return frequency_table_from_counts(freq, variable_type, n)
+    
+    return []
+
+
+def bin_edges_from_state(state):
+    """
+    Calcula los límites automáticos de los intervalos (como `compute_bin_edges`) a partir del estado.
+    
+    Args:
+        state (dict): Estado de una columna numérica
+    
+    Returns:
+        list: Límites de los intervalos, cerrados por la izquierda
+    """
+    view = sample_view_from_state(state)
+    iqr = state_quantile(state, 0.75) - state_quantile(state, 0.25)
+    return [float(edge) for edge in interval_bins(state['n'], view['min'], view['max'], view['std'], iqr)]
+
+
+def statistics_summary_from_state(state):
+    """
+    Calcula el resumen estadístico (como `calculate_statistics_summary`) a partir del estado.
+    
+    Args:
+        state (dict): Estado de la columna
+    
+    Returns:
+        dict: Resumen estadístico completo
+    """
+    if not state['numeric']:
+        measures = qualitative_measures(None, state['counts'])
+        return {
+            'N (tamaño)': state['n'],
+            'Valores Únicos': measures['Valores Únicos'],
+            'Moda': measures['Moda'],
+            'Frecuencia de la Moda': measures['Frecuencia de la Moda'],
+            'Proporción de la Moda': measures['Proporción de la Moda'],
+            'Entropía': measures['Entropía']
+        }
+    
+    n = state['n']
+    if n == 0:
+        return {'Error': 'No hay datos válidos'}
+    
+    modes = []
+    if is_exact(state):
+        counts = state['counts']
+        modes = counts.index[counts.to_numpy() == counts.max()]
+    
+    positive = state['sum_reciprocal'] is not None
+    return summary_from_view(
+        sample_view_from_state(state),
+        quantile=lambda q: state_quantile(state, q),
+        modes=modes,
+        harmonic_mean=n / state['sum_reciprocal'] if positive else None,
+        geometric_mean=float(np.exp(state['sum_log'] / n)) if positive else None
+    )
+
+
+def quartiles_from_state(state, frequency_table, variable_type):
+    """
+    Calcula los cuartiles (como `calculate_quartiles`) a partir del estado.
+    
+    Args:
+        state (dict): Estado de la columna
+        frequency_table (list): Tabla de frecuencia (`frequency_table_from_state`)
+        variable_type (str): Tipo de variable
+    
+    Returns:
+        dict: Un diccionario con los cuartiles (Q1, Q2, Q3)
+    """
+    if variable_type not in ["Cuantitativa Continua", "Cuantitativa Discreta con Intervalos", "Cuantitativa Discreta"]:
+        return {'Q1': None, 'Q2': None, 'Q3': None}
+    
+    if state['n'] < 4:
+        return {'Q1': None, 'Q2': None, 'Q3': None}
+    
+    if variable_type == "Cuantitativa Discreta":
+        return ranked_quartiles(_rank_accessor(state), state['n'])
+    
+    return grouped_quartiles(frequency_table)
+
+
+# ============= CORRELACIÓN =============
+
+def correlation_state(df, columns):
+    """
+    Resume los productos cruzados de las columnas numéricas para la correlación.
+    
+    Las sumas se acumulan por pares de columnas sobre las filas en que ambas
+    tienen valor (como `DataFrame.corr`), desplazadas por la media del primer
+    bloque para conservar la precisión numérica.
+    
+    Args:
+        df (pd.DataFrame): DataFrame con los datos
+        columns (list): Columnas numéricas
+    
+    Returns:
+        dict: Columnas, desplazamiento y matrices de conteos, sumas, sumas de
+              cuadrados y productos cruzados por pares
+    """
+    values = df[list(columns)].to_numpy(dtype=float)
+    present = ~np.isnan(values)
+    with np.errstate(invalid='ignore'):
+        shift = np.nanmean(values, axis=0) if len(values) else np.zeros(len(columns))
+    shift = np.nan_to_num(shift)
+    return _correlation_sums(list(columns), values, present, shift)
+
+
+def merge_correlation_states(left, right):
+    """
+    Combina los productos cruzados de dos bloques de filas.
+    
+    Args:
+        left (dict): Estado de las primeras filas (`correlation_state`)
+        right (dict): Estado de las filas siguientes
+    
+    Returns:
+        dict: Estado de todas las filas (con el desplazamiento de `left`)
+    
+    Raises:
+        ValueError: Si los bloques no tienen las mismas columnas
+    """
+    if left['columns'] != right['columns']:
+        raise ValueError("Los bloques tienen columnas numéricas distintas")
+    
+    # Se expresan las sumas del segundo bloque con el desplazamiento del primero
+    offset = (right['shift'] - left['shift'])[:, None]
+    n, sx, sxx = right['n'], right['sx'], right['sxx']
+    moved_sx = sx + offset * n
+    return {
+        'columns': left['columns'],
+        'shift': left['shift'],
+        'n': left['n'] + n,
+        'sx': left['sx'] + moved_sx,
+        'sxx': left['sxx'] + sxx + 2 * offset * sx + offset ** 2 * n,
+        'sxy': left['sxy'] + right['sxy'] + offset * sx.T + offset.T * sx + offset * offset.T * n,
+    }
+
+
+def correlation_from_state(state, columns=None):
+    """
+    Calcula la matriz de correlación de Pearson a partir de los productos cruzados.
+    
+    Args:
+        state (dict): Estado de correlación (`correlation_state`)
+        columns (list): Columnas a incluir (None = todas las del estado)
+    
+    Returns:
+        pd.DataFrame: Matriz de correlación, o None si hay menos de 2 columnas
+    """
+    names = state['columns']
+    if columns is None:
+        columns = names
+    positions = [names.index(col) for col in columns if col in names]
+    if len(positions) < 2:
+        return None
+    
+    idx = np.ix_(positions, positions)
+    n, sx, sxx, sxy = state['n'][idx], state['sx'][idx], state['sxx'][idx], state['sxy'][idx]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        covariance = n * sxy - sx * sx.T
+        variance = n * sxx - sx ** 2
+        corr = covariance / np.sqrt(variance * variance.T)
+    corr = np.where((n > 1) & (variance > 0) & (variance.T > 0), np.clip(corr, -1, 1), np.nan)
+    
+    labels = [names[i] for i in positions]
+    return pd.DataFrame(corr, index=labels, columns=labels)
+
+
+# ============= ESTADO DEL CONJUNTO DE DATOS =============
+
+@instrumented()
+def dataset_state(df, content=None):
+    """
+    Resume todas las columnas de un conjunto de datos.
+    
+    Args:
+        df (pd.DataFrame): DataFrame con los datos
+        content (bytes): Contenido del archivo del que se leyó, para detectar
+                         después las filas añadidas (opcional)
+    
+    Returns:
+        dict: Filas, estado por columna, productos cruzados, primeras filas
+              ('head', para la vista previa) y huella del prefijo
+    """
+    return {
+        'rows': len(df),
+        'head': df.head(FILE_CONFIG['preview_rows']),
+        'columns': {col: column_state(df[col]) for col in df.columns},
+        'correlation': correlation_state(df, get_numeric_columns(df)),
+        'prefix': _prefix(content),
+    }
+
+
+def merge_dataset_states(left, right, content=None):
+    """
+    Combina el estado guardado con el de las filas nuevas.
+    
+    Args:
+        left (dict): Estado de las filas ya analizadas (`dataset_state`)
+        right (dict): Estado de las filas nuevas
+        content (bytes): Contenido completo del archivo actualizado (opcional)
+    
+    Returns:
+        dict: Estado de todas las filas
+    
+    Raises:
+        ValueError: Si los bloques no tienen las mismas columnas o tipos
+    """
+    if list(left['columns']) != list(right['columns']):
+        raise ValueError("Los bloques tienen columnas distintas")
+    
+    return {
+        'rows': left['rows'] + right['rows'],
+        'head': left.get('head'),
+        'columns': {col: merge_states(state, right['columns'][col]) for col, state in left['columns'].items()},
+        'correlation': merge_correlation_states(left['correlation'], right['correlation']),
+        'prefix': _prefix(content),
+    }
+
+
+def appended_tail(content, state):
+    """
+    Detecta si un archivo es el ya analizado con filas añadidas al final.
+    
+    Compara la huella de los primeros bytes del archivo con la del archivo
+    analizado; solo se aceptan prefijos que terminan en un salto de línea.
+    
+    Args:
+        content (bytes): Contenido del archivo actual
+        state (dict): Estado guardado (`dataset_state` con `content`)
+    
+    Returns:
+        bytes: Filas añadidas (sin encabezado), o None si el archivo no es una ampliación
+    """
+    prefix = state.get('prefix')
+    if not prefix:
+        return None
+    
+    size = prefix['size']
+    if len(content) <= size or content[size - 1:size] != b'\n':
+        return None
+    if fingerprint_bytes(memoryview(content)[:size]) != prefix['fingerprint']:
+        return None
+    return content[size:]
+
+
+@instrumented()
+def update_dataset_state(state, content, read_rows):
+    """
+    Actualiza el estado guardado leyendo solo las filas añadidas al archivo.
+    
+    Args:
+        state (dict): Estado guardado del archivo anterior
+        content (bytes): Contenido del archivo actual
+        read_rows (callable): Función que recibe los bytes de las filas nuevas y
+                              devuelve un DataFrame con las mismas columnas
+    
+    Returns:
+        tuple: (estado actualizado, número de filas nuevas), o (None, 0) si el
+               archivo no es una ampliación del anterior
+    """
+    tail = appended_tail(content, state)
+    if tail is None:
+        return None, 0
+    
+    new_rows = read_rows(tail)
+    try:
+        return merge_dataset_states(state, dataset_state(new_rows), content), len(new_rows)
+    except ValueError:
+        return None, 0
+
+
+# ============= FUNCIONES AUXILIARES =============
+
+def _prefix(content):
+    """Huella del contenido analizado, para reconocerlo como prefijo de una versión ampliada."""
+    if content is None:
+        return None
+    return {'size': len(content), 'fingerprint': fingerprint_bytes(content)}
+
+
+def _add_counts(left, right):
+    """Suma dos series de frecuencias alineando sus índices."""
+    merged = left.add(right, fill_value=0).astype(np.int64)
+    try:
+        return merged.sort_index()
+    except TypeError:  # Tipos mezclados que no se pueden ordenar
+        return merged
+
+
+def _limit_distinct(state):
+    """Sustituye las frecuencias exactas por el esquema de cubetas si hay demasiados valores distintos."""
+    if state['counts'] is not None and len(state['counts']) > ANALYSIS_CONFIG['incremental_max_distinct']:
+        state['sketch'] = _state_sketch(state)
+        state['counts'] = None
+    return state
+
+
+def _sketch_gamma():
+    """Razón entre los límites consecutivos de las cubetas logarítmicas."""
+    accuracy = ANALYSIS_CONFIG['sketch_relative_accuracy']
+    return (1 + accuracy) / (1 - accuracy)
+
+
+def _state_sketch(state):
+    """Esquema de cuantiles del estado: conteos por cubeta logarítmica (clave con signo)."""
+    if state['sketch'] is not None:
+        return state['sketch']
+    
+    values = state['counts'].index.to_numpy(dtype=float)
+    magnitude = np.abs(values)
+    keys = np.zeros(len(values), dtype=np.int64)
+    nonzero = magnitude > _SKETCH_MIN_VALUE
+    buckets = np.ceil(np.log(magnitude[nonzero]) / np.log(_sketch_gamma())).astype(np.int64) + _SKETCH_BIAS
+    keys[nonzero] = buckets * np.sign(values[nonzero]).astype(np.int64)
+    return state['counts'].groupby(keys).sum().astype(np.int64)
+
+
+def _distribution(state):
+    """Valores ordenados y sus frecuencias (representantes de las cubetas si el estado es aproximado)."""
+    if is_exact(state):
+        counts = state['counts']
+        return counts.index.to_numpy(), counts.to_numpy()
+    
+    sketch = state['sketch']
+    keys = sketch.index.to_numpy()
+    gamma = _sketch_gamma()
+    representatives = np.sign(keys) * 2 * gamma ** (np.abs(keys) - _SKETCH_BIAS) / (gamma + 1)
+    order = np.argsort(representatives, kind='stable')
+    return representatives[order], sketch.to_numpy()[order]
+
+
+def _rank_accessor(state):
+    """Función que devuelve el valor en una posición (base 0) de los datos ordenados."""
+    values, counts = _distribution(state)
+    cumulative = np.cumsum(counts)
+    return lambda rank: values[np.searchsorted(cumulative, rank, side='right')]
+
+
+def _correlation_sums(columns, values, present, shift):
+    """Conteos, sumas y productos cruzados por pares de columnas, con desplazamiento."""
+    weights = present.astype(float)
+    shifted = np.where(present, values - shift, 0.0)
+    return {
+        'columns': columns,
+        'shift': shift,
+        'n': weights.T @ weights,
+        'sx': shifted.T @ weights,
+        'sxx': (shifted * shifted).T @ weights,
+        'sxy': shifted.T @ shifted,
+    }
@@ -0,0 +1,261 @@
+"""
+Instrumentación de las etapas críticas del análisis.
+
+Registra, por etapa (carga, detección de tipo, tabla de frecuencia, gráficos,
+exportación...), el tiempo real, el tiempo de CPU, las filas procesadas y la
+variación de memoria. Los registros de la ejecución actual se guardan por hilo
+para mostrarlos en la aplicación y los totales acumulados se pueden escribir en
+un archivo de log o exponer en formato de texto de Prometheus.
+
+La activación puede ser de todo el proceso o solo del hilo actual: la
+aplicación activa la instrumentación en el hilo que ejecuta la interacción de
+cada sesión, de modo que la casilla de un usuario no afecta a los demás.
+
+Desactivada, cada función instrumentada solo añade la comprobación de un
+indicador antes de llamar a la función original.
+"""
+import functools
+import importlib.util
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.config import INSTRUMENTATION_CONFIG
+
+_STATE = {'enabled': INSTRUMENTATION_CONFIG['enabled'], 'server': None}
+_LOCAL = threading.local()
+_TOTALS = {}
+_TOTALS_LOCK = threading.Lock()
+_LOGGER = logging.getLogger('estadistica.tiempos')
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+# psutil es opcional: sin él, la memoria residente se lee de /proc (Linux)
+_PROCESS = importlib.import_module('psutil').Process() if importlib.util.find_spec('psutil') is not None else None
+
+
+def enable(enabled=True, log_path=None, thread=False):
+    """
+    Activa o desactiva la instrumentación.
+    
+    Args:
+        enabled (bool): Activar (True) o desactivar (False) el registro de etapas
+        log_path (str): Archivo de log donde escribir cada etapa (opcional)
+        thread (bool): Aplicarlo solo al hilo actual (hasta `reset_records`) en
+                       lugar de a todo el proceso
+    """
+    if thread:
+        _LOCAL.enabled = enabled
+    else:
+        _STATE['enabled'] = enabled
+    if log_path:
+        path = os.path.abspath(log_path)
+        if not any(getattr(handler, 'baseFilename', None) == path for handler in _LOGGER.handlers):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = logging.FileHandler(path, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            _LOGGER.addHandler(handler)
+            _LOGGER.setLevel(logging.INFO)
+
+
+def is_enabled():
+    """Indica si la instrumentación está activa en el hilo actual."""
+    enabled = getattr(_LOCAL, 'enabled', None)
+    return _STATE['enabled'] if enabled is None else enabled
+
+
+@contextmanager
+def stage(name, rows=None):
+    """
+    Registra el tiempo, la CPU y la memoria de un bloque de código.
+    
+    Args:
+        name (str): Nombre de la etapa
+        rows (int): Filas procesadas en la etapa (opcional)
+    
+    Example:
+        with stage('lectura', rows=len(df)):
+            ...
+    """
+    if not is_enabled():
+        yield
+        return
+    
+    depth = getattr(_LOCAL, 'depth', 0)
+    _LOCAL.depth = depth + 1
+    # El registro se reserva al empezar para que las etapas anidadas queden detrás de su etapa padre
+    record = {'Etapa': name, 'Nivel': depth, 'Tiempo (s)': None, 'CPU (s)': None, 'Filas': rows, 'Memoria (MB)': None}
+    records = getattr(_LOCAL, 'records', None)
+    if records is None:
+        records = _LOCAL.records = []
+    records.append(record)
+    del records[:-INSTRUMENTATION_CONFIG['max_records']]
+    
+    memory = _memory_usage()
+    cpu = time.thread_time()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record['Tiempo (s)'] = time.perf_counter() - start
+        record['CPU (s)'] = time.thread_time() - cpu
+        end_memory = _memory_usage()
+        if memory is not None and end_memory is not None:
+            record['Memoria (MB)'] = (end_memory - memory) / 2**20
+        _LOCAL.depth = depth
+        _record(record)
+
+
+def instrumented(name=None):
+    """
+    Decorador que registra cada llamada a la función como una etapa.
+    
+    Las filas procesadas se toman de la longitud del primer argumento
+    (Series, DataFrame o lista) cuando la tiene.
+    
+    Args:
+        name (str): Nombre de la etapa (por defecto, el de la función)
+    """
+    def decorator(func):
+        stage_name = name or func.__name__
+    
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return func(*args, **kwargs)
+            with stage(stage_name, rows=_rows(args)):
+                return func(*args, **kwargs)
+    
+        return wrapper
+    
+    return decorator
+
+
+def reset_records():
+    """Vacía los registros de la ejecución actual y anula la activación propia del hilo actual."""
+    _LOCAL.records = []
+    _LOCAL.enabled = None
+
+
+def get_records():
+    """
+    Devuelve los registros de la ejecución actual, en orden de inicio.
+    
+    Returns:
+        list: Diccionarios con Etapa, Nivel, Tiempo (s), CPU (s), Filas y Memoria (MB)
+    """
+    return list(getattr(_LOCAL, 'records', []))
+
+
+def get_totals():
+    """
+    Devuelve los totales acumulados por etapa desde el inicio del proceso (todos los hilos).
+    
+    Returns:
+        dict: Por etapa, número de llamadas, tiempo, CPU y filas acumulados
+    """
+    with _TOTALS_LOCK:
+        return {name: dict(totals) for name, totals in _TOTALS.items()}
+
+
+def prometheus_text():
+    """
+    Genera los totales por etapa en el formato de texto de Prometheus.
+    
+    Returns:
+        str: Métricas en formato de exposición de Prometheus
+    """
+    metrics = [
+        ('llamadas', 'estadistica_etapa_llamadas_total', 'Llamadas a cada etapa'),
+        ('tiempo', 'estadistica_etapa_segundos_total', 'Tiempo real acumulado por etapa'),
+        ('cpu', 'estadistica_etapa_cpu_segundos_total', 'Tiempo de CPU acumulado por etapa'),
+        ('filas', 'estadistica_etapa_filas_total', 'Filas procesadas por etapa'),
+    ]
+    totals = get_totals()
+    lines = []
+    for field, metric, description in metrics:
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} counter")
+        for name in sorted(totals):
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'{metric}{{etapa="{label}"}} {totals[name][field]:g}')
+    return '\n'.join(lines) + '\n'
+
+
+def serve_metrics(port):
+    """
+    Expone las métricas de Prometheus en http://localhost:<port>/metrics (una sola vez por proceso).
+    
+    Args:
+        port (int): Puerto del servidor
+    
+    Returns:
+        bool: True si el servidor está en marcha
+    """
+    if _STATE['server'] is not None:
+        return True
+    
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = prometheus_text().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+    
+        def log_message(self, format, *args):
+            pass
+    
+    try:
+        server = ThreadingHTTPServer(('127.0.0.1', port), MetricsHandler)
+    except OSError:
+        return False
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _STATE['server'] = server
+    return True
+
+
+def _record(record):
+    """Acumula un registro terminado en los totales y lo escribe en el log."""
+    with _TOTALS_LOCK:
+        totals = _TOTALS.setdefault(record['Etapa'], {'llamadas': 0, 'tiempo': 0.0, 'cpu': 0.0, 'filas': 0})
+        totals['llamadas'] += 1
+        totals['tiempo'] += record['Tiempo (s)']
+        totals['cpu'] += record['CPU (s)']
+        totals['filas'] += record['Filas'] or 0
+    
+    if _LOGGER.handlers:
+        memory = record['Memoria (MB)']
+        _LOGGER.info(
+            "etapa=%s tiempo=%.6f cpu=%.6f filas=%s memoria_mb=%s", record['Etapa'], record['Tiempo (s)'],
+            record['CPU (s)'], record['Filas'], 'NA' if memory is None else f"{memory:.2f}"
+        )
+
+
+def _rows(args):
+    """Filas del primer argumento de una función instrumentada (None si no tiene longitud)."""
+    if not args or isinstance(args[0], (str, bytes)):
+        return None
+    try:
+        return len(args[0])
+    except TypeError:
+        return None
+
+
+def _memory_usage():
+    """Memoria en uso en bytes: la de tracemalloc si está activo, si no la residente del proceso."""
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    if _PROCESS is not None:
+        return _PROCESS.memory_info().rss
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
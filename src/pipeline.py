@@ -0,0 +1,244 @@
+"""
+Análisis completo de una o varias columnas.
+
+`compute_univariate_results` calcula la tabla de frecuencia, las medidas, los
+cuartiles y los gráficos de una columna (lo usa la aplicación en el análisis
+univariado). `build_report_bundle` repite ese análisis para un conjunto de
+columnas en un pool de procesos y reúne los resultados en un único ZIP con el
+Excel, el PDF, el HTML y los scripts R.
+"""
+import pandas as pd
+from src.analysis import (
+    calculate_all_measures_grouped,
+    calculate_frequency_table,
+    calculate_quartiles,
+    calculate_statistics_summary,
+    compute_bin_edges,
+    extend_bin_edges,
+    qualitative_measures
+)
+from src.export import export_report_bundle
+from src.incremental import (
+    bin_edges_from_state,
+    frequency_table_from_state,
+    quartiles_from_state,
+    statistics_summary_from_state
+)
+from src.instrumentation import instrumented
+from src.utils import determine_variable_type, handle_missing_values, run_parallel
+from src.visualization import (
+    figure_to_png,
+    figure_to_svg,
+    generate_bar_chart,
+    generate_boxplot,
+    generate_histogram,
+    generate_horizontal_bar_chart,
+    generate_interactive_histogram,
+    generate_pie_chart,
+    generate_violinplot
+)
+
+
+@instrumented()
+def compute_univariate_results(data, variable_type, selected_column, column_summary=None, bin_edges=None, interactive=True):
+    """
+    Calcula la tabla de frecuencia, las medidas, los cuartiles y los gráficos de una columna.
+    
+    Los gráficos estáticos se guardan ya renderizados como bytes PNG para poder
+    mostrarlos, exportarlos y persistirlos sin volver a dibujarlos. Con el
+    resumen incremental de la columna, la tabla, las medidas y los cuartiles
+    se obtienen del resumen sin recorrer los datos. Con `bin_edges` la tabla y
+    el histograma usan intervalos fijos. Con `interactive=False` no se genera
+    el histograma interactivo de Plotly.
+    """
+    grouped = variable_type in ["Cuantitativa Continua", "Cuantitativa Discreta con Intervalos"]
+    histogram_bins = None
+    if grouped and bin_edges is not None:
+        bin_edges = histogram_bins = extend_bin_edges(bin_edges, data.min(), data.max())
+    elif grouped:
+        # Límites automáticos: se conservan con el resultado para poder fijarlos
+        bin_edges = bin_edges_from_state(column_summary) if column_summary is not None else compute_bin_edges(data)
+    
+    # Cálculo de tabla de frecuencia
+    if column_summary is not None:
+        frequency_table = frequency_table_from_state(column_summary, variable_type, bin_edges=bin_edges)
+    else:
+        frequency_table = calculate_frequency_table(data, variable_type, bin_edges=bin_edges)
+    
+    # Medidas de resumen
+    if variable_type in ["Cuantitativa Continua", "Cuantitativa Discreta con Intervalos"]:
+        measures = calculate_all_measures_grouped(frequency_table)
+    else:
+        if column_summary is not None:
+            measures = statistics_summary_from_state(column_summary)
+        elif variable_type == "Cuantitativa Discreta":
+            # Usar función mejorada para datos no agrupados
+            measures = calculate_statistics_summary(data)
+        else:
+            measures = qualitative_measures(data)
+        if variable_type == "Cualitativa":
+            measures = {
+                'Moda': measures['Moda'],
+                'Frecuencia de la Moda': measures['Frecuencia de la Moda'],
+                'Proporción de la Moda': measures['Proporción de la Moda']
+            }
+    
+    # Cuartiles
+    if column_summary is not None:
+        quartiles = quartiles_from_state(column_summary, frequency_table, variable_type)
+    else:
+        quartiles = calculate_quartiles(data, frequency_table, variable_type)
+    
+    # Visualizaciones
+    if variable_type in ["Cuantitativa Continua", "Cuantitativa Discreta con Intervalos"]:
+        generators = {
+            'histograma': generate_histogram,
+            'caja': generate_boxplot,
+            'violin': generate_violinplot,
+        }
+    elif variable_type in ["Cualitativa", "Cuantitativa Discreta"]:
+        generators = {
+            'barras': generate_bar_chart,
+            'sectores': generate_pie_chart,
+            'barras_horizontales': generate_horizontal_bar_chart,
+        }
+    else:
+        generators = {}
+    
+    figures = {}
+    vector_figures = {}
+    for name, generate in generators.items():
+        if name == 'histograma':
+            fig = generate(data, variable_type, selected_column, bins=histogram_bins)
+        else:
+            fig = generate(data, variable_type, selected_column)
+        if fig:
+            # El SVG (None si el gráfico es demasiado denso) se usa en los informes PDF y HTML
+            svg = figure_to_svg(fig)
+            if svg is not None:
+                vector_figures[name] = svg
+            figures[name] = figure_to_png(fig)
+    
+    interactive_figure = None
+    if interactive and variable_type in ["Cuantitativa Continua", "Cuantitativa Discreta con Intervalos"]:
+        interactive_figure = generate_interactive_histogram(data, variable_type, selected_column)
+    
+    return {
+        'frequency_table': frequency_table,
+        'measures': measures,
+        'quartiles': quartiles,
+        'figures': figures,
+        'vector_figures': vector_figures,
+        'interactive': interactive_figure,
+        'bin_edges': bin_edges,
+        'calculado': pd.Timestamp.now().strftime('%d/%m/%Y %H:%M'),
+    }
+
+
+def prepare_column(df, column, missing_method="Eliminar", fingerprint=None, missing_options=None):
+    """
+    Aplica el manejo de nulos a una columna y detecta su tipo de variable.
+    
+    Si el método no se puede aplicar a la columna (por ejemplo, la mediana de
+    una variable cualitativa), se eliminan sus nulos y el registro lo indica
+    en 'Alternativa a' y 'Motivo'.
+    
+    Args:
+        df (pd.DataFrame): DataFrame con los datos
+        column (str): Columna a preparar
+        missing_method (str): Método para los valores nulos (ver ANALYSIS_CONFIG['imputation_methods'])
+        fingerprint (str): Huella del conjunto de datos (`src.cache`, opcional)
+        missing_options (dict): Opciones del método (ver `handle_missing_values`)
+        
+    Returns:
+        tuple: (datos sin nulos, tipo de variable, resumen de la imputación o None)
+    """
+    column_data = df[column]
+    imputation = None
+    if column_data.isna().any():
+        column_data, imputation = handle_missing_values(df, column, missing_method, missing_options, fingerprint)
+        if imputation['Mensaje'].startswith("Error") and missing_method != "Eliminar":
+            column_data, fallback = handle_missing_values(df, column, "Eliminar", fingerprint=fingerprint)
+            fallback.update({'Alternativa a': missing_method, 'Motivo': imputation['Mensaje']})
+            imputation = fallback
+    
+    data = column_data.dropna()
+    variable_type = determine_variable_type(data)
+    if variable_type == "Cualitativa":
+        # Igual que en el análisis univariado: códigos enteros + diccionario
+        data = data.astype('category')
+    return data, variable_type, imputation
+
+
+def _analyze_column_worker(task):
+    """Analiza una columna en un proceso del pool (los errores se devuelven, no se lanzan)."""
+    column, data, variable_type = task
+    try:
+        # El informe no usa el histograma interactivo de Plotly
+        result = compute_univariate_results(data, variable_type, column, interactive=False)
+    except Exception as e:
+        return {'columna': column, 'error': str(e)}
+    # Los datos no se devuelven: el proceso principal ya los tiene
+    return {'columna': column, 'resultado': result}
+
+
+def _missing_summary(imputation):
+    """Texto del tratamiento de nulos de una columna para el resumen del informe."""
+    if imputation is None:
+        return "Sin nulos"
+    if 'Alternativa a' in imputation:
+        return f"{imputation['Método']} (no se pudo usar \"{imputation['Alternativa a']}\": {imputation['Motivo']})"
+    return imputation['Método']
+
+
+@instrumented()
+def build_report_bundle(df, columns, missing_method="Eliminar", missing_options=None, fingerprint=None,
+                        figure_format="svg", max_workers=None, progress=None):
+    """
+    Analiza varias columnas en paralelo y genera el ZIP con el informe conjunto.
+    
+    Args:
+        df (pd.DataFrame): DataFrame con los datos
+        columns (list): Columnas a incluir
+        missing_method (str): Método para los valores nulos de todas las columnas
+                              (las columnas en las que no se puede aplicar eliminan sus nulos)
+        missing_options (dict): Opciones del método (ver `handle_missing_values`)
+        fingerprint (str): Huella del conjunto de datos (`src.cache`, opcional)
+        figure_format (str): 'svg' o 'png' para los gráficos del PDF y del HTML
+        max_workers (int): Número máximo de procesos (None = automático)
+        progress (callable): Función llamada con (fracción, mensaje) (opcional)
+        
+    Returns:
+        tuple: (io.BytesIO con el ZIP, lista con el resumen de cada columna)
+    """
+    prepared = {column: prepare_column(df, column, missing_method, fingerprint, missing_options) for column in columns}
+    tasks = [(column, data, variable_type) for column, (data, variable_type, _) in prepared.items() if not data.empty]
+    
+    def analysis_progress(done, total):
+        if progress is not None:
+            # La última parte de la barra corresponde a la escritura de los archivos
+            progress(0.9 * done / total, f"Columnas analizadas: {done} de {total}")
+    
+    results = {
+        analysis['columna']: analysis
+        for analysis in run_parallel(_analyze_column_worker, tasks, max_workers, progress=analysis_progress)
+    }
+    analyses = []
+    for column in columns:
+        data, variable_type, _ = prepared[column]
+        analysis = results.get(column, {'error': "Sin valores no nulos"})
+        analyses.append(dict(analysis, columna=column, tipo=variable_type, datos=data))
+    
+    if progress is not None:
+        progress(0.9, "Generando Excel, PDF, HTML y R...")
+    bundle = export_report_bundle(analyses, figure_format)
+    if progress is not None:
+        progress(1.0, "Informe listo")
+    
+    summary = [
+        {'Columna': analysis['columna'], 'Tipo': analysis['tipo'], 'N': len(analysis['datos']),
+         'Nulos': _missing_summary(prepared[analysis['columna']][2]),
+         'Estado': analysis.get('error', 'Correcto')}
+        for analysis in analyses
+    ]
+    return bundle, summary
@@ -0,0 +1,211 @@
+"""
+Perfilado de ejecuciones concretas del análisis.
+
+Envuelve un bloque de código con cProfile (o con pyinstrument, si está
+instalado) y devuelve el perfil listo para descargar: el archivo pstats
+(compatible con `pstats`, snakeviz o gprof2dot), un resumen en texto y un
+gráfico de llama en HTML autocontenido. Así se pueden diagnosticar las
+ejecuciones lentas de los analistas sin reproducir sus datos.
+
+cProfile solo perfila el hilo que ejecuta el bloque: el trabajo repartido en
+otros hilos o procesos aparece como el tiempo de espera de la llamada que lo reparte.
+"""
+import cProfile
+import html
+import importlib.util
+import io
+import marshal
+import os
+import pstats
+import time
+import zlib
+from contextlib import contextmanager
+from src.config import PROFILING_CONFIG
+
+
+def available_profilers():
+    """
+    Devuelve los perfiladores disponibles (pyinstrument es opcional).
+    
+    Returns:
+        list: Nombres de los perfiladores
+    """
+    profilers = ['cProfile']
+    if importlib.util.find_spec('pyinstrument') is not None:
+        profilers.append('pyinstrument')
+    return profilers
+
+
+@contextmanager
+def profile_block(name, profiler='cProfile'):
+    """
+    Perfila un bloque de código.
+    
+    Al salir del bloque, el diccionario devuelto contiene 'pstats' (bytes del
+    archivo de perfil, None con pyinstrument), 'texto' (funciones más costosas),
+    'html' (gráfico de llama) y 'duracion' (segundos).
+    
+    Args:
+        name (str): Nombre de la ejecución perfilada
+        profiler (str): 'cProfile' o 'pyinstrument'
+    
+    Example:
+        with profile_block('univariado') as perfil:
+            ...
+        perfil['html']
+    """
+    capture = {'nombre': name, 'perfilador': profiler}
+    start = time.perf_counter()
+    
+    if profiler == 'pyinstrument':
+        from pyinstrument import Profiler
+    
+        session = Profiler(interval=PROFILING_CONFIG['pyinstrument_interval'])
+        session.start()
+        try:
+            yield capture
+        finally:
+            session.stop()
+            capture['duracion'] = time.perf_counter() - start
+            capture['pstats'] = None
+            capture['texto'] = session.output_text()
+            capture['html'] = session.output_html()
+        return
+    
+    session = cProfile.Profile()
+    session.enable()
+    try:
+        yield capture
+    finally:
+        session.disable()
+        capture['duracion'] = time.perf_counter() - start
+        stats = pstats.Stats(session)
+        # Mismo formato que Stats.dump_stats: se puede abrir con pstats.Stats(ruta)
+        capture['pstats'] = marshal.dumps(stats.stats)
+        capture['texto'] = stats_text(stats)
+        capture['html'] = flame_graph_html(stats, name)
+
+
+def stats_text(stats, limit=None):
+    """
+    Resume un perfil con las funciones de mayor tiempo acumulado.
+    
+    Args:
+        stats (pstats.Stats): Estadísticas del perfil
+        limit (int): Número de funciones (por defecto el de PROFILING_CONFIG)
+    
+    Returns:
+        str: Tabla de pstats ordenada por tiempo acumulado
+    """
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats('cumulative').print_stats(limit or PROFILING_CONFIG['text_limit'])
+    return stream.getvalue()
+
+
+def call_tree(stats):
+    """
+    Reconstruye un árbol de llamadas aproximado a partir de un perfil de cProfile.
+    
+    cProfile solo guarda los pares llamador-llamado, no las pilas completas: el
+    tiempo de cada rama es el tiempo acumulado de ese par, limitado al de la
+    rama padre. Se descartan las ramas por debajo de la fracción mínima del
+    total y las llamadas recursivas.
+    
+    Args:
+        stats (pstats.Stats): Estadísticas del perfil
+    
+    Returns:
+        dict: Nodo raíz con 'nombre', 'tiempo' e 'hijos'
+    """
+    raw = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, (_, _, _, cumulative) in callers.items():
+            callees.setdefault(caller, []).append((func, cumulative))
+    
+    # Raíces: tiempo de cada función llamada desde marcos abiertos antes de empezar el perfil
+    # (el acumulado menos el de sus llamadores perfilados, sin contar la recursión)
+    outside = {}
+    for func, (_, _, _, cumulative, callers) in raw.items():
+        if "_lsprof.Profiler" not in func[2]:
+            inside = sum(values[3] for caller, values in callers.items() if caller in raw and caller != func)
+            outside[func] = max(cumulative - inside, 0.0)
+    total = sum(outside.values()) or 1e-9
+    min_time = total * PROFILING_CONFIG['flame_min_fraction']
+    roots = [(func, elapsed) for func, elapsed in outside.items() if elapsed >= min_time]
+    
+    def build(func, elapsed, path, depth):
+        node = {'nombre': _function_label(func), 'tiempo': elapsed, 'hijos': []}
+        if depth >= PROFILING_CONFIG['flame_max_depth']:
+            return node
+        children = [(callee, cumulative) for callee, cumulative in callees.get(func, ())
+                    if callee not in path and cumulative >= min_time]
+        children_total = sum(cumulative for _, cumulative in children)
+        scale = min(1.0, elapsed / children_total) if children_total else 1.0
+        for callee, cumulative in sorted(children, key=lambda item: -item[1]):
+            node['hijos'].append(build(callee, cumulative * scale, path | {callee}, depth + 1))
+        return node
+    
+    return {
+        'nombre': 'total',
+        'tiempo': total,
+        'hijos': [build(func, elapsed, {func}, 1) for func, elapsed in sorted(roots, key=lambda item: -item[1])]
+    }
+
+
+def flame_graph_html(stats, title):
+    """
+    Genera un gráfico de llama (en forma de carámbano) en HTML autocontenido.
+    
+    Args:
+        stats (pstats.Stats): Estadísticas del perfil
+        title (str): Título del gráfico
+    
+    Returns:
+        str: Documento HTML
+    """
+    tree = call_tree(stats)
+    total = tree['tiempo']
+    
+    def render(node, parent_time):
+        width = 100 * node['tiempo'] / parent_time if parent_time else 100
+        label = html.escape(node['nombre'])
+        tooltip = f"{label} — {node['tiempo']:.4f} s ({node['tiempo'] / total:.1%})"
+        hue = zlib.crc32(node['nombre'].split(' ')[0].encode('utf-8')) % 60
+        children = ''.join(render(child, node['tiempo']) for child in node['hijos'])
+        return (f'<div class="nodo" style="width:{width:.4f}%">'
+                f'<div class="barra" style="background:hsl({hue},85%,62%)" title="{tooltip}">{label}</div>'
+                f'<div class="hijos">{children}</div></div>')
+    
+    return f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>Perfil: {html.escape(title)}</title>
+<style>
+    body {{ font-family: Arial, sans-serif; margin: 20px; }}
+    h1 {{ font-size: 1.3rem; color: #1E6091; }}
+    .nodo {{ display: inline-block; vertical-align: top; box-sizing: border-box; }}
+    .hijos {{ display: flex; }}
+    .barra {{ font-size: 11px; line-height: 18px; height: 18px; overflow: hidden; white-space: nowrap;
+              text-overflow: ellipsis; border: 1px solid #fff; padding: 0 3px; cursor: default; }}
+    .barra:hover {{ filter: brightness(0.85); }}
+</style>
+</head>
+<body>
+<h1>🔬 Perfil de {html.escape(title)} — {total:.3f} s</h1>
+<p>Ancho de cada barra: tiempo acumulado de la función llamada desde la barra superior
+(aproximado a partir de los pares llamador-llamado de cProfile). Pase el ratón para ver los tiempos.</p>
+<div class="hijos">{render(tree, total)}</div>
+</body>
+</html>
+"""
+
+
+def _function_label(func):
+    """Nombre legible de una función de pstats: (archivo, línea, nombre)."""
+    filename, line, name = func
+    if filename == '~':  # Funciones integradas
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
@@ -0,0 +1,120 @@
+"""
+Almacén persistente de resultados de análisis.
+
+Guarda en una base SQLite local los resultados completos de un análisis
+(tabla de frecuencia, medidas, cuartiles y gráficos ya renderizados como
+bytes) indexados por la huella de la columna analizada y las opciones del
+análisis. Volver a abrir una columna ya analizada no recalcula nada y los
+resultados sobreviven a un reinicio del servidor.
+"""
+import os
+import pickle
+import sqlite3
+import time
+from contextlib import contextmanager
+from src.cache import derive_fingerprint
+from src.config import STORE_CONFIG
+
+
+def result_key(column_fingerprint, variable_type, options=None):
+    """
+    Calcula la clave de un resultado en el almacén.
+    
+    Args:
+        column_fingerprint (str): Huella de la columna (con su historial de imputación)
+        variable_type (str): Tipo de variable analizado
+        options (dict): Opciones que afectan a los resultados (tema de los gráficos...)
+    
+    Returns:
+        str: Clave hexadecimal del resultado
+    """
+    return derive_fingerprint(column_fingerprint, 'resultado', STORE_CONFIG['version'], variable_type, options or {})
+
+
+def save_result(key, result, path=None):
+    """
+    Guarda un resultado en el almacén.
+    
+    Cuando se supera el número máximo de entradas se eliminan las usadas hace más tiempo.
+    
+    Args:
+        key (str): Clave del resultado (ver `result_key`)
+        result (dict): Resultado serializable con pickle
+        path (str): Ruta de la base de datos (por defecto la de STORE_CONFIG)
+    
+    Returns:
+        bool: True si se guardó, False si el almacén no está disponible
+    """
+    payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+    try:
+        with _connect(path) as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO resultados (clave, datos, usado) VALUES (?, ?, ?)",
+                (key, payload, time.time())
+            )
+            connection.execute(
+                "DELETE FROM resultados WHERE clave NOT IN "
+                "(SELECT clave FROM resultados ORDER BY usado DESC LIMIT ?)",
+                (STORE_CONFIG['max_entries'],)
+            )
+        return True
+    except (sqlite3.Error, OSError):
+        return False
+
+
+def load_result(key, path=None):
+    """
+    Recupera un resultado del almacén.
+    
+    Args:
+        key (str): Clave del resultado
+        path (str): Ruta de la base de datos (por defecto la de STORE_CONFIG)
+    
+    Returns:
+        dict: Resultado guardado, o None si no existe o no se puede leer
+    """
+    try:
+        with _connect(path) as connection:
+            row = connection.execute("SELECT datos FROM resultados WHERE clave = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            connection.execute("UPDATE resultados SET usado = ? WHERE clave = ?", (time.time(), key))
+        return pickle.loads(row[0])
+    except (sqlite3.Error, OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+
+def clear_results(path=None):
+    """
+    Elimina todos los resultados del almacén.
+    
+    Args:
+        path (str): Ruta de la base de datos (por defecto la de STORE_CONFIG)
+    
+    Returns:
+        int: Número de resultados eliminados
+    """
+    try:
+        with _connect(path) as connection:
+            return connection.execute("DELETE FROM resultados").rowcount
+    except (sqlite3.Error, OSError):
+        return 0
+
+
+@contextmanager
+def _connect(path=None):
+    """Abre la base de datos del almacén (creando la tabla si no existe) dentro de una transacción."""
+    path = path or STORE_CONFIG['path']
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    connection = sqlite3.connect(path, timeout=STORE_CONFIG['timeout'])
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS resultados (clave TEXT PRIMARY KEY, datos BLOB NOT NULL, usado REAL NOT NULL)"
+    )
+    try:
+        with connection:
+            yield connection
+    finally:
+        connection.close()
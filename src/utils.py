@@ -1,12 +1,23 @@
 """
 Utilidades y funciones auxiliares para el análisis estadístico.
 """
+import csv
+import importlib.util
+import io
+import os
+import re
 import pandas as pd
 import numpy as np
-import streamlit as st
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from pickle import PicklingError
+from src.cache import cached_result, column_fingerprint, content_fingerprint, derive_fingerprint, fingerprint_bytes
+from src.config import ANALYSIS_CONFIG, FILE_CONFIG
+from src.instrumentation import instrumented
 
 
+@instrumented()
 def detect_and_convert_dates(data):
     """
     Detecta si una columna contiene fechas y las convierte a formato numérico.
@@ -87,6 +98,7 @@ def detect_and_convert_dates(data):
     return False, data, {}
 
 
+@instrumented()
 def determine_variable_type(data):
     """
     Determina el tipo de variable basándose en los datos con análisis mejorado.
@@ -188,48 +200,241 @@ def determine_variable_type(data):
                 return "Cuantitativa Discreta con Intervalos"
 
 
-def handle_missing_values(df, column, method):
+# Imputaciones ya calculadas, indexadas por la huella de la columna imputada
+_IMPUTATION_CACHE = {}
+
+
+def _ordering_key(data):
     """
-    Maneja los valores nulos en un DataFrame según el método especificado.
+    Obtiene una clave numérica de orden a partir de una columna de fechas o numérica.
     
-    Args:
-        df (pd.DataFrame): DataFrame con los datos
-        column (str): Nombre de la columna a procesar
-        method (str): Método para manejar nulos ("Eliminar", "Reemplazar por la media", etc.)
-        
     Returns:
-        tuple: (DataFrame procesado, mensaje de resultado)
+        np.ndarray | None: Clave de orden (NaN donde falta la fecha) o None si
+                           la columna no contiene fechas ni números
     """
-    missing_count = df[column].isna().sum()
+    if pd.api.types.is_datetime64_any_dtype(data):
+        # asi8: instantes como enteros (en UTC si la columna tiene zona horaria)
+        return np.where(data.isna(), np.nan, data.array.asi8.astype(float))
+    if pd.api.types.is_numeric_dtype(data):
+        return data.to_numpy(dtype=float, na_value=np.nan)
     
-    if missing_count == 0:
-        return df, "No hay valores nulos en la columna."
+    is_date, days, _ = detect_and_convert_dates(data)
+    if not is_date:
+        return None
+    return days.reindex(data.index).to_numpy(dtype=float, na_value=np.nan)
+
+
+def _group_fill(data, groups, statistic):
+    """Rellena con la media/mediana de cada grupo; los grupos sin datos usan el valor global."""
+    group_values = data.groupby(groups, observed=True, sort=False).transform(statistic)
+    global_value = data.mean() if statistic == 'mean' else data.median()
+    return data.fillna(group_values).fillna(global_value)
+
+
+def _ordered_fill(data, order_key, method):
+    """
+    Propaga o interpola valores siguiendo el orden de `order_key`.
+    
+    Solo se reordena la columna procesada (un índice de posiciones), sin
+    ordenar ni copiar el DataFrame completo. La interpolación usa los valores
+    de la clave (fechas desigualmente espaciadas incluidas); las filas sin
+    clave toman el valor más cercano en el orden.
+    """
+    order = np.argsort(order_key, kind='stable')  # Fechas faltantes al final
+    ordered = data.iloc[order]
+    if method == 'ffill':
+        filled = ordered.ffill()
+    elif method == 'bfill':
+        filled = ordered.bfill()
+    else:
+        keys = np.asarray(order_key, dtype=float)[order]
+        known = ~np.isnan(keys)
+        filled = ordered.astype(float)
+        by_key = pd.Series(filled.to_numpy()[known], index=keys[known])
+        filled.iloc[np.flatnonzero(known)] = by_key.interpolate(method='index', limit_direction='both').to_numpy()
+        filled = filled.interpolate(method='linear', limit_direction='both')
+    
+    result = data.copy()
+    result.iloc[order] = filled.to_numpy()
+    return result
+
+
+def _knn_fill(data, features, k):
+    """
+    Imputa con la media de los k vecinos más cercanos en las columnas de apoyo.
+    
+    Las columnas de apoyo se estandarizan y los vecinos se buscan con un
+    cKDTree. El índice usa como máximo `knn_max_reference` filas de
+    referencia (muestra reproducible) y las consultas se hacen por bloques,
+    de modo que la memoria queda acotada con cualquier tamaño de archivo.
+    """
+    from scipy.spatial import cKDTree
+    
+    matrix = features.to_numpy(dtype=float, na_value=np.nan)
+    target = data.to_numpy(dtype=float, na_value=np.nan)
+    complete = ~np.isnan(matrix).any(axis=1)
+    reference = np.flatnonzero(complete & ~np.isnan(target))
+    queries = np.flatnonzero(complete & np.isnan(target))
+    
+    result = data.copy()
+    if len(reference) == 0 or len(queries) == 0:
+        return result
+    
+    max_reference = ANALYSIS_CONFIG['knn_max_reference']
+    if len(reference) > max_reference:
+        rng = np.random.default_rng(ANALYSIS_CONFIG['random_seed'])
+        reference = np.sort(rng.choice(reference, max_reference, replace=False))
+    
+    center = matrix[reference].mean(axis=0)
+    scale = matrix[reference].std(axis=0)
+    scale[scale == 0] = 1.0
+    tree = cKDTree((matrix[reference] - center) / scale)
+    k = min(k, len(reference))
+    
+    imputed = np.empty(len(queries))
+    chunk = ANALYSIS_CONFIG['knn_query_chunk']
+    for start in range(0, len(queries), chunk):
+        rows = queries[start:start + chunk]
+        _, neighbors = tree.query((matrix[rows] - center) / scale, k=k)
+        neighbors = neighbors.reshape(len(rows), k)
+        imputed[start:start + chunk] = target[reference[neighbors]].mean(axis=1)
+    
+    result.iloc[queries] = imputed
+    return result
+
+
+def _impute_column(df, data, method, options, missing_count):
+    """Aplica el método de imputación a una serie y devuelve (serie, valor de relleno, mensaje)."""
+    is_numeric = pd.api.types.is_numeric_dtype(data)
     
     if method == "Eliminar":
-        df_clean = df.dropna(subset=[column])
-        return df_clean, f"Se eliminaron {missing_count} filas con valores nulos."
+        return data.dropna(), None, f"Se eliminaron {missing_count} filas con valores nulos."
     
     elif method == "Reemplazar por la media":
-        if pd.api.types.is_numeric_dtype(df[column]):
-            df[column] = df[column].fillna(df[column].mean())
-            return df, f"Se reemplazaron {missing_count} valores nulos por la media."
+        if is_numeric:
+            fill_value = data.mean()
+            return data.fillna(fill_value), fill_value, f"Se reemplazaron {missing_count} valores nulos por la media."
         else:
-            return df, "Error: No se puede calcular la media para variables no numéricas."
+            return data, None, "Error: No se puede calcular la media para variables no numéricas."
     
     elif method == "Reemplazar por la mediana":
-        if pd.api.types.is_numeric_dtype(df[column]):
-            df[column] = df[column].fillna(df[column].median())
-            return df, f"Se reemplazaron {missing_count} valores nulos por la mediana."
+        if is_numeric:
+            fill_value = data.median()
+            return data.fillna(fill_value), fill_value, f"Se reemplazaron {missing_count} valores nulos por la mediana."
         else:
-            return df, "Error: No se puede calcular la mediana para variables no numéricas."
+            return data, None, "Error: No se puede calcular la mediana para variables no numéricas."
     
     elif method == "Reemplazar por cero":
-        df[column] = df[column].fillna(0)
-        return df, f"Se reemplazaron {missing_count} valores nulos por cero."
+        return data.fillna(0), 0, f"Se reemplazaron {missing_count} valores nulos por cero."
+    
+    elif method in ("Media por grupo", "Mediana por grupo"):
+        group_column = options.get('group_column')
+        if not is_numeric:
+            return data, None, "Error: La imputación por grupo requiere una variable numérica."
+        if group_column is None:
+            return data, None, "Error: Seleccione la columna que define los grupos."
+        statistic = 'mean' if method == "Media por grupo" else 'median'
+        return (_group_fill(data, df[group_column], statistic), None,
+                f"Se reemplazaron {missing_count} valores nulos por la {'media' if statistic == 'mean' else 'mediana'} "
+                f"de cada grupo de '{group_column}'.")
     
-    return df, "Método no reconocido."
+    elif method in ("Propagar hacia adelante", "Propagar hacia atrás", "Interpolación lineal"):
+        date_column = options.get('date_column')
+        if method == "Interpolación lineal" and not is_numeric:
+            return data, None, "Error: No se puede interpolar una variable no numérica."
+        if date_column is None:
+            order_key = np.arange(len(data), dtype=float)  # Orden de las filas
+        else:
+            order_key = _ordering_key(df[date_column])
+            if order_key is None:
+                return data, None, f"Error: La columna '{date_column}' no contiene fechas ni valores numéricos."
+        fill = {"Propagar hacia adelante": 'ffill', "Propagar hacia atrás": 'bfill'}.get(method, 'linear')
+        result = _ordered_fill(data, order_key, fill)
+        order_text = f" según '{date_column}'" if date_column is not None else ""
+        return (result, None,
+                f"Se reemplazaron {missing_count - int(result.isna().sum())} valores nulos ({method.lower()}{order_text}).")
+    
+    elif method == "K vecinos más cercanos":
+        neighbor_columns = options.get('neighbor_columns') or []
+        if not is_numeric:
+            return data, None, "Error: La imputación por vecinos requiere una variable numérica."
+        if not neighbor_columns:
+            return data, None, "Error: Seleccione al menos una columna numérica de apoyo."
+        k = options.get('k', ANALYSIS_CONFIG['knn_neighbors'])
+        result = _knn_fill(data, df[neighbor_columns], k)
+        return (result, None,
+                f"Se reemplazaron {missing_count - int(result.isna().sum())} valores nulos con la media de "
+                f"los {k} vecinos más cercanos.")
+    
+    return data, None, "Método no reconocido."
+
+
+@instrumented()
+def handle_missing_values(df, column, method, options=None, fingerprint=None):
+    """
+    Maneja los valores nulos de una columna según el método especificado.
+    
+    Solo se materializa la columna procesada: el DataFrame de origen no se
+    copia ni se modifica, de modo que puede seguir compartiéndose (por
+    ejemplo, el DataFrame en caché de `load_csv_file`). El resultado se
+    guarda en caché con la huella de la columna imputada, derivada de la del
+    conjunto de datos, el método y las opciones.
+    
+    Args:
+        df (pd.DataFrame): DataFrame con los datos
+        column (str): Nombre de la columna a procesar
+        method (str): Método para manejar nulos (ver ANALYSIS_CONFIG['imputation_methods'])
+        options (dict): Opciones de los métodos avanzados:
+            - group_column: columna que define los grupos (media/mediana por grupo)
+            - date_column: columna de fechas que ordena la propagación o interpolación
+            - neighbor_columns: columnas numéricas de apoyo (k vecinos)
+            - k: número de vecinos
+        fingerprint (str): Huella del conjunto de datos (`src.cache`); sin ella
+                           se calcula a partir del contenido de las columnas
+        
+    Returns:
+        tuple: (serie procesada de la columna, registro de la imputación con
+                columna, método, opciones, valores nulos, valor de relleno,
+                nulos restantes, filas resultantes, mensaje y huella de la
+                columna resultante)
+    """
+    options = options or {}
+    data = df[column]
+    missing_count = int(data.isna().sum())
+    
+    support_columns = [options[name] for name in ('group_column', 'date_column') if options.get(name) is not None]
+    support_columns += list(options.get('neighbor_columns') or [])
+    if fingerprint is not None:
+        source = [column_fingerprint(fingerprint, name) for name in [column] + support_columns]
+    else:
+        source = [content_fingerprint(df[name]) for name in [column] + support_columns]
+    result_fingerprint = derive_fingerprint(source[0], 'imputación', method, options, source[1:])
+    
+    if missing_count == 0:
+        result, fill_value, message = data, None, "No hay valores nulos en la columna."
+        result_fingerprint = source[0]
+    else:
+        result, fill_value, message = cached_result(
+            _IMPUTATION_CACHE, result_fingerprint,
+            lambda: _impute_column(df, data, method, options, missing_count),
+            ANALYSIS_CONFIG['imputation_cache_size']
+        )
+    
+    record = {
+        'Columna': column,
+        'Método': method,
+        'Opciones': options,
+        'Valores nulos': missing_count,
+        'Valor de relleno': fill_value,
+        'Nulos restantes': int(result.isna().sum()),
+        'Filas resultantes': len(result),
+        'Mensaje': message,
+        'Huella': result_fingerprint,
+    }
+    return result.rename(column), record
 
 
+@instrumented()
 def prepare_data_for_correlation(df, columns_to_analyze=None):
     """
     Prepara un DataFrame para análisis de correlación, detectando y convirtiendo fechas.
@@ -280,35 +485,559 @@ def prepare_data_for_correlation(df, columns_to_analyze=None):
     return df_numeric, conversion_info
 
 
-@st.cache_data
-def load_csv_file(file, separator, decimal, encoding):
+_NUMBER_DOT = re.compile(r'^[-+]?\d*\.\d+$|^[-+]?\d+$')
+_NUMBER_COMMA = re.compile(r'^[-+]?\d*,\d+$')
+
+
+def _is_number(field, decimal):
+    """Indica si un campo de texto es un número con el separador decimal dado."""
+    field = field.strip()
+    if decimal == ',':
+        return bool(_NUMBER_COMMA.match(field) or re.match(r'^[-+]?\d+$', field))
+    return bool(_NUMBER_DOT.match(field))
+
+
+def _detect_encoding(sample, truncated):
+    """Detecta la codificación de una muestra de bytes entre las admitidas."""
+    if sample.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return 'utf-16'
+    
+    if truncated:
+        # Evitar cortar un carácter multibyte al final de la muestra
+        last_newline = sample.rfind(b'\n')
+        if last_newline > 0:
+            sample = sample[:last_newline]
+    
+    try:
+        sample.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+def _detect_separator(lines):
+    """
+    Elige el separador cuyo número de campos es más constante entre líneas.
+    
+    En caso de empate se sigue el orden de FILE_CONFIG['separators'], salvo
+    que la coma compita con un separador cuyos campos usan coma decimal.
+    """
+    candidates = []
+    for priority, separator in enumerate(FILE_CONFIG['separators']):
+        rows = list(csv.reader(lines, delimiter=separator))
+        counts = pd.Series([len(row) for row in rows])
+        fields = int(counts.mode().iloc[0])
+        if fields < 2:
+            continue
+        consistency = float((counts == fields).mean())
+        comma_decimals = any(_NUMBER_COMMA.match(value.strip()) for row in rows for value in row)
+        candidates.append((consistency, comma_decimals, -priority, separator))
+    
+    if not candidates:
+        return FILE_CONFIG['separators'][0]
+    
+    best_consistency = max(candidate[0] for candidate in candidates)
+    tied = [candidate for candidate in candidates if candidate[0] == best_consistency]
+    return max(tied, key=lambda candidate: (candidate[1] and candidate[3] != ',', candidate[2]))[3]
+
+
+def _detect_decimal(rows, separator):
+    """Detecta el separador decimal por mayoría de campos numéricos."""
+    if separator == ',':
+        return '.'
+    
+    values = [value.strip() for row in rows for value in row]
+    comma = sum(1 for value in values if _NUMBER_COMMA.match(value))
+    dot = sum(1 for value in values if re.match(r'^[-+]?\d*\.\d+$', value))
+    return ',' if comma > dot else '.'
+
+
+def _detect_header(rows, decimal):
+    """
+    Detecta si la primera fila es un encabezado.
+    
+    Se considera que no hay encabezado solo si, en las columnas que son
+    numéricas en el resto de filas, la primera fila también es numérica.
+    """
+    if len(rows) < 2:
+        return True
+    
+    first, body = rows[0], rows[1:]
+    numeric_columns = []
+    for column in range(len(first)):
+        values = [row[column] for row in body if column < len(row) and row[column].strip()]
+        if values and sum(_is_number(value, decimal) for value in values) / len(values) >= 0.9:
+            numeric_columns.append(column)
+    
+    if not numeric_columns:
+        return True
+    return not all(_is_number(first[column], decimal) for column in numeric_columns)
+
+
+@instrumented()
+def sniff_csv_options(file, sample_size=None):
+    """
+    Detecta separador, separador decimal, codificación y encabezado de un CSV.
+    
+    Solo se inspeccionan los primeros `sniff_sample_kb` KB del archivo, de
+    modo que el archivo completo se analiza una única vez con las opciones
+    detectadas.
+    
+    Args:
+        file: Archivo subido, objeto tipo archivo o contenido en bytes
+        sample_size (int): Bytes a inspeccionar (None = FILE_CONFIG['sniff_sample_kb'])
+        
+    Returns:
+        dict: Opciones detectadas ('separator', 'decimal', 'encoding', 'header')
+    """
+    if sample_size is None:
+        sample_size = FILE_CONFIG['sniff_sample_kb'] * 1024
+    
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        sample = bytes(file[:sample_size + 1])
+    else:
+        position = file.tell()
+        sample = file.read(sample_size + 1)
+        file.seek(position)
+    truncated = len(sample) > sample_size
+    sample = sample[:sample_size]
+    
+    encoding = _detect_encoding(sample, truncated)
+    text = sample.decode(encoding, errors='ignore')
+    
+    lines = [line for line in text.splitlines() if line.strip()]
+    if truncated and len(lines) > 1:
+        lines = lines[:-1]  # La última línea puede estar incompleta
+    lines = lines[:FILE_CONFIG['sniff_max_lines']]
+    
+    separator = _detect_separator(lines)
+    rows = list(csv.reader(lines, delimiter=separator))
+    decimal = _detect_decimal(rows[1:] or rows, separator)
+    header = _detect_header(rows, decimal)
+    
+    return {
+        'separator': separator,
+        'decimal': decimal,
+        'encoding': encoding,
+        'header': header,
+    }
+
+
+# Opciones de lectura que el motor de Arrow no admite
+_ARROW_UNSUPPORTED_OPTIONS = ('nrows', 'skipfooter', 'chunksize', 'thousands', 'comment')
+
+
+def _arrow_engine_supported(separator, options):
+    """Indica si un CSV puede leerse con el motor de Arrow con las opciones dadas."""
+    if importlib.util.find_spec('pyarrow') is None:
+        return False
+    if len(separator) != 1:  # Arrow no admite separadores de varios caracteres
+        return False
+    return not any(option in options for option in _ARROW_UNSUPPORTED_OPTIONS)
+
+
+def _read_csv_arrow(source, separator, decimal, encoding, header, usecols, **kwargs):
+    """
+    Lee un CSV con el motor multihilo de Arrow.
+    
+    Arrow descarta en silencio las columnas con nombre repetido y no admite
+    posiciones en `usecols`, así que primero se lee la fila de encabezado y se
+    pasan nombres explícitos. Devuelve None si el archivo requiere el motor de C.
+    """
+    start = source.tell()
+    first_row = pd.read_csv(source, sep=separator, encoding=encoding, header=None,
+                            nrows=1, dtype=str).iloc[0]
+    source.seek(start)
+    
+    if header:
+        names = first_row.tolist()
+        if first_row.isna().any() or len(set(names)) != len(names):
+            return None
+    else:
+        names = [f"Columna_{i + 1}" for i in range(len(first_row))]
+    
+    if usecols is not None:
+        usecols = [names[i] for i in sorted(usecols)]
+    if isinstance(kwargs.get('dtype'), dict):
+        kwargs['dtype'] = {names[i]: dtype for i, dtype in kwargs['dtype'].items()}
+    
+    return pd.read_csv(source, sep=separator, decimal=decimal, encoding=encoding,
+                       header=0 if header else None, names=names, usecols=usecols,
+                       engine='pyarrow', **kwargs)
+
+
+def _read_csv(source, separator, decimal, encoding, header=True, usecols=None, engine='c', **kwargs):
+    """
+    Lee un CSV; sin encabezado, las columnas se nombran Columna_1, Columna_2, ...
+    
+    `usecols` indica posiciones de columna, de modo que los nombres generados
+    conservan la posición original. Con `engine='pyarrow'` se usa el lector
+    multihilo de Arrow y, si las opciones o el archivo no son compatibles,
+    se vuelve al motor de C.
+    """
+    if engine == 'pyarrow' and _arrow_engine_supported(separator, kwargs):
+        start = source.tell()
+        try:
+            df = _read_csv_arrow(source, separator, decimal, encoding, header, usecols, **kwargs)
+            if df is not None:
+                return df
+        except ValueError:
+            pass  # Filas irregulares u opciones no soportadas por Arrow
+        source.seek(start)
+    
+    df = pd.read_csv(source, sep=separator, decimal=decimal, encoding=encoding,
+                     header=0 if header else None, usecols=usecols, **kwargs)
+    if not header:
+        positions = sorted(usecols) if usecols is not None else range(df.shape[1])
+        df.columns = [f"Columna_{i + 1}" for i in positions]
+    return df
+
+
+@instrumented()
+def load_csv_file(file, separator, decimal, encoding, header=True, engine='c', fingerprint=None):
     """
     Carga un archivo CSV con caché.
     
+    La caché se indexa por la huella del archivo, de modo que en cada recarga
+    no se vuelve a hashear su contenido.
+    
     Args:
         file: Archivo subido
         separator (str): Separador de columnas
         decimal (str): Separador decimal
         encoding (str): Codificación del archivo
+        header (bool): Si la primera fila contiene los nombres de las columnas
+        engine (str): Motor de lectura ('c' o 'pyarrow')
+        fingerprint (str): Huella del archivo (`fingerprint_bytes`); si no se
+                           indica, se calcula a partir del contenido
         
     Returns:
         pd.DataFrame: DataFrame cargado
     """
-    return pd.read_csv(file, sep=separator, decimal=decimal, encoding=encoding)
+    if fingerprint is None:
+        fingerprint = fingerprint_bytes(_file_content(file))
+    key = derive_fingerprint(fingerprint, 'csv', separator, decimal, encoding, header, engine)
+    df = cached_result(
+        _LOAD_CACHE, key, lambda: _read_csv(file, separator, decimal, encoding, header, engine=engine),
+        FILE_CONFIG['load_cache_entries']
+    )
+    return df.copy(deep=False)
+
+
+# Conjuntos cargados por huella del archivo y opciones de lectura. Se devuelven
+# copias superficiales: con copy-on-write, modificarlas no altera la caché.
+_LOAD_CACHE = {}
+
+
+# Columnas ya cargadas en el modo por columnas, por archivo
+_COLUMN_CACHE = {}
+
+
+def _file_content(file):
+    """Obtiene el contenido en bytes de un archivo subido, objeto tipo archivo o bytes."""
+    if isinstance(file, (bytes, bytearray)):
+        return bytes(file)
+    if hasattr(file, 'getvalue'):
+        return file.getvalue()
+    position = file.tell()
+    content = file.read()
+    file.seek(position)
+    return content
+
+
+def read_csv_header(file, separator, decimal, encoding, header=True):
+    """
+    Lee únicamente los nombres de las columnas de un CSV.
+    
+    Args:
+        file: Archivo subido, objeto tipo archivo o contenido en bytes
+        separator (str): Separador de columnas
+        decimal (str): Separador decimal
+        encoding (str): Codificación del archivo
+        header (bool): Si la primera fila contiene los nombres de las columnas
+        
+    Returns:
+        list: Nombres de las columnas en el orden del archivo
+    """
+    content = _file_content(file)
+    return _read_csv(io.BytesIO(content), separator, decimal, encoding, header, nrows=0 if header else 1).columns.tolist()
+
+
+@instrumented()
+def read_csv_rows(content, columns, separator, decimal, encoding, engine='c', text_columns=()):
+    """
+    Lee un fragmento de CSV sin encabezado (por ejemplo, las filas añadidas a un archivo).
+    
+    Args:
+        content (bytes): Filas del CSV, sin la línea de encabezado
+        columns (list): Nombres de las columnas del archivo completo
+        separator (str): Separador de columnas
+        decimal (str): Separador decimal
+        encoding (str): Codificación del archivo
+        engine (str): Motor de lectura ('c' o 'pyarrow')
+        text_columns (list): Columnas que se leen como texto aunque parezcan numéricas
+    
+    Returns:
+        pd.DataFrame: Filas leídas con los nombres de `columns`
+    """
+    dtype = {columns.index(col): str for col in text_columns} or None
+    df = _read_csv(io.BytesIO(content), separator, decimal, encoding, header=False, engine=engine, dtype=dtype)
+    return df.rename(columns={f"Columna_{i + 1}": column for i, column in enumerate(columns)})
+
+
+def compact_series(data):
+    """
+    Convierte una serie al tipo más compacto que no pierde información.
+    
+    - float64 → float32 si todos los valores son representables exactamente
+    - int64 → int32 si el rango lo permite (con margen para restar valores)
+    - texto → category si hay pocos valores distintos
+    
+    Args:
+        data (pd.Series): Serie a convertir
+        
+    Returns:
+        pd.Series: Serie con el tipo compacto (o la original si no aplica)
+    """
+    if pd.api.types.is_float_dtype(data) and data.dtype == np.float64:
+        values = data.to_numpy()
+        if np.array_equal(values, values.astype(np.float32).astype(np.float64), equal_nan=True):
+            return data.astype(np.float32)
+    
+    elif pd.api.types.is_integer_dtype(data) and data.dtype.itemsize > 4 and len(data) > 0:
+        if data.min() >= -2**30 and data.max() < 2**30:
+            return data.astype(np.int32)
+    
+    elif data.dtype == object or pd.api.types.is_string_dtype(data):
+        non_null = data.dropna()
+        if (len(non_null) > 0 and pd.api.types.infer_dtype(non_null) == 'string'
+                and non_null.nunique() <= FILE_CONFIG['category_max_ratio'] * len(non_null)):
+            return data.astype('category')
+    
+    return data
+
+
+def _dtype_hints(content, positions, separator, decimal, encoding, header):
+    """
+    Infiere tipos 'category' para columnas de texto a partir de una muestra de filas.
+    
+    Permite que pandas construya directamente las columnas categóricas al
+    leer, sin materializar primero todas las cadenas.
+    """
+    sample = _read_csv(io.BytesIO(content), separator, decimal, encoding, header,
+                       usecols=positions, nrows=FILE_CONFIG['dtype_sample_rows'])
+    hints = {}
+    for position, column in zip(sorted(positions), sample.columns):
+        if compact_series(sample[column]).dtype == 'category':
+            hints[position] = 'category'
+    return hints
+
+
+@instrumented()
+def load_csv_columns(file, columns, separator, decimal, encoding, header=True, engine='c', fingerprint=None):
+    """
+    Carga solo las columnas indicadas de un CSV, con tipos compactos.
+    
+    Las columnas ya cargadas de un mismo archivo se conservan en memoria, de
+    modo que al pedir columnas nuevas solo se analizan esas columnas.
+    
+    Args:
+        file: Archivo subido, objeto tipo archivo o contenido en bytes
+        columns (list): Nombres de las columnas a cargar
+        separator (str): Separador de columnas
+        decimal (str): Separador decimal
+        encoding (str): Codificación del archivo
+        header (bool): Si la primera fila contiene los nombres de las columnas
+        engine (str): Motor de lectura ('c' o 'pyarrow')
+        fingerprint (str): Huella del archivo (`fingerprint_bytes`); si no se
+                           indica, se calcula a partir del contenido
+        
+    Returns:
+        pd.DataFrame: DataFrame con las columnas solicitadas, en ese orden
+    """
+    content = _file_content(file)
+    if fingerprint is None:
+        fingerprint = fingerprint_bytes(content)
+    key = derive_fingerprint(fingerprint, separator, decimal, encoding, header, engine)
+    loaded = _COLUMN_CACHE.pop(key, {})
+    _COLUMN_CACHE[key] = loaded  # Marcar como el archivo usado más recientemente
+    while len(_COLUMN_CACHE) > FILE_CONFIG['column_cache_files']:
+        _COLUMN_CACHE.pop(next(iter(_COLUMN_CACHE)))
+    
+    missing = [column for column in columns if column not in loaded]
+    if missing:
+        all_columns = read_csv_header(content, separator, decimal, encoding, header)
+        positions = [all_columns.index(column) for column in missing]
+        hints = _dtype_hints(content, positions, separator, decimal, encoding, header)
+        parsed = _read_csv(io.BytesIO(content), separator, decimal, encoding, header,
+                           usecols=positions, engine=engine, dtype=hints)
+        for column in parsed.columns:
+            loaded[column] = compact_series(parsed[column])
+    
+    return pd.DataFrame({column: loaded[column] for column in columns})
 
 
-@st.cache_data
-def load_excel_file(file):
+@instrumented()
+def load_excel_file(file, sheet_name=0, fingerprint=None):
     """
-    Carga un archivo Excel con caché.
+    Carga un archivo Excel con caché indexada por la huella del archivo.
     
     Args:
         file: Archivo subido
+        sheet_name (str | int): Hoja a cargar (por defecto la primera)
+        fingerprint (str): Huella del archivo (`fingerprint_bytes`); si no se
+                           indica, se calcula a partir del contenido
         
     Returns:
         pd.DataFrame: DataFrame cargado
     """
-    return pd.read_excel(file)
+    if fingerprint is None:
+        fingerprint = fingerprint_bytes(_file_content(file))
+    key = derive_fingerprint(fingerprint, 'excel', sheet_name)
+    df = cached_result(
+        _LOAD_CACHE, key, lambda: pd.read_excel(file, sheet_name=sheet_name), FILE_CONFIG['load_cache_entries']
+    )
+    return df.copy(deep=False)
+
+
+def list_excel_sheets(content):
+    """
+    Obtiene los nombres de las hojas de un libro Excel sin cargar su contenido.
+    
+    Args:
+        content (bytes): Contenido del archivo Excel
+        
+    Returns:
+        list: Nombres de las hojas en el orden del libro
+    """
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(io.BytesIO(content), read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
+def _read_excel_sheet(item):
+    """Lee una hoja de un libro Excel (apto para procesos)."""
+    content, sheet_name = item
+    return pd.read_excel(io.BytesIO(content), sheet_name=sheet_name)
+
+
+def _read_csv_content(item):
+    """
+    Lee el contenido de un archivo CSV/TXT con las opciones indicadas.
+    
+    Si el separador es None, las opciones se detectan con `sniff_csv_options`.
+    """
+    content, separator, decimal, encoding, engine = item
+    header = True
+    if separator is None:
+        options = sniff_csv_options(content)
+        separator, decimal = options['separator'], options['decimal']
+        encoding, header = options['encoding'], options['header']
+    
+    return _read_csv(io.BytesIO(content), separator, decimal, encoding, header, engine=engine)
+
+
+@instrumented()
+def load_multiple_files(files, separator=',', decimal='.', encoding='utf-8', max_workers=None, engine='c',
+                        fingerprint=None):
+    """
+    Carga varios archivos CSV/TXT/XLSX, incluidas todas las hojas de cada libro.
+    
+    Las hojas de Excel se leen en paralelo en un pool de procesos (el análisis
+    con openpyxl está limitado por el GIL) y los CSV en un pool de hilos.
+    
+    Args:
+        files (list): Lista de tuplas (nombre del archivo, contenido en bytes o archivo subido)
+        separator (str): Separador de columnas para CSV/TXT
+                         (None = detectar las opciones de cada archivo)
+        decimal (str): Separador decimal para CSV/TXT
+        encoding (str): Codificación para CSV/TXT
+        max_workers (int): Número máximo de trabajadores (None = automático)
+        engine (str): Motor de lectura para CSV/TXT ('c' o 'pyarrow')
+        fingerprint (str): Huella del conjunto de archivos (`files_fingerprint`);
+                           si no se indica, se calcula a partir del contenido
+        
+    Returns:
+        dict: Conjuntos de datos por nombre ("archivo" o "archivo - hoja"),
+              en el orden de carga
+    """
+    if fingerprint is None:
+        fingerprint = files_fingerprint([(name, fingerprint_bytes(_file_content(content))) for name, content in files])
+    key = derive_fingerprint(fingerprint, 'varios', separator, decimal, encoding, engine)
+    datasets = cached_result(
+        _LOAD_CACHE, key, lambda: _load_multiple_files(files, separator, decimal, encoding, max_workers, engine),
+        FILE_CONFIG['load_cache_entries']
+    )
+    return {name: df.copy(deep=False) for name, df in datasets.items()}
+
+
+def files_fingerprint(files):
+    """
+    Combina las huellas de varios archivos en una sola.
+    
+    Args:
+        files (list): Lista de tuplas (nombre del archivo, huella del archivo)
+        
+    Returns:
+        str: Huella del conjunto de archivos
+    """
+    return derive_fingerprint('archivos', list(files))
+
+
+def _load_multiple_files(files, separator, decimal, encoding, max_workers, engine):
+    """Lectura sin caché de `load_multiple_files`."""
+    excel_names, excel_tasks = [], []
+    csv_names, csv_tasks = [], []
+    order = []
+    
+    for name, content in files:
+        content = _file_content(content)
+        if name.lower().endswith('.xlsx'):
+            sheets = list_excel_sheets(content)
+            for sheet in sheets:
+                dataset_name = f"{name} - {sheet}" if len(sheets) > 1 else name
+                excel_names.append(dataset_name)
+                excel_tasks.append((content, sheet))
+                order.append(dataset_name)
+        else:
+            csv_names.append(name)
+            csv_tasks.append((content, separator, decimal, encoding, engine))
+            order.append(name)
+    
+    frames = dict(zip(excel_names, run_parallel(_read_excel_sheet, excel_tasks, max_workers)))
+    frames.update(zip(csv_names, run_parallel(_read_csv_content, csv_tasks, max_workers, use_processes=False)))
+    
+    return {name: frames[name] for name in order}
+
+
+@instrumented()
+def combine_datasets(datasets, source_column=None):
+    """
+    Combina varios conjuntos de datos en uno, agregando una columna de origen.
+    
+    Las columnas que no existen en algún conjunto quedan como valores nulos.
+    
+    Args:
+        datasets (dict): Conjuntos de datos por nombre
+        source_column (str): Nombre de la columna de origen
+                             (None = FILE_CONFIG['source_column'])
+        
+    Returns:
+        pd.DataFrame: DataFrame combinado con la columna de origen al inicio
+    """
+    if source_column is None:
+        source_column = FILE_CONFIG['source_column']
+    
+    combined = pd.concat(datasets.values(), ignore_index=True, sort=False)
+    while source_column in combined.columns:
+        source_column = f"{source_column}_"
+    origin = np.repeat(np.arange(len(datasets)), [len(df) for df in datasets.values()])
+    combined.insert(0, source_column, pd.Categorical.from_codes(origin, categories=list(datasets)))
+    return combined
 
 
 def format_number(value, decimals=2):
@@ -375,3 +1104,56 @@ def get_categorical_columns(df):
         list: Lista de nombres de columnas categóricas
     """
     return df.select_dtypes(include=['object', 'category']).columns.tolist()
+
+
+def run_parallel(func, items, max_workers=None, use_processes=True, progress=None):
+    """
+    Aplica una función a cada elemento usando un pool de trabajadores.
+    
+    Con pocos elementos, un solo núcleo o si el pool no puede crearse,
+    se ejecuta en serie con el mismo resultado.
+    
+    Args:
+        func (callable): Función definida a nivel de módulo (serializable)
+        items (list): Elementos a procesar
+        max_workers (int): Número máximo de trabajadores (None = automático)
+        use_processes (bool): Usar procesos (True) o hilos (False)
+        progress (callable): Función llamada con (terminados, total) al acabar
+                             cada elemento, en el hilo que llama (opcional)
+        
+    Returns:
+        list: Resultados en el mismo orden que los elementos
+    """
+    items = list(items)
+    
+    if max_workers is None:
+        max_workers = ANALYSIS_CONFIG['parallel_workers'] or os.cpu_count() or 1
+    max_workers = min(max_workers, len(items))
+    
+    if max_workers <= 1 or len(items) < ANALYSIS_CONFIG['parallel_min_items']:
+        return _run_serial(func, items, progress)
+    
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    try:
+        with executor_class(max_workers=max_workers) as executor:
+            if progress is None:
+                return list(executor.map(func, items))
+            futures = {executor.submit(func, item): i for i, item in enumerate(items)}
+            results = [None] * len(items)
+            for done, future in enumerate(as_completed(futures), 1):
+                results[futures[future]] = future.result()
+                progress(done, len(items))
+            return results
+    except (BrokenProcessPool, PicklingError, OSError):
+        # Entornos sin soporte de multiprocesamiento: ejecutar en serie
+        return _run_serial(func, items, progress)
+
+
+def _run_serial(func, items, progress=None):
+    """Ejecuta `run_parallel` en serie, avisando del progreso tras cada elemento."""
+    results = []
+    for item in items:
+        results.append(func(item))
+        if progress is not None:
+            progress(len(results), len(items))
+    return results
@@ -2,38 +2,61 @@
 Módulo de visualización de datos.
 Contiene funciones para generar gráficos estadísticos.
 """
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-import plotly.figure_factory as ff
 import pandas as pd
 import numpy as np
 import io
-from src.config import VISUALIZATION_CONFIG
+from src.analysis import build_sample_view, categorical_counts, sorted_quantile, top_categories
+from src.config import ANALYSIS_CONFIG, VISUALIZATION_CONFIG
+from src.instrumentation import instrumented
+
+
+# matplotlib, seaborn y plotly se importan al generar el primer gráfico: el
+# módulo (y el núcleo de cálculo que lo importa) arranca sin cargarlos
+_THEME = {'selected': 'default', 'applied': None}
 
 
 def apply_theme(theme):
     """
-    Aplica un tema de visualización.
+    Selecciona un tema de visualización.
+    
+    El tema se aplica al generar el siguiente gráfico, sin importar matplotlib hasta entonces.
     
     Args:
         theme (str): Nombre del tema
     """
-    theme_config = VISUALIZATION_CONFIG['themes'].get(theme, VISUALIZATION_CONFIG['themes']['default'])
+    _THEME['selected'] = theme
+
+
+def _pyplot():
+    """
+    Importa matplotlib y seaborn al primer uso y aplica el tema seleccionado.
     
-    if theme_config.get('background'):
-        plt.style.use("dark_background")
-    else:
-        plt.style.use("default")
+    Returns:
+        tuple: Módulos (matplotlib.pyplot, seaborn)
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
     
-    if theme_config['palette']:
-        sns.set_theme(style=theme_config['style'], palette=theme_config['palette'])
-    else:
-        sns.set_theme(style=theme_config['style'])
+    theme = _THEME['selected']
+    if _THEME['applied'] != theme:
+        theme_config = VISUALIZATION_CONFIG['themes'].get(theme, VISUALIZATION_CONFIG['themes']['default'])
+        
+        if theme_config.get('background'):
+            plt.style.use("dark_background")
+        else:
+            plt.style.use("default")
+        
+        if theme_config['palette']:
+            sns.set_theme(style=theme_config['style'], palette=theme_config['palette'])
+        else:
+            sns.set_theme(style=theme_config['style'])
+        _THEME['applied'] = theme
+    
+    return plt, sns
 
 
-def generate_histogram(data, variable_type, column_name):
+@instrumented()
+def generate_histogram(data, variable_type, column_name, bins=None):
     """
     Genera un histograma con Matplotlib.
     
@@ -41,13 +64,15 @@ def generate_histogram(data, variable_type, column_name):
         data (pd.Series): Datos a graficar
         variable_type (str): Tipo de variable
         column_name (str): Nombre de la columna
+        bins (list): Límites fijos de los intervalos (None = automáticos)
         
     Returns:
         matplotlib.figure.Figure: Figura del histograma
     """
+    plt, sns = _pyplot()
     if variable_type in ["Cuantitativa Continua", "Cuantitativa Discreta con Intervalos"]:
         fig, ax = plt.subplots(figsize=VISUALIZATION_CONFIG['figure_size'])
-        sns.histplot(data, kde=True, bins='auto', ax=ax, color='steelblue')
+        sns.histplot(data, kde=True, bins='auto' if bins is None else bins, ax=ax, color='steelblue')
         plt.title(f'Histograma de Frecuencias - {column_name}', fontsize=15)
         plt.xlabel('Intervalos', fontsize=12)
         plt.ylabel('Frecuencia Absoluta', fontsize=12)
@@ -56,6 +81,7 @@ def generate_histogram(data, variable_type, column_name):
     return None
 
 
+@instrumented()
 def generate_interactive_histogram(data, variable_type, column_name):
     """
     Genera un histograma interactivo con Plotly.
@@ -68,6 +94,7 @@ def generate_interactive_histogram(data, variable_type, column_name):
     Returns:
         plotly.graph_objects.Figure: Figura interactiva
     """
+    import plotly.express as px
     if variable_type in ["Cuantitativa Continua", "Cuantitativa Discreta con Intervalos"]:
         fig = px.histogram(
             data, 
@@ -88,6 +115,7 @@ def generate_interactive_histogram(data, variable_type, column_name):
     return None
 
 
+@instrumented()
 def generate_pie_chart(data, variable_type, column_name):
     """
     Genera un gráfico de pastel.
@@ -100,16 +128,10 @@ def generate_pie_chart(data, variable_type, column_name):
     Returns:
         matplotlib.figure.Figure: Figura del gráfico de pastel
     """
+    plt, _ = _pyplot()
     if variable_type in ["Cualitativa", "Cuantitativa Discreta"]:
         fig, ax = plt.subplots(figsize=(10, 10))
-        value_counts = data.value_counts()
-        
-        max_categories = VISUALIZATION_CONFIG['max_categories_pie']
-        if len(value_counts) > max_categories:
-            other_sum = value_counts.iloc[max_categories:].sum()
-            value_counts = value_counts.iloc[:max_categories]
-            if other_sum > 0:
-                value_counts['Otros'] = other_sum
+        value_counts = top_categories(categorical_counts(data, as_text=True), VISUALIZATION_CONFIG['max_categories_pie'])
         
         wedges, texts, autotexts = ax.pie(
             value_counts, 
@@ -133,10 +155,14 @@ def generate_pie_chart(data, variable_type, column_name):
     return None
 
 
+@instrumented()
 def generate_bar_chart(data, variable_type, column_name):
     """
     Genera un gráfico de barras.
     
+    Como la tabla de frecuencia, muestra las categorías más frecuentes y agrupa
+    el resto en una barra "Otros".
+    
     Args:
         data (pd.Series): Datos a graficar
         variable_type (str): Tipo de variable
@@ -145,13 +171,10 @@ def generate_bar_chart(data, variable_type, column_name):
     Returns:
         matplotlib.figure.Figure: Figura del gráfico de barras
     """
+    plt, sns = _pyplot()
     if variable_type in ["Cualitativa", "Cuantitativa Discreta"]:
         fig, ax = plt.subplots(figsize=(12, 8))
-        value_counts = data.value_counts().sort_values(ascending=False)
-        
-        max_categories = VISUALIZATION_CONFIG['max_categories_bar']
-        if len(value_counts) > max_categories:
-            value_counts = value_counts.iloc[:max_categories]
+        value_counts = top_categories(categorical_counts(data, as_text=True), ANALYSIS_CONFIG['frequency_max_categories'])
         
         sns.barplot(x=value_counts.index, y=value_counts.values, ax=ax, hue=value_counts.index, palette='viridis', legend=False)
         plt.title(f'Gráfico de Barras - {column_name}', fontsize=15)
@@ -164,10 +187,14 @@ def generate_bar_chart(data, variable_type, column_name):
     return None
 
 
+@instrumented()
 def generate_horizontal_bar_chart(data, variable_type, column_name):
     """
     Genera un gráfico de barras horizontales.
     
+    Como la tabla de frecuencia, muestra las categorías más frecuentes y agrupa
+    el resto en una barra "Otros".
+    
     Args:
         data (pd.Series): Datos a graficar
         variable_type (str): Tipo de variable
@@ -176,12 +203,10 @@ def generate_horizontal_bar_chart(data, variable_type, column_name):
     Returns:
         matplotlib.figure.Figure: Figura del gráfico
     """
+    plt, sns = _pyplot()
     if variable_type in ["Cualitativa", "Cuantitativa Discreta"]:
-        fig, ax = plt.subplots(figsize=(12, max(6, min(20, len(data.value_counts())//2))))
-        value_counts = data.value_counts().sort_values()
-        
-        if len(value_counts) > 20:
-            value_counts = value_counts.tail(20)
+        value_counts = top_categories(categorical_counts(data, as_text=True), ANALYSIS_CONFIG['frequency_max_categories'])
+        fig, ax = plt.subplots(figsize=(12, max(6, min(20, len(value_counts)//2))))
         
         sns.barplot(y=value_counts.index, x=value_counts.values, ax=ax, hue=value_counts.index, palette='viridis', orient='h', legend=False)
         plt.title(f'Gráfico de Barras Horizontales - {column_name}', fontsize=15)
@@ -193,6 +218,7 @@ def generate_horizontal_bar_chart(data, variable_type, column_name):
     return None
 
 
+@instrumented()
 def generate_boxplot(data, variable_type, column_name):
     """
     Genera un diagrama de caja (boxplot).
@@ -205,6 +231,7 @@ def generate_boxplot(data, variable_type, column_name):
     Returns:
         matplotlib.figure.Figure: Figura del boxplot
     """
+    plt, sns = _pyplot()
     if variable_type in ["Cuantitativa Continua", "Cuantitativa Discreta", "Cuantitativa Discreta con Intervalos"]:
         fig, ax = plt.subplots(figsize=VISUALIZATION_CONFIG['figure_size'])
         sns.boxplot(x=data, ax=ax, color='steelblue')
@@ -214,6 +241,7 @@ def generate_boxplot(data, variable_type, column_name):
     return None
 
 
+@instrumented()
 def generate_violinplot(data, variable_type, column_name):
     """
     Genera un diagrama de violín.
@@ -226,6 +254,7 @@ def generate_violinplot(data, variable_type, column_name):
     Returns:
         matplotlib.figure.Figure: Figura del violin plot
     """
+    plt, sns = _pyplot()
     if variable_type in ["Cuantitativa Continua", "Cuantitativa Discreta", "Cuantitativa Discreta con Intervalos"]:
         fig, ax = plt.subplots(figsize=VISUALIZATION_CONFIG['figure_size'])
         sns.violinplot(x=data, ax=ax, color='steelblue', inner='quartile')
@@ -252,8 +281,127 @@ def save_plot_for_pdf(fig, filename):
     return buf
 
 
+@instrumented()
+def figure_to_png(fig, dpi=None):
+    """
+    Renderiza una figura a bytes PNG y la cierra para liberar memoria.
+    
+    Args:
+        fig (matplotlib.figure.Figure): Figura a renderizar
+        dpi (int): Resolución (por defecto la de VISUALIZATION_CONFIG)
+        
+    Returns:
+        bytes: Imagen PNG
+    """
+    plt, _ = _pyplot()
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=dpi or VISUALIZATION_CONFIG['dpi'], bbox_inches='tight')
+    plt.close(fig)
+    return buf.getvalue()
+
+
+@instrumented()
+def figure_to_svg(fig):
+    """
+    Renderiza una figura a SVG sin cerrarla, con los textos como texto.
+    
+    Las figuras densas (dispersiones o series con muchos puntos) ocupan más y
+    tardan más en dibujarse como vectores que como imagen: para ellas devuelve
+    None y se usa el PNG.
+    
+    Args:
+        fig (matplotlib.figure.Figure): Figura a renderizar
+        
+    Returns:
+        bytes: Documento SVG, o None si la figura supera VISUALIZATION_CONFIG['vector_max_elements']
+    """
+    if figure_element_count(fig) > VISUALIZATION_CONFIG['vector_max_elements']:
+        return None
+    
+    plt, _ = _pyplot()
+    buf = io.BytesIO()
+    with plt.rc_context({'svg.fonttype': 'none'}):
+        fig.savefig(buf, format='svg', bbox_inches='tight')
+    return buf.getvalue()
+
+
+def figure_element_count(fig):
+    """
+    Cuenta los elementos de datos que dibuja una figura (puntos, vértices y barras).
+    
+    Args:
+        fig (matplotlib.figure.Figure): Figura
+        
+    Returns:
+        int: Número de elementos
+    """
+    count = 0
+    for ax in fig.axes:
+        count += sum(len(line.get_xdata()) for line in ax.lines)
+        count += len(ax.patches)
+        for collection in ax.collections:
+            offsets = collection.get_offsets()
+            if len(offsets) > 1:
+                count += len(offsets)
+            else:
+                count += sum(len(path.vertices) for path in collection.get_paths())
+    return count
+
+
+@instrumented()
+def downsample_interactive_figure(fig, max_points=None):
+    """
+    Reduce los datos de una figura de Plotly para incrustarla en un informe.
+    
+    Los histogramas se sustituyen por barras con las frecuencias ya calculadas
+    (exactas). En el resto de trazas con más de `max_points` puntos se conserva
+    una muestra aleatoria de los puntos en su orden original; los diagramas de
+    caja se calculan entonces sobre la muestra.
+    
+    Args:
+        fig (plotly.graph_objects.Figure): Figura interactiva
+        max_points (int): Puntos máximos por traza (por defecto el de VISUALIZATION_CONFIG)
+        
+    Returns:
+        plotly.graph_objects.Figure: Copia reducida de la figura
+    """
+    import plotly.graph_objects as go
+    
+    max_points = max_points or VISUALIZATION_CONFIG['interactive_max_points']
+    rng = np.random.default_rng(VISUALIZATION_CONFIG['interactive_seed'])
+    reduced = go.Figure(layout=fig.layout)
+    
+    for trace in fig.data:
+        size = max((len(getattr(trace, axis)) for axis in ('x', 'y') if getattr(trace, axis, None) is not None), default=0)
+        if size <= max_points:
+            reduced.add_trace(trace)
+        elif trace.type == 'histogram' and trace.x is not None:
+            values = pd.to_numeric(pd.Series(trace.x), errors='coerce').dropna().to_numpy()
+            edges = np.histogram_bin_edges(values, bins=trace.nbinsx or 'auto')
+            if len(edges) - 1 > VISUALIZATION_CONFIG['distribution_max_bins']:
+                edges = np.linspace(edges[0], edges[-1], VISUALIZATION_CONFIG['distribution_max_bins'] + 1)
+            counts, edges = np.histogram(values, bins=edges)
+            reduced.add_trace(go.Bar(
+                x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges),
+                name=trace.name, marker=trace.marker.to_plotly_json(), opacity=trace.opacity, showlegend=trace.showlegend,
+                legendgroup=trace.legendgroup, xaxis=trace.xaxis, yaxis=trace.yaxis,
+                hovertemplate='%{x}<br>Frecuencia: %{y}<extra></extra>'
+            ))
+        else:
+            keep = np.sort(rng.choice(size, max_points, replace=False))
+            sampled = {}
+            for attribute in ('x', 'y', 'text', 'hovertext', 'customdata'):
+                values = getattr(trace, attribute, None)
+                if values is not None and not isinstance(values, str) and len(values) == size:
+                    sampled[attribute] = np.asarray(values)[keep]
+            reduced.add_trace(type(trace)(trace).update(sampled))
+    
+    return reduced
+
+
 # ============= NUEVAS VISUALIZACIONES =============
 
+@instrumented()
 def generate_correlation_heatmap(corr_matrix):
     """
     Genera un mapa de calor de correlaciones.
@@ -264,6 +412,7 @@ def generate_correlation_heatmap(corr_matrix):
     Returns:
         matplotlib.figure.Figure: Figura del heatmap
     """
+    plt, sns = _pyplot()
     fig, ax = plt.subplots(figsize=(12, 10))
     sns.heatmap(
         corr_matrix, 
@@ -281,6 +430,7 @@ def generate_correlation_heatmap(corr_matrix):
     return fig
 
 
+@instrumented()
 def generate_interactive_correlation_heatmap(corr_matrix):
     """
     Genera un mapa de calor interactivo con Plotly.
@@ -291,6 +441,7 @@ def generate_interactive_correlation_heatmap(corr_matrix):
     Returns:
         plotly.graph_objects.Figure: Figura interactiva
     """
+    import plotly.graph_objects as go
     fig = go.Figure(data=go.Heatmap(
         z=corr_matrix.values,
         x=corr_matrix.columns,
@@ -315,6 +466,7 @@ def generate_interactive_correlation_heatmap(corr_matrix):
     return fig
 
 
+@instrumented()
 def generate_scatter_plot(df, x_col, y_col):
     """
     Genera un gráfico de dispersión.
@@ -327,6 +479,7 @@ def generate_scatter_plot(df, x_col, y_col):
     Returns:
         matplotlib.figure.Figure: Figura del scatter plot
     """
+    plt, _ = _pyplot()
     fig, ax = plt.subplots(figsize=VISUALIZATION_CONFIG['figure_size'])
     
     ax.scatter(df[x_col], df[y_col], alpha=0.6, s=50, color='steelblue')
@@ -346,6 +499,7 @@ def generate_scatter_plot(df, x_col, y_col):
     return fig
 
 
+@instrumented()
 def generate_interactive_scatter(df, x_col, y_col):
     """
     Genera un gráfico de dispersión interactivo.
@@ -358,6 +512,7 @@ def generate_interactive_scatter(df, x_col, y_col):
     Returns:
         plotly.graph_objects.Figure: Figura interactiva
     """
+    import plotly.express as px
     fig = px.scatter(
         df, 
         x=x_col, 
@@ -374,21 +529,67 @@ def generate_interactive_scatter(df, x_col, y_col):
     return fig
 
 
-def generate_qq_plot(data, column_name):
+def _thinned_quantile_indices(n, max_points, tail_points):
+    """
+    Selecciona las posiciones de la vista ordenada que se van a graficar.
+    
+    Conserva exactas las `tail_points` observaciones de cada extremo y reparte
+    el resto de forma uniforme en el centro de la distribución.
+    
+    Args:
+        n (int): Número de observaciones
+        max_points (int): Número máximo de puntos a graficar
+        tail_points (int): Observaciones exactas en cada cola
+        
+    Returns:
+        np.ndarray: Posiciones (base 0) ordenadas y sin repetir
+    """
+    if n <= max_points:
+        return np.arange(n)
+    
+    tail = min(tail_points, max_points // 4)
+    middle = np.linspace(tail, n - tail - 1, max_points - 2 * tail).round().astype(np.int64)
+    return np.unique(np.concatenate([np.arange(tail), middle, np.arange(n - tail, n)]))
+
+
+@instrumented()
+def generate_qq_plot(data, column_name, sample_view=None):
     """
     Genera un gráfico Q-Q para verificar normalidad.
     
+    Los cuantiles se toman de la vista ordenada y se reducen a
+    `qq_max_points` puntos, conservando exactas las colas, por lo que el
+    tiempo de dibujo no depende del tamaño de la columna.
+    
     Args:
         data (pd.Series): Datos a graficar
         column_name (str): Nombre de la columna
+        sample_view (dict): Vista de `build_sample_view` ya calculada (opcional)
         
     Returns:
         matplotlib.figure.Figure: Figura del Q-Q plot
     """
     from scipy import stats
     
+    plt, _ = _pyplot()
+    if sample_view is None:
+        sample_view = build_sample_view(data)
+    n = sample_view['n']
+    
+    indices = _thinned_quantile_indices(
+        n, VISUALIZATION_CONFIG['qq_max_points'], VISUALIZATION_CONFIG['qq_tail_points']
+    )
+    
+    # Medianas de los estadísticos de orden uniformes (Filliben), como stats.probplot
+    probabilities = (indices + 1 - 0.3175) / (n + 0.365)
+    probabilities[indices == 0] = 1 - 0.5 ** (1 / n)
+    probabilities[indices == n - 1] = 0.5 ** (1 / n)
+    theoretical = stats.norm.ppf(probabilities)
+    observed = sample_view['sorted'][indices]
+    
     fig, ax = plt.subplots(figsize=VISUALIZATION_CONFIG['figure_size'])
-    stats.probplot(data.dropna(), dist="norm", plot=ax)
+    ax.plot(theoretical, observed, 'o', color='steelblue', markersize=4)
+    ax.plot(theoretical, sample_view['mean'] + sample_view['std'] * theoretical, 'r-', linewidth=2)
     plt.title(f'Gráfico Q-Q - {column_name}', fontsize=15)
     plt.xlabel('Cuantiles Teóricos', fontsize=12)
     plt.ylabel('Cuantiles Muestrales', fontsize=12)
@@ -398,6 +599,7 @@ def generate_qq_plot(data, column_name):
     return fig
 
 
+@instrumented()
 def generate_outliers_plot(data, outliers_info, column_name):
     """
     Genera un gráfico mostrando los outliers detectados.
@@ -410,6 +612,7 @@ def generate_outliers_plot(data, outliers_info, column_name):
     Returns:
         matplotlib.figure.Figure: Figura con outliers resaltados
     """
+    plt, _ = _pyplot()
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
     
     # Boxplot con outliers
@@ -437,25 +640,68 @@ def generate_outliers_plot(data, outliers_info, column_name):
     return fig
 
 
-def generate_distribution_comparison(data, column_name):
+def _histogram_from_view(sample_view, max_bins):
+    """
+    Calcula un histograma directamente sobre la vista ordenada.
+    
+    El ancho de clase sigue el criterio 'auto' de numpy (el menor entre
+    Freedman-Diaconis y Sturges) y los conteos se obtienen con búsqueda
+    binaria sobre los valores ordenados, sin recorrer todos los datos.
+    
+    Args:
+        sample_view (dict): Vista de `build_sample_view`
+        max_bins (int): Número máximo de clases
+        
+    Returns:
+        tuple: (límites de clase, conteos por clase)
+    """
+    sorted_values = sample_view['sorted']
+    n = sample_view['n']
+    minimo, maximo = sample_view['min'], sample_view['max']
+    data_range = maximo - minimo
+    
+    if data_range == 0:
+        edges = np.array([minimo - 0.5, maximo + 0.5])
+    else:
+        iqr = sorted_quantile(sorted_values, 0.75) - sorted_quantile(sorted_values, 0.25)
+        width = data_range / (np.log2(n) + 1)
+        if iqr > 0:
+            width = min(width, 2 * iqr / np.cbrt(n))
+        number_of_bins = int(min(max_bins, max(1, np.ceil(data_range / width))))
+        edges = np.linspace(minimo, maximo, number_of_bins + 1)
+    
+    positions = np.searchsorted(sorted_values, edges, side='left')
+    positions[-1] = n  # La última clase incluye el máximo
+    return edges, np.diff(positions)
+
+
+@instrumented()
+def generate_distribution_comparison(data, column_name, sample_view=None):
     """
     Genera una comparación de la distribución con la normal.
     
     Args:
         data (pd.Series): Datos a comparar
         column_name (str): Nombre de la columna
+        sample_view (dict): Vista de `build_sample_view` ya calculada (opcional)
         
     Returns:
         matplotlib.figure.Figure: Figura comparativa
     """
+    plt, _ = _pyplot()
+    if sample_view is None:
+        sample_view = build_sample_view(data)
+    
     fig, ax = plt.subplots(figsize=VISUALIZATION_CONFIG['figure_size'])
     
-    # Histograma de datos
-    ax.hist(data.dropna(), bins='auto', density=True, alpha=0.7, color='steelblue', label='Datos')
+    # Histograma de datos (densidad) a partir de la vista ordenada
+    edges, counts = _histogram_from_view(sample_view, VISUALIZATION_CONFIG['distribution_max_bins'])
+    density = counts / (sample_view['n'] * np.diff(edges))
+    ax.hist(edges[:-1], bins=edges, weights=density, alpha=0.7, color='steelblue', label='Datos')
     
     # Curva normal teórica
-    mu, sigma = data.mean(), data.std()
-    x = np.linspace(data.min(), data.max(), 100)
+    mu, sigma = sample_view['mean'], sample_view['std']
+    x = np.linspace(sample_view['min'], sample_view['max'], 100)
     ax.plot(x, (1/(sigma * np.sqrt(2 * np.pi))) * np.exp(-0.5*((x - mu)/sigma)**2), 
             'r-', linewidth=2, label='Distribución Normal')
     
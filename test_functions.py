@@ -110,7 +110,55 @@ try:
         print(f"        {i+1}. {row}")
     
     assert len(freq_table) > 0, "La tabla debe tener al menos una fila"
+
+    # Variable cualitativa: frecuencias sobre códigos enteros
+    colores = pd.Series(['rojo', 'azul', None, 'rojo', 'verde', 'azul', 'rojo'])
+    for datos in (colores, colores.astype('category')):
+        tabla = analysis.calculate_frequency_table(datos, "Cualitativa")[:-1]  # Sin la fila Total
+        assert [fila['valor'] for fila in tabla] == ['azul', 'rojo', 'verde']
+        assert [fila['frecuenciaAbsoluta'] for fila in tabla] == [2, 3, 1]
+        medidas = analysis.qualitative_measures(datos)
+        assert medidas['Moda'] == 'rojo' and medidas['Frecuencia de la Moda'] == 3
+        assert medidas['Valores Únicos'] == colores.nunique()
+    print(f"   ✅ Cualitativa: moda '{medidas['Moda']}', entropía {medidas['Entropía']}")
+    
+    # Con nulos, la tabla y las proporciones se calculan sobre los datos no nulos
+    con_nulos = pd.Series(['a', 'b', None, 'a', np.nan])
+    tabla = analysis.calculate_frequency_table(con_nulos, "Cualitativa")
+    assert tabla[-1]['frecuenciaAbsoluta'] == 3
+    assert tabla[-1]['frecuenciaRelativa'] == 1.0 and tabla[-1]['frecuenciaPorcentual'] == 100
+    assert tabla[-2]['frecuenciaPorcentualAcumulada'] == 100
+    assert analysis.qualitative_measures(con_nulos)['Proporción de la Moda'] == round(2 / 3, 4)
+
+    # Alta cardinalidad: categorías más frecuentes + "Otros"
+    ids = pd.Series([f"ID{i}" for i in range(5000)] + ['ID7'] * 30 + ['ID3'] * 20)
+    tabla = analysis.calculate_frequency_table(ids, "Cualitativa", max_categories=10)
+    assert len(tabla) == 12  # 10 categorías + Otros + Total
+    assert tabla[0]['valor'] == 'ID7' and tabla[0]['frecuenciaAbsoluta'] == 31
+    assert tabla[1]['valor'] == 'ID3' and tabla[10]['valor'] == 'Otros'
+    assert tabla[-1]['frecuenciaAbsoluta'] == len(ids)
+    print(f"   ✅ Alta cardinalidad: {ids.nunique():,} categorías → {len(tabla) - 1} filas")
+    
+    # Los gráficos de barras agrupan las mismas categorías que la tabla
+    import matplotlib.pyplot as plt
+    filas = len(analysis.calculate_frequency_table(ids, "Cualitativa")) - 1
+    for generar in (visualization.generate_bar_chart, visualization.generate_horizontal_bar_chart):
+        figura = generar(ids, "Cualitativa", 'ID')
+        assert len(figura.axes[0].patches) == filas, generar.__name__
+        plt.close(figura)
+    print(f"   ✅ Gráficos de barras con {filas} barras, como la tabla")
     
+    # Valores como 1 y '1' forman una sola categoría en la tabla y en todos los gráficos
+    mezclados = pd.Series([1, '1', 'a', 'a', 2.5], dtype=object)
+    etiquetas = [fila['valor'] for fila in analysis.calculate_frequency_table(mezclados, "Cualitativa")[:-1]]
+    sectores = visualization.generate_pie_chart(mezclados, "Cualitativa", 'Mezcla')
+    assert [t.get_text() for t in sectores.axes[0].get_legend().get_texts()] == ['1', 'a', '2.5']
+    assert sorted(etiquetas) == ['1', '2.5', 'a']
+    plt.close(sectores)
+    barras = visualization.generate_bar_chart(mezclados, "Cualitativa", 'Mezcla')
+    assert len(barras.axes[0].patches) == len(etiquetas)
+    plt.close(barras)
+
 except Exception as e:
     print(f"   ❌ Error: {e}")
     import traceback
@@ -190,6 +238,376 @@ try:
         categoria = df['Categoria'].dropna()
         tipo_categoria = utils.determine_variable_type(categoria)
         print(f"   ✅ Tipo de 'Categoria': {tipo_categoria}")
+
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Probar manejo de valores nulos
+print("\n9️⃣ Probando manejo de valores nulos...")
+try:
+    df_nulos = pd.DataFrame({'A': [1.0, np.nan, 3.0, np.nan, 5.0], 'B': list('abcde')})
+    original = df_nulos.copy()
+
+    columna, registro = utils.handle_missing_values(df_nulos, 'A', "Reemplazar por la media")
+    assert columna.tolist() == [1.0, 3.0, 3.0, 3.0, 5.0] and columna.name == 'A'
+    assert registro['Valor de relleno'] == 3.0 and registro['Valores nulos'] == 2
+    print(f"   ✅ {registro['Mensaje']} (relleno: {registro['Valor de relleno']})")
+
+    columna, registro = utils.handle_missing_values(df_nulos, 'A', "Eliminar")
+    assert columna.index.tolist() == [0, 2, 4] and registro['Filas resultantes'] == 3
+    print(f"   ✅ {registro['Mensaje']}")
+
+    # El DataFrame de origen no se modifica y la imputación se reutiliza
+    pd.testing.assert_frame_equal(df_nulos, original)
+    tamaño_cache = len(utils._IMPUTATION_CACHE)
+    utils.handle_missing_values(df_nulos, 'A', "Eliminar")
+    assert len(utils._IMPUTATION_CACHE) == tamaño_cache
+    print("   ✅ DataFrame de origen intacto e imputación en caché")
+
+    # Métodos avanzados: por grupo, por orden de fechas y por vecinos
+    df_avanzado = pd.DataFrame({
+        'Valor': [1.0, np.nan, 3.0, np.nan, 10.0, 12.0],
+        'Grupo': ['a', 'a', 'a', 'b', 'b', 'b'],
+        'Fecha': ['03/01/2024', '01/01/2024', '02/01/2024', '05/01/2024', '04/01/2024', '06/01/2024'],
+        'Apoyo': [1.0, 2.9, 3.0, 10.5, 10.0, 12.0]
+    })
+    columna, _ = utils.handle_missing_values(df_avanzado, 'Valor', "Media por grupo", {'group_column': 'Grupo'})
+    assert columna.tolist() == [1.0, 2.0, 3.0, 11.0, 10.0, 12.0]
+    columna, registro = utils.handle_missing_values(df_avanzado, 'Valor', "Propagar hacia adelante", {'date_column': 'Fecha'})
+    assert columna.tolist()[3] == 10.0 and np.isnan(columna.iloc[1]) and registro['Nulos restantes'] == 1
+    columna, _ = utils.handle_missing_values(df_avanzado, 'Valor', "K vecinos más cercanos",
+                                             {'neighbor_columns': ['Apoyo'], 'k': 1})
+    assert columna.tolist() == [1.0, 3.0, 3.0, 10.0, 10.0, 12.0]
+    
+    # Interpolación según la distancia entre fechas, con y sin zona horaria
+    fechas = pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-11'])
+    df_fechas = pd.DataFrame({'Valor': [0.0, np.nan, 10.0], 'Fecha': fechas, 'Fecha UTC': fechas.tz_localize('UTC')})
+    for columna_fecha in ('Fecha', 'Fecha UTC'):
+        columna, _ = utils.handle_missing_values(df_fechas, 'Valor', "Interpolación lineal", {'date_column': columna_fecha})
+        assert columna.tolist() == [0.0, 1.0, 10.0], columna_fecha
+        columna, _ = utils.handle_missing_values(df_fechas, 'Valor', "Propagar hacia adelante", {'date_column': columna_fecha})
+        assert columna.tolist() == [0.0, 0.0, 10.0], columna_fecha
+    print("   ✅ Imputación por grupo, por fechas y por vecinos más cercanos")
+
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 10: Almacén de resultados
+print("\n🔟 Probando almacén persistente de resultados...")
+try:
+    import os
+    import tempfile
+    from src import store
+    
+    ruta = os.path.join(tempfile.mkdtemp(), 'resultados.sqlite')
+    clave = store.result_key('huella-columna', 'Cualitativa', {'tema': 'default'})
+    assert clave != store.result_key('huella-columna', 'Cualitativa', {'tema': 'dark'})
+    assert store.load_result(clave, path=ruta) is None
+    
+    resultado = {
+        'frequency_table': analysis.calculate_frequency_table(pd.Series(['a', 'b', 'a']), "Cualitativa"),
+        'measures': {'Moda': 'a'},
+        'figures': {'barras': b'\x89PNG...'},
+    }
+    assert store.save_result(clave, resultado, path=ruta)
+    recuperado = store.load_result(clave, path=ruta)
+    assert recuperado == resultado and recuperado is not resultado
+    assert store.clear_results(path=ruta) == 1 and store.load_result(clave, path=ruta) is None
+    print("   ✅ Resultados guardados y recuperados por huella de columna y opciones")
+    
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 11: Instrumentación de etapas
+print("\n1️⃣1️⃣ Probando instrumentación de etapas...")
+try:
+    from src import instrumentation
+    
+    datos = pd.Series(np.random.normal(50, 10, 5000))
+    instrumentation.reset_records()
+    analysis.calculate_frequency_table(datos, "Cuantitativa Continua")
+    assert instrumentation.get_records() == []  # Desactivada no registra nada
+    
+    instrumentation.enable(True)
+    try:
+        with instrumentation.stage('análisis', rows=len(datos)):
+            tabla = analysis.calculate_frequency_table(datos, "Cuantitativa Continua")
+            analysis.calculate_quartiles(datos, tabla, "Cuantitativa Continua")
+    finally:
+        instrumentation.enable(False)
+    
+    registros = instrumentation.get_records()
+    assert [r['Etapa'] for r in registros] == ['análisis', 'calculate_frequency_table', 'calculate_quartiles']
+    assert [r['Nivel'] for r in registros] == [0, 1, 1] and registros[1]['Filas'] == 5000
+    assert registros[0]['Tiempo (s)'] >= registros[1]['Tiempo (s)'] + registros[2]['Tiempo (s)']
+    metricas = instrumentation.prometheus_text()
+    assert 'estadistica_etapa_llamadas_total{etapa="calculate_frequency_table"}' in metricas
+    
+    # Activada solo en un hilo (una sesión de la aplicación): los demás hilos no registran
+    import threading
+    otro_hilo = []
+    instrumentation.enable(True, thread=True)
+    hilo = threading.Thread(target=lambda: otro_hilo.append(instrumentation.is_enabled()))
+    hilo.start()
+    hilo.join()
+    assert instrumentation.is_enabled() and otro_hilo == [False]
+    instrumentation.reset_records()
+    assert not instrumentation.is_enabled()
+    print(f"   ✅ {len(registros)} etapas registradas con tiempo, CPU, filas y memoria")
+    
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 12: Perfilado de una ejecución
+print("\n1️⃣2️⃣ Probando perfilado de una ejecución...")
+try:
+    import os
+    import pstats
+    import tempfile
+    from src import profiling
+    
+    with profiling.profile_block('cuartiles') as perfil:
+        tabla = analysis.calculate_frequency_table(datos, "Cuantitativa Continua")
+        analysis.calculate_quartiles(datos, tabla, "Cuantitativa Continua")
+    
+    ruta = os.path.join(tempfile.mkdtemp(), 'perfil.prof')
+    with open(ruta, 'wb') as f:
+        f.write(perfil['pstats'])
+    funciones = {func[2] for func in pstats.Stats(ruta).stats}
+    assert 'calculate_frequency_table' in funciones and 'calculate_quartiles' in funciones
+    assert 'calculate_frequency_table' in perfil['texto'] and '<html' in perfil['html']
+    arbol = profiling.call_tree(pstats.Stats(ruta))
+    assert arbol['hijos'] and arbol['tiempo'] > 0
+    print(f"   ✅ Perfil de {perfil['duracion']:.3f} s con pstats y gráfico de llama")
+    
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 13: Exportación a Excel en modo de solo escritura
+print("\n1️⃣3️⃣ Probando exportación a Excel por bloques...")
+try:
+    from openpyxl import load_workbook
+    from src import export
+    from src.config import EXPORT_CONFIG
+    
+    serie = pd.Series(np.r_[np.nan, datos.values], name='Precio')
+    tabla = analysis.calculate_frequency_table(serie.dropna(), "Cuantitativa Continua")
+    medidas = {'Media': np.float64(serie.mean()), 'Moda': [1, 2], 'n': np.int64(len(serie))}
+    figura = visualization.figure_to_png(visualization.generate_boxplot(serie.dropna(), "Cuantitativa Continua", 'Precio'))
+    
+    limite = EXPORT_CONFIG['excel_max_rows']
+    EXPORT_CONFIG['excel_max_rows'] = 60
+    try:
+        buffer = export.export_to_excel(tabla, medidas, {'Q1': 1.0}, [figura, None],
+                                        ['tabla_frecuencia', 'medidas_resumen', 'cuartiles', 'datos', 'graficos'], data=serie)
+    finally:
+        EXPORT_CONFIG['excel_max_rows'] = limite
+    
+    libro = load_workbook(buffer)
+    hojas_datos = [hoja for hoja in libro.sheetnames if hoja.startswith('Datos')]
+    assert hojas_datos[0] == 'Datos' and len(hojas_datos) == -(-len(serie) // 59)
+    valores = [fila[0] for hoja in hojas_datos for fila in libro[hoja].iter_rows(min_row=2, values_only=True)]
+    assert len(valores) == len(serie) and valores[0] is None and abs(valores[1] - serie[1]) < 1e-9
+    assert libro['Tabla de Frecuencia'].max_row == len(tabla) + 1
+    assert [fila for fila in libro['Medidas de Resumen'].values][2:] == [('Moda', '[1, 2]'), ('n', len(serie))]
+    assert len(libro['Gráficos']._images) == 1
+    assert load_workbook(export.export_to_excel([], {}, {}, [], [])).sheetnames == ['Resultados']
+    print(f"   ✅ {len(libro.sheetnames)} hojas, {len(hojas_datos)} de datos y 1 gráfico")
+    
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 14: PDF con la tabla de frecuencia completa
+print("\n1️⃣4️⃣ Probando PDF con tablas largas paginadas...")
+try:
+    import re
+    import time
+    from src import export
+    
+    serie = pd.Series(np.arange(5000).repeat(2), name='Codigo')
+    tabla = analysis.calculate_frequency_table(serie, "Cuantitativa Discreta")
+    inicio = time.perf_counter()
+    pdf = export.export_to_pdf(serie.to_frame(), 'Codigo', "Cuantitativa Discreta", tabla, {'Media': 2499.5}, {'Q1': 1249.75},
+                               [], ['tabla_frecuencia', 'medidas_resumen', 'cuartiles']).getvalue()
+    duracion = time.perf_counter() - inicio
+    paginas = len(re.findall(rb'/Type /Page\b', pdf))
+    
+    # Sin recortar a 40 filas: las 5.000 filas y sus columnas ocupan muchas páginas
+    assert len(tabla) == 5001 and paginas > 2 * len(tabla) // 40
+    assert duracion < 30
+    print(f"   ✅ {len(tabla) - 1} valores en {paginas} páginas ({duracion:.1f} s)")
+    
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 15: Gráficos vectoriales en los informes
+print("\n1️⃣5️⃣ Probando gráficos SVG con PNG para gráficos densos...")
+try:
+    import matplotlib.pyplot as plt
+    from src import export
+    
+    categorias = pd.Series(np.random.choice(list('ABCDEF'), 2000), name='Region')
+    tabla = analysis.calculate_frequency_table(categorias, "Cualitativa")
+    figura = visualization.generate_bar_chart(categorias, "Cualitativa", 'Region')
+    svg = visualization.figure_to_svg(figura)
+    grafico = {'png': visualization.figure_to_png(figura), 'svg': svg}
+    assert svg.lstrip().startswith(b'<?xml') and b'<svg' in svg
+    
+    # Una dispersión con muchos puntos se queda en PNG
+    densa, eje = plt.subplots()
+    eje.scatter(np.random.rand(20000), np.random.rand(20000))
+    assert visualization.figure_element_count(densa) >= 20000
+    assert visualization.figure_to_svg(densa) is None
+    plt.close(densa)
+    
+    args = (categorias.to_frame(), 'Region', "Cualitativa", tabla, {}, {}, [grafico, {'png': grafico['png'], 'svg': None}])
+    html_png = export.generate_html_report(*args)
+    html_svg = export.generate_html_report(*args, figure_format='svg')
+    assert html_svg.count('<svg') == 1 and html_svg.count('data:image/png') == 1 and '<?xml' not in html_svg
+    assert html_png.count('data:image/png') == 2 and len(html_svg) < len(html_png)
+    # En el PDF, el SVG se dibuja como vectores (sin imagen) y el gráfico denso como PNG
+    pdf_svg = export.export_to_pdf(*args[:-1], [grafico], ['graficos'], figure_format='svg').getvalue()
+    pdf_png = export.export_to_pdf(*args[:-1], [grafico], ['graficos']).getvalue()
+    assert pdf_svg.startswith(b'%PDF') and b'/Subtype /Image' not in pdf_svg
+    assert b'/Subtype /Image' in pdf_png
+    assert b'/Subtype /Image' in export.export_to_pdf(*args, ['graficos'], figure_format='svg').getvalue()
+    print(f"   ✅ SVG de {len(svg) // 1024} KB frente a PNG de {len(grafico['png']) // 1024} KB")
+    
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 16: Informe HTML en ZIP con recursos aparte
+print("\n1️⃣6️⃣ Probando informe HTML en ZIP con gráficos interactivos reducidos...")
+try:
+    import zipfile
+    from src import export
+    
+    grande = pd.Series(np.random.normal(50, 10, 50000), name='Precio')
+    tabla = analysis.calculate_frequency_table(grande, "Cuantitativa Continua")
+    figura = visualization.generate_histogram(grande, "Cuantitativa Continua", 'Precio')
+    graficos = [{'svg': visualization.figure_to_svg(figura), 'png': visualization.figure_to_png(figura)}]
+    interactivo = visualization.generate_interactive_histogram(grande, "Cuantitativa Continua", 'Precio')
+    
+    reducido = visualization.downsample_interactive_figure(interactivo, max_points=2000)
+    assert reducido.data[0].type == 'bar' and sum(reducido.data[0].y) == len(grande)
+    assert len(reducido.data[1].x) == 2000 and len(interactivo.data[1].x) == len(grande)
+    
+    archivo = zipfile.ZipFile(export.generate_html_bundle(
+        grande.to_frame(), 'Precio', "Cuantitativa Continua", tabla, {'Media': grande.mean()}, {}, graficos,
+        interactive_figs=[interactivo, interactivo]
+    ))
+    nombres = archivo.namelist()
+    assert nombres[0] == 'informe.html' and 'js/plotly.min.js' in nombres and 'graficos/grafico_1.svg' in nombres
+    informe = archivo.read('informe.html').decode('utf-8')
+    assert informe.count('plotly.min.js') == 1 and 'base64' not in informe
+    assert 'interactivo_2' in informe and 'Plotly.newPlot' in archivo.read('graficos/interactivo_1.js').decode('utf-8')
+    print(f"   ✅ {len(nombres)} archivos, informe de {len(informe) // 1024} KB")
+    
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 17: Código R con los datos en un CSV aparte
+print("\n1️⃣7️⃣ Probando código R con los datos en CSV...")
+try:
+    import io
+    import zipfile
+    from src import export
+    
+    scripts = []
+    for n in (1000, 50000):
+        valores = pd.Series(np.random.normal(50, 10, n), name='Precio')
+        archivo = zipfile.ZipFile(export.generate_r_bundle(valores.to_frame(), 'Precio', "Cuantitativa Continua", [], {}, {}, valores))
+        script = archivo.read('analisis.R').decode('utf-8')
+        csv = pd.read_csv(io.BytesIO(archivo.read('datos.csv')), float_precision='round_trip')
+        assert csv.columns.tolist() == ['Precio'] and np.array_equal(csv['Precio'].to_numpy(), valores.to_numpy())
+        assert 'read.csv("datos.csv", colClasses = "numeric"' in script and 'c(' not in script.split('read.csv')[0].split('DATOS ORIGINALES')[1]
+        scripts.append(len(script))
+    
+    # El tamaño del script no depende del número de filas
+    assert abs(scripts[0] - scripts[1]) < 50
+    cualitativa = pd.Series(['a "b"', 'c,d', None, 'e'], name='Region')
+    archivo = zipfile.ZipFile(export.generate_r_bundle(cualitativa.to_frame(), 'Region', "Cualitativa", [], {}, {}, cualitativa))
+    assert pd.read_csv(io.BytesIO(archivo.read('datos.csv')))['Region'].tolist() == ['a "b"', 'c,d', 'e']
+    print(f"   ✅ Script de {scripts[1] // 1024} KB con 50.000 valores en datos.csv")
+    
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 18: Informe de varias columnas
+print("\n1️⃣8️⃣ Probando informe de varias columnas en paralelo...")
+try:
+    import io
+    import zipfile
+    from openpyxl import load_workbook
+    from src import pipeline
+    
+    n = 3000
+    tabla_datos = pd.DataFrame({
+        'Precio': np.random.normal(50, 10, n),
+        'Ventas': np.random.randint(0, 400, n),
+        'Region': np.random.choice(['Norte', 'Sur', 'Este'], n),
+        'Margen %': np.random.lognormal(1, 0.4, n),
+        'Vacia': np.nan,
+    })
+    tabla_datos.loc[::10, 'Precio'] = np.nan
+    tabla_datos.loc[::25, 'Region'] = None
+    
+    avances = []
+    informe, resumen = pipeline.build_report_bundle(
+        tabla_datos, list(tabla_datos.columns), "Reemplazar por la mediana",
+        progress=lambda fraccion, mensaje: avances.append(fraccion)
+    )
+    archivo = zipfile.ZipFile(informe)
+    nombres = set(archivo.namelist())
+    assert {'resultados.xlsx', 'informe.pdf', 'html/index.html', 'html/Margen.html', 'R/Region.R'} <= nombres
+    assert load_workbook(io.BytesIO(archivo.read('resultados.xlsx')), read_only=True).sheetnames == ['Precio', 'Ventas', 'Region', 'Margen']
+    assert [fila['Estado'] for fila in resumen] == ['Correcto'] * 4 + ['Sin valores no nulos']
+    assert resumen[0]['N'] == n and avances == sorted(avances) and avances[-1] == 1.0
+    assert 'Vacia' in archivo.read('html/index.html').decode('utf-8')
+    
+    # La mediana no se aplica a la columna cualitativa: se eliminan sus nulos y el resumen lo indica
+    assert resumen[0]['Nulos'] == "Reemplazar por la mediana"
+    assert resumen[2]['Nulos'].startswith("Eliminar (") and resumen[2]['N'] == n - len(range(0, n, 25))
+    _, _, imputacion = pipeline.prepare_column(
+        tabla_datos, 'Precio', "Media por grupo", missing_options={'group_column': 'Region'}
+    )
+    assert imputacion['Método'] == "Media por grupo" and imputacion['Nulos restantes'] == 0
+    
+    # Mismo resultado que el análisis de una sola columna
+    datos_precio, tipo, _ = pipeline.prepare_column(tabla_datos, 'Precio', "Reemplazar por la mediana")
+    individual = pipeline.compute_univariate_results(datos_precio, tipo, 'Precio', interactive=False)
+    assert individual['interactive'] is None and individual['frequency_table'][0]['Frecuencia Absoluta'] > 0
+    print(f"   ✅ {len(nombres)} archivos para {len(resumen)} columnas")
     
 except Exception as e:
     print(f"   ❌ Error: {e}")
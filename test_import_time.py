@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Test de arranque: los módulos de src se importan sin Streamlit ni bibliotecas de gráficos"""
+
+import subprocess
+import sys
+from src.config import BENCHMARK_CONFIG
+
+print("=" * 60)
+print("🧪 TEST: Tiempo de Importación")
+print("=" * 60)
+
+MODULOS = ['src.utils', 'src.analysis', 'src.incremental', 'src.visualization', 'src.export', 'src.store', 'src.profiling',
+           'src.pipeline']
+PESADOS = ['streamlit', 'matplotlib', 'seaborn', 'plotly', 'reportlab', 'openpyxl', 'scipy.stats']
+
+# Cada medición en un intérprete nuevo para no reutilizar módulos ya cargados
+CODIGO = f"""
+import sys, time
+inicio = time.perf_counter()
+import {', '.join(MODULOS)}
+print(time.perf_counter() - inicio)
+print(','.join(m for m in {PESADOS!r} if m in sys.modules))
+"""
+
+print("\n1️⃣ Test: Módulos pesados no cargados al importar...")
+try:
+    tiempos = []
+    for _ in range(3):
+        salida = subprocess.run([sys.executable, '-c', CODIGO], capture_output=True, text=True, check=True)
+        tiempo, cargados = (salida.stdout.splitlines() + [''])[:2]
+        tiempos.append(float(tiempo))
+        assert not cargados, f"Importados al cargar src: {cargados}"
+    print(f"   ✅ Ninguno de {', '.join(PESADOS)} se importa")
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    sys.exit(1)
+
+print("\n2️⃣ Test: Presupuesto de tiempo de importación...")
+try:
+    limite = BENCHMARK_CONFIG['import_budget_s']
+    assert min(tiempos) <= limite, f"{min(tiempos):.2f} s > {limite:.2f} s"
+    print(f"   ✅ {min(tiempos):.2f} s (límite {limite:.2f} s)")
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    sys.exit(1)
+
+print("\n3️⃣ Test: Las bibliotecas se cargan al usarlas...")
+try:
+    import pandas as pd
+    from src import analysis, visualization
+
+    datos = pd.Series([1.5, 2.0, 2.5, 3.1, 4.2, 5.0, 5.5, 6.1])
+    assert analysis.test_normality(datos)
+    assert 'scipy.stats' in sys.modules
+    assert visualization.generate_boxplot(datos, "Cuantitativa Continua", 'Valor') is not None
+    assert 'matplotlib.pyplot' in sys.modules and 'streamlit' not in sys.modules
+    print("   ✅ scipy.stats y matplotlib importados bajo demanda")
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+print("\n" + "=" * 60)
+print("✅ TESTS COMPLETADOS")
+print("=" * 60)
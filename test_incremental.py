@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Test de análisis incremental: combinar el estado guardado con las filas nuevas"""
+
+import io
+import sys
+import numpy as np
+import pandas as pd
+from src import analysis, incremental, utils
+from src.config import ANALYSIS_CONFIG
+
+print("=" * 60)
+print("🧪 TEST: Análisis Incremental")
+print("=" * 60)
+
+np.random.seed(42)
+n = 20000
+df = pd.DataFrame({
+    'Precio': np.round(np.random.normal(50, 10, n), 2),
+    'Ventas': np.random.randint(0, 400, n),
+    'Cantidad': np.random.randint(0, 8, n),
+    'Region': np.random.choice(['Norte', 'Sur', 'Este', 'Oeste'], n),
+    'Margen': np.random.lognormal(1, 0.4, n),
+})
+df.loc[::13, 'Precio'] = np.nan
+tipos = {
+    'Precio': "Cuantitativa Continua",
+    'Ventas': "Cuantitativa Discreta con Intervalos",
+    'Cantidad': "Cuantitativa Discreta",
+    'Region': "Cualitativa",
+    'Margen': "Cuantitativa Continua",
+}
+
+# Test 1: Estado combinado igual al calculado sobre todos los datos
+print("\n1️⃣ Test: Combinar bloques de filas...")
+try:
+    bloques = [df.iloc[:12000], df.iloc[12000:19000], df.iloc[19000:]]
+    estado = incremental.dataset_state(bloques[0])
+    for bloque in bloques[1:]:
+        estado = incremental.merge_dataset_states(estado, incremental.dataset_state(bloque))
+    assert estado['rows'] == n and estado['columns']['Precio']['nulls'] == df['Precio'].isna().sum()
+
+    for columna, tipo in tipos.items():
+        datos = df[columna].dropna()
+        resumen = estado['columns'][columna]
+        tabla = analysis.calculate_frequency_table(datos, tipo)
+        assert incremental.frequency_table_from_state(resumen, tipo) == tabla, columna
+        assert incremental.quartiles_from_state(resumen, tabla, tipo) == analysis.calculate_quartiles(datos, tabla, tipo)
+        esperado = analysis.calculate_statistics_summary(datos)
+        obtenido = incremental.statistics_summary_from_state(resumen)
+        assert obtenido == esperado, {k: (v, obtenido.get(k)) for k, v in esperado.items() if v != obtenido.get(k)}
+        print(f"   ✅ {columna}: tabla, resumen y cuartiles idénticos")
+
+    correlacion = incremental.correlation_from_state(estado['correlation'], ['Precio', 'Ventas', 'Margen'])
+    esperada = analysis.calculate_correlation_matrix(df, ['Precio', 'Ventas', 'Margen'])
+    assert np.allclose(correlacion.to_numpy(), esperada.to_numpy(), atol=1e-12)
+    print("   ✅ Correlación por pares (con nulos) igual a DataFrame.corr")
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 2: Esquema de cuantiles con demasiados valores distintos
+print("\n2️⃣ Test: Esquema de cuantiles aproximado...")
+try:
+    limite = ANALYSIS_CONFIG['incremental_max_distinct']
+    ANALYSIS_CONFIG['incremental_max_distinct'] = 1000
+    try:
+        margen = incremental.merge_states(
+            incremental.column_state(df['Margen'].iloc[:10000]),
+            incremental.column_state(df['Margen'].iloc[10000:])
+        )
+    finally:
+        ANALYSIS_CONFIG['incremental_max_distinct'] = limite
+
+    assert not incremental.is_exact(margen) and margen['n'] == n
+    precision = ANALYSIS_CONFIG['sketch_relative_accuracy']
+    for q in (0.1, 0.25, 0.5, 0.75, 0.9):
+        exacto = df['Margen'].quantile(q)
+        assert abs(incremental.state_quantile(margen, q) - exacto) <= 2 * precision * exacto, q
+    assert np.isclose(margen['mean'], df['Margen'].mean())
+    print(f"   ✅ Cuantiles con error relativo ≤ {precision:.0%} y momentos exactos")
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 3: Detección de filas añadidas al archivo
+print("\n3️⃣ Test: Detección de filas añadidas por la huella del prefijo...")
+try:
+    original = df.iloc[:15000].to_csv(index=False).encode('utf-8')
+    ampliado = original + df.iloc[15000:].to_csv(index=False, header=False).encode('utf-8')
+    estado = incremental.dataset_state(utils._read_csv(io.BytesIO(original), ',', '.', 'utf-8'), original)
+
+    assert incremental.appended_tail(original, estado) is None  # Mismo archivo
+    assert incremental.appended_tail(ampliado, estado) == ampliado[len(original):]
+    modificado = b'X' + ampliado[1:]
+    assert incremental.appended_tail(modificado, estado) is None  # Cambió el inicio
+
+    columnas = list(df.columns)
+    leer = lambda filas: utils.read_csv_rows(filas, columnas, ',', '.', 'utf-8', text_columns=['Region'])
+    actualizado, nuevas = incremental.update_dataset_state(estado, ampliado, leer)
+    assert nuevas == n - 15000 and actualizado['rows'] == n
+    completo = utils._read_csv(io.BytesIO(ampliado), ',', '.', 'utf-8')
+    for columna, tipo in tipos.items():
+        tabla = analysis.calculate_frequency_table(completo[columna].dropna(), tipo)
+        assert incremental.frequency_table_from_state(actualizado['columns'][columna], tipo) == tabla, columna
+    assert incremental.appended_tail(ampliado, actualizado) is None
+    print(f"   ✅ {nuevas:,} filas nuevas leídas y combinadas con el estado guardado")
+
+    # Vista previa y gráficos sin volver a leer el archivo completo
+    assert actualizado['head'].equals(completo.head(len(actualizado['head'])))
+    for columna in tipos:
+        reconstruida = incremental.data_from_state(actualizado['columns'][columna])
+        esperada = completo[columna].dropna()
+        assert len(reconstruida) == len(esperada), columna
+        assert reconstruida.value_counts().sort_index().equals(esperada.value_counts().sort_index().rename('count')), columna
+        assert utils.determine_variable_type(reconstruida) == utils.determine_variable_type(esperada), columna
+    print("   ✅ Valores de cada columna reconstruidos desde sus frecuencias")
+
+    # Un archivo distinto no se combina
+    assert incremental.update_dataset_state(estado, modificado, leer) == (None, 0)
+    print("   ✅ Archivos modificados se recalculan completos")
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 4: Intervalos fijos para sumar y comparar tablas
+print("\n4️⃣ Test: Tablas agrupadas con intervalos fijos...")
+try:
+    precio = df['Precio'].dropna()
+    limites = analysis.compute_bin_edges(precio.iloc[:5000])
+    assert analysis.calculate_frequency_table(precio, "Cuantitativa Continua", bin_edges=analysis.compute_bin_edges(precio)) == \
+        analysis.calculate_frequency_table(precio, "Cuantitativa Continua")
+
+    # Los límites se amplían con la anchura del primer intervalo para cubrir todos los datos
+    assert analysis.extend_bin_edges([0, 10, 20, 25], -15, 25) == [-20, -10, 0, 10, 20, 25, 35]
+    assert analysis.extend_bin_edges([0, 10, 20, 25], 3, 24) == [0, 10, 20, 25]
+    for incorrectos in ([1], [0, 10, 10], [5, 2]):
+        try:
+            analysis.extend_bin_edges(incorrectos, 0, 1)
+            raise AssertionError(incorrectos)
+        except ValueError:
+            pass
+    assert analysis.validate_bin_edges([0, 10, 20, 30]) == [0, 10, 20, 30]
+
+    # Un valor atípico o unos límites de otros datos no generan millones de intervalos
+    try:
+        analysis.extend_bin_edges([0, 1], 0, 5e6)
+        raise AssertionError("límites ampliados sin tope")
+    except ValueError as e:
+        assert "máximo" in str(e)
+
+    # La suma de las tablas por bloques es la tabla de todos los datos
+    partes = [precio.iloc[:6000], precio.iloc[6000:11000], precio.iloc[11000:]]
+    tablas = [analysis.calculate_frequency_table(parte, "Cuantitativa Continua", bin_edges=limites) for parte in partes]
+    combinada = analysis.merge_frequency_tables(tablas, "Cuantitativa Continua")
+    assert combinada == analysis.calculate_frequency_table(precio, "Cuantitativa Continua", bin_edges=limites)
+
+    estado = incremental.column_state(precio)
+    assert incremental.frequency_table_from_state(estado, "Cuantitativa Continua", bin_edges=limites) == combinada
+    assert incremental.bin_edges_from_state(estado) == analysis.compute_bin_edges(precio)
+    print(f"   ✅ {len(tablas)} tablas con {len(combinada) - 1} intervalos comunes sumadas sin recalcular")
+
+    regiones = [analysis.calculate_frequency_table(parte, "Cualitativa") for parte in (df['Region'][:7000], df['Region'][7000:])]
+    assert analysis.merge_frequency_tables(regiones, "Cualitativa") == analysis.calculate_frequency_table(df['Region'], "Cualitativa")
+    print("   ✅ Tablas de categorías combinadas")
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+print("\n" + "=" * 60)
+print("✅ TESTS COMPLETADOS")
+print("=" * 60)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Test de carga de archivos: varios archivos y todas las hojas de un libro"""
+
+import io
+import sys
+import numpy as np
+import pandas as pd
+from src import utils
+
+print("=" * 60)
+print("🧪 TEST: Carga de Archivos")
+print("=" * 60)
+
+np.random.seed(42)
+meses = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+
+# Libro Excel de 12 hojas en memoria
+workbook = io.BytesIO()
+with pd.ExcelWriter(workbook, engine='openpyxl') as writer:
+    for mes in meses:
+        pd.DataFrame({
+            'Ventas': np.random.randint(100, 500, 20),
+            'Precio': np.round(np.random.uniform(5, 50, 20), 2)
+        }).to_excel(writer, sheet_name=mes, index=False)
+workbook_bytes = workbook.getvalue()
+
+csv_bytes = pd.DataFrame({'Ventas': [1, 2, 3], 'Region': ['N', 'S', 'E']}).to_csv(index=False).encode('utf-8')
+
+# Test 1: Hojas de un libro
+print("\n1️⃣ Test: Listar y cargar todas las hojas de un libro...")
+try:
+    sheets = utils.list_excel_sheets(workbook_bytes)
+    assert sheets == meses, sheets
+    print(f"   ✅ Hojas detectadas: {len(sheets)}")
+
+    datasets = utils.load_multiple_files(
+        [('reporte.xlsx', workbook_bytes), ('extra.csv', csv_bytes)], max_workers=2
+    )
+    assert list(datasets)[:2] == ['reporte.xlsx - Ene', 'reporte.xlsx - Feb']
+    assert list(datasets)[-1] == 'extra.csv'
+    assert all(len(datasets[f'reporte.xlsx - {mes}']) == 20 for mes in meses)
+    print(f"   ✅ Conjuntos cargados: {len(datasets)}")
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 2: Combinar con columna de origen
+print("\n2️⃣ Test: Combinar conjuntos con columna de origen...")
+try:
+    combined = utils.combine_datasets(datasets)
+    assert combined.columns[0] == 'Origen'
+    assert len(combined) == 12 * 20 + 3
+    assert combined['Origen'].value_counts()['reporte.xlsx - Mar'] == 20
+    assert combined.loc[combined['Origen'] == 'extra.csv', 'Precio'].isna().all()
+    print(f"   ✅ Conjunto combinado: {combined.shape[0]} filas × {combined.shape[1]} columnas")
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 3: Detección automática del formato CSV
+print("\n3️⃣ Test: Detección de separador, decimal, codificación y encabezado...")
+try:
+    casos = {
+        'ejemplo_ventas.csv': (open('data/ejemplo_ventas.csv', 'rb').read(),
+                               {'separator': ',', 'decimal': '.', 'encoding': 'utf-8', 'header': True}),
+        'europeo (latin-1)': ('Nombre;Precio;Cantidad\nÁrbol;1,5;3\nPeña;2,75;4\n'.encode('latin-1'),
+                              {'separator': ';', 'decimal': ',', 'encoding': 'latin-1', 'header': True}),
+        'sin encabezado': (b'1,5;2,3\n4,5;3,3\n7,1;8,2\n',
+                           {'separator': ';', 'decimal': ',', 'encoding': 'utf-8', 'header': False}),
+        'tabulado': (b'a\tb\n1.5\t2\n3.5\t4\n',
+                     {'separator': '\t', 'decimal': '.', 'encoding': 'utf-8', 'header': True}),
+    }
+    for nombre, (contenido, esperado) in casos.items():
+        detectado = utils.sniff_csv_options(contenido)
+        assert detectado == esperado, f"{nombre}: {detectado}"
+        print(f"   ✅ {nombre}: {detectado}")
+
+    # Solo se inspecciona el inicio del archivo
+    grande = io.BytesIO(('a;b\n' + '1,5;2\n' * 200000).encode('utf-8'))
+    detectado = utils.sniff_csv_options(grande, sample_size=4096)
+    assert grande.tell() == 0 and detectado['separator'] == ';'
+
+    df = utils._read_csv(io.BytesIO(casos['sin encabezado'][0]), ';', ',', 'utf-8', header=False)
+    assert list(df.columns) == ['Columna_1', 'Columna_2'] and df.iloc[0, 0] == 1.5
+    print("   ✅ Archivo leído una sola vez con las opciones detectadas")
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 4: Carga por columnas con tipos compactos
+print("\n4️⃣ Test: Carga solo de las columnas seleccionadas...")
+try:
+    n = 2000
+    ancho = pd.DataFrame({f'V{i}': np.round(np.random.normal(0, 1, n), 3) for i in range(40)})
+    ancho['Grupo'] = np.random.choice(['A', 'B', 'C'], n)
+    ancho['Conteo'] = np.random.randint(0, 1000, n)
+    ancho['Mitad'] = np.random.randint(0, 100, n) / 2
+    ancho_bytes = ancho.to_csv(index=False).encode('utf-8')
+
+    columnas = utils.read_csv_header(ancho_bytes, ',', '.', 'utf-8')
+    assert columnas == list(ancho.columns)
+
+    df = utils.load_csv_columns(ancho_bytes, ['Grupo', 'Conteo', 'Mitad', 'V3'], ',', '.', 'utf-8')
+    assert list(df.columns) == ['Grupo', 'Conteo', 'Mitad', 'V3']
+    assert df['Grupo'].dtype == 'category'
+    assert df['Conteo'].dtype == np.int32
+    assert df['Mitad'].dtype == np.float32  # Mitades exactas en float32
+    assert df['V3'].dtype == np.float64  # Decimales no representables sin pérdida
+    assert (df['Conteo'] == ancho['Conteo']).all() and (df['Mitad'] == ancho['Mitad']).all()
+    print(f"   ✅ Tipos compactos: {dict(df.dtypes.astype(str))}")
+
+    # Las columnas ya cargadas se reutilizan; solo se lee la nueva
+    en_memoria = next(iter(utils._COLUMN_CACHE.values()))
+    grupo = en_memoria['Grupo']
+    df = utils.load_csv_columns(ancho_bytes, ['V10', 'Grupo'], ',', '.', 'utf-8')
+    assert en_memoria['Grupo'] is grupo and 'V10' in en_memoria and 'V11' not in en_memoria
+    print(f"   ✅ Columnas en memoria: {len(en_memoria)} de {len(columnas)}")
+
+    # Sin encabezado se conserva el nombre por posición
+    df = utils.load_csv_columns(casos['sin encabezado'][0], ['Columna_2'], ';', ',', 'utf-8', header=False)
+    assert list(df.columns) == ['Columna_2'] and df.iloc[0, 0] == 2.3
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 5: Motor de lectura de Arrow
+print("\n5️⃣ Test: Motor de lectura de Arrow con respaldo al motor de C...")
+try:
+    for nombre, (contenido, opciones) in casos.items():
+        argumentos = (opciones['separator'], opciones['decimal'], opciones['encoding'], opciones['header'])
+        arrow = utils._read_csv(io.BytesIO(contenido), *argumentos, engine='pyarrow')
+        c = utils._read_csv(io.BytesIO(contenido), *argumentos)
+        pd.testing.assert_frame_equal(arrow, c, check_dtype=False)
+    print("   ✅ Mismo resultado que el motor de C en los casos de detección")
+
+    df = utils.load_csv_columns(ancho_bytes, ['Grupo', 'V7'], ',', '.', 'utf-8', engine='pyarrow')
+    assert df['Grupo'].dtype == 'category' and np.allclose(df['V7'], ancho['V7'])
+    print("   ✅ Carga por columnas con Arrow")
+
+    # Casos no soportados por Arrow: se usa el motor de C
+    duplicadas = utils._read_csv(io.BytesIO(b'a,a,b\n1,2,3\n'), ',', '.', 'utf-8', engine='pyarrow')
+    assert list(duplicadas.columns) == ['a', 'a.1', 'b']
+    varios = utils._read_csv(io.BytesIO(b'a::b\n1::2\n'), '::', '.', 'utf-8', engine='pyarrow')
+    assert list(varios.columns) == ['a', 'b']
+    irregular = utils._read_csv(io.BytesIO(b'a,b\n1,2\n3\n'), ',', '.', 'utf-8', engine='pyarrow')
+    assert len(irregular) == 2
+    print("   ✅ Respaldo al motor de C con encabezados repetidos, separadores largos y filas irregulares")
+
+    datasets = utils.load_multiple_files([('extra.csv', csv_bytes)], engine='pyarrow')
+    assert list(datasets['extra.csv']['Region']) == ['N', 'S', 'E']
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 6: Huellas para indexar las cachés
+print("\n6️⃣ Test: Cachés indexadas por huellas...")
+try:
+    from src import cache
+
+    huella = cache.fingerprint_bytes(ancho_bytes)
+    assert huella == cache.fingerprint_bytes(bytes(ancho_bytes)) != cache.fingerprint_bytes(csv_bytes)
+    assert cache.derive_fingerprint(huella, 'csv', {'b': 1, 'a': [2]}) == cache.derive_fingerprint(huella, 'csv', {'a': [2], 'b': 1})
+    assert cache.column_fingerprint(huella, 'V1') != cache.column_fingerprint(huella, 'V1', 'dropna')
+
+    # Con la huella, la caché del cargador no vuelve a hashear el contenido
+    df1 = utils.load_csv_file(io.BytesIO(ancho_bytes), ',', '.', 'utf-8', fingerprint=huella)
+    df2 = utils.load_csv_file(io.BytesIO(b'otro contenido'), ',', '.', 'utf-8', fingerprint=huella)
+    pd.testing.assert_frame_equal(df1, df2)
+    datasets = utils.load_multiple_files([('extra.csv', io.BytesIO(csv_bytes))])
+    assert list(datasets['extra.csv'].columns) == ['Ventas', 'Region']
+
+    # La imputación registra la huella de la columna resultante
+    nulos = ancho[['V1', 'V2']].copy()
+    nulos.loc[::3, 'V1'] = np.nan
+    _, registro = utils.handle_missing_values(nulos, 'V1', "Reemplazar por la media", fingerprint=huella)
+    assert registro['Huella'] in utils._IMPUTATION_CACHE
+    _, otro = utils.handle_missing_values(nulos, 'V1', "Reemplazar por la mediana", fingerprint=huella)
+    assert otro['Huella'] != registro['Huella']
+    print("   ✅ Cargadores e imputaciones indexados por huellas")
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+print("\n" + "=" * 60)
+print("✅ TESTS COMPLETADOS")
+print("=" * 60)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Test de pruebas de normalidad por lotes sobre varias columnas"""
+
+import sys
+import numpy as np
+import pandas as pd
+from src import analysis, cache
+
+print("=" * 60)
+print("🧪 TEST: Pruebas de Normalidad por Lotes")
+print("=" * 60)
+
+np.random.seed(42)
+df = pd.DataFrame({
+    f'Sensor_{i}': np.random.normal(50, 10, 300) if i % 2 == 0 else np.random.exponential(5, 300)
+    for i in range(8)
+})
+df['Texto'] = ['a'] * 300
+df.loc[::7, 'Sensor_1'] = np.nan
+
+# Test 1: Reporte sobre todas las columnas numéricas
+print("\n1️⃣ Test: Reporte sobre todas las columnas numéricas...")
+try:
+    summary = analysis.test_normality_batch(df, max_workers=2)
+    print(f"   ✅ Reporte generado: {summary.shape[0]} filas")
+    print(summary.head(6).to_string(index=False))
+
+    assert set(summary['Variable']) == {f'Sensor_{i}' for i in range(8)}
+    assert 'Texto' not in set(summary['Variable'])
+
+    # Los resultados coinciden con la prueba individual
+    single = analysis.test_normality(df['Sensor_1'].dropna())
+    row = summary[(summary['Variable'] == 'Sensor_1') & (summary['Prueba'] == 'Shapiro-Wilk')].iloc[0]
+    assert row['p-valor'] == single['Shapiro-Wilk']['p-valor']
+    assert row['N'] == df['Sensor_1'].notna().sum()
+    print("   ✅ Resultados idénticos a la prueba individual")
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 2: Caché por huella de columna
+print("\n2️⃣ Test: Caché por huella de la columna...")
+try:
+    renamed = df[['Sensor_0']].rename(columns={'Sensor_0': 'Copia'})
+    fingerprint = cache.content_fingerprint(renamed['Copia'].dropna())
+    assert fingerprint in analysis._NORMALITY_CACHE
+    summary_copy = analysis.test_normality_batch(renamed)
+    assert list(summary_copy['Variable'].unique()) == ['Copia']
+    print("   ✅ Columna con el mismo contenido reutiliza el resultado en caché")
+
+    # Con la huella del conjunto de datos la clave no depende del contenido
+    analysis.test_normality_batch(df, ['Sensor_2'], fingerprint='conjunto')
+    assert cache.column_fingerprint('conjunto', 'Sensor_2', 'dropna') in analysis._NORMALITY_CACHE
+    print("   ✅ Clave de caché derivada de la huella del conjunto de datos")
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 3: Columnas con datos insuficientes
+print("\n3️⃣ Test: Columna con datos insuficientes...")
+try:
+    small = pd.DataFrame({'Corta': [1.0, 2.0, np.nan]})
+    summary_small = analysis.test_normality_batch(small)
+    assert summary_small.iloc[0]['Observación'] is not None
+    print(f"   ✅ Observación: {summary_small.iloc[0]['Observación']}")
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 4: Modo de muestras grandes
+print("\n4️⃣ Test: Modo de muestras grandes (n > 5000)...")
+try:
+    from scipy import stats
+    large = pd.Series(np.random.default_rng(7).exponential(2, 20000))
+    view = analysis.build_sample_view(large)
+    results = analysis.test_normality(large, view)
+    print(f"   Pruebas aplicadas: {list(results)}")
+
+    assert 'Shapiro-Wilk' not in results
+    for test_name in ['Anderson-Darling', 'Jarque-Bera', 'Shapiro-Wilk (submuestras)', 'Kolmogorov-Smirnov']:
+        assert test_name in results, f"Falta {test_name}"
+        assert not results[test_name]['Es Normal (α=0.05)']
+
+    # Estadísticos coherentes con scipy
+    assert results['Jarque-Bera']['Estadístico'] == round(float(stats.jarque_bera(large).statistic), 4)
+    assert results['Anderson-Darling']['Estadístico'] == round(float(stats.anderson(large, 'norm').statistic), 4)
+
+    # Reproducible: mismas submuestras en cada ejecución
+    again = analysis.test_normality(large)
+    assert again['Shapiro-Wilk (submuestras)'] == results['Shapiro-Wilk (submuestras)']
+    print("   ✅ Modo de muestras grandes correcto y reproducible")
+
+    # El resumen reutiliza la misma vista
+    summary = analysis.calculate_statistics_summary(large, view)
+    assert summary['Mediana'] == round(float(np.median(large)), 4)
+    print("   ✅ Resumen estadístico calculado desde la vista compartida")
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+# Test 5: Gráfico Q-Q con reducción de cuantiles
+print("\n5️⃣ Test: Gráfico Q-Q con reducción de cuantiles...")
+try:
+    import matplotlib
+    matplotlib.use('Agg')
+    from scipy import stats
+    from src import visualization
+    from src.config import VISUALIZATION_CONFIG
+
+    # Columna pequeña: mismos puntos que stats.probplot
+    small = pd.Series(np.random.default_rng(3).normal(10, 2, 300))
+    fig = visualization.generate_qq_plot(small, 'Pequeña')
+    (osm, osr), _ = stats.probplot(small)
+    points = fig.axes[0].lines[0]
+    assert np.allclose(points.get_xdata(), osm) and np.allclose(points.get_ydata(), osr)
+
+    # Columna grande: puntos acotados y colas exactas
+    view = analysis.build_sample_view(large)
+    fig = visualization.generate_qq_plot(large, 'Grande', view)
+    observed = fig.axes[0].lines[0].get_ydata()
+    tail = VISUALIZATION_CONFIG['qq_tail_points']
+    assert len(observed) <= VISUALIZATION_CONFIG['qq_max_points']
+    assert np.array_equal(observed[:tail], view['sorted'][:tail])
+    assert np.array_equal(observed[-tail:], view['sorted'][-tail:])
+    print(f"   ✅ Q-Q con {len(observed)} puntos para {view['n']:,} valores")
+
+    fig = visualization.generate_distribution_comparison(large, 'Grande', view)
+    heights = sum(patch.get_height() * patch.get_width() for patch in fig.axes[0].patches)
+    assert abs(heights - 1) < 1e-9
+    print("   ✅ Comparación con la normal desde la vista compartida")
+except Exception as e:
+    print(f"   ❌ Error: {e}")
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
+
+print("\n" + "=" * 60)
+print("✅ TESTS COMPLETADOS")
+print("=" * 60)